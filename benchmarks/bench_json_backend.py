@@ -0,0 +1,57 @@
+"""Compare the JSON backends on a large woql:And update query.
+
+Usage::
+
+    python benchmarks/bench_json_backend.py [number_of_triples]
+
+with the package installed (``pip install -e .``).
+
+For every installed backend it times the serialization of the request body
+(``dumps_bytes``), :meth:`WOQLQuery.to_json` and the decoding of the body.
+"""
+import sys
+import timeit
+
+import terminusdb_client.json_backend as json_backend
+from terminusdb_client import WOQLQuery
+
+
+def update_query(size):
+    return WOQLQuery().woql_and(
+        *[
+            WOQLQuery().add_triple(
+                f"doc:person{n}", "scm:name", WOQLQuery().string(f"Person {n}")
+            )
+            for n in range(size)
+        ]
+    )
+
+
+def best_of(func, repeat=5):
+    return min(timeit.repeat(func, number=1, repeat=repeat))
+
+
+def main(size=20000):
+    query = update_query(size)
+    payload = {"query": query.to_dict(), "commit_info": {"message": "bench"}}
+    previous = json_backend.get_backend()
+    print(f"woql:And update with {size} triples")
+    columns = ("size (MB)", "dumps", "to_json", "loads")
+    print(f"{'backend':<8}" + "".join(f" {column:>10}" for column in columns))
+    try:
+        for name in json_backend.available_backends():
+            json_backend.set_backend(name)
+            body = json_backend.dumps_bytes(payload)
+            dumps = best_of(lambda: json_backend.dumps_bytes(payload))
+            to_json = best_of(query.to_json)
+            loads = best_of(lambda: json_backend.loads(body))
+            print(
+                f"{name:<8} {len(body) / 2 ** 20:>10.2f} {dumps * 1000:>8.1f}ms "
+                f"{to_json * 1000:>8.1f}ms {loads * 1000:>8.1f}ms"
+            )
+    finally:
+        json_backend.set_backend(previous)
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
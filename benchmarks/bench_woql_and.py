@@ -0,0 +1,63 @@
+"""Time the construction of large woql:And update queries.
+
+Usage::
+
+    python benchmarks/bench_woql_and.py [number_of_triples ...]
+
+with the package installed (``pip install -e .``).
+
+For each size it times chaining ``.add_triple()`` calls on one query, passing
+all the triples to a single ``woql_and``, appending them one by one with
+``+=``, and :meth:`WOQLQuery.to_dict` of the result. The building times should
+grow linearly with the number of triples.
+"""
+import sys
+import timeit
+
+from terminusdb_client import WOQLQuery
+
+
+def chained(size):
+    query = WOQLQuery()
+    for n in range(size):
+        query.add_triple(f"doc:person{n}", "scm:name", WOQLQuery().string(f"P{n}"))
+    return query
+
+
+def woql_and(size):
+    return WOQLQuery().woql_and(
+        *[
+            WOQLQuery().add_triple(
+                f"doc:person{n}", "scm:name", WOQLQuery().string(f"P{n}")
+            )
+            for n in range(size)
+        ]
+    )
+
+
+def appended(size):
+    query = WOQLQuery()
+    for n in range(size):
+        query += WOQLQuery().add_triple(
+            f"doc:person{n}", "scm:name", WOQLQuery().string(f"P{n}")
+        )
+    return query
+
+
+def best_of(func, repeat=3):
+    return min(timeit.repeat(func, number=1, repeat=repeat))
+
+
+def main(*sizes):
+    builders = (chained, woql_and, appended)
+    columns = [builder.__name__ for builder in builders] + ["to_dict"]
+    print(f"{'triples':>8}" + "".join(f" {column:>10}" for column in columns))
+    for size in sizes or (1000, 10000, 100000):
+        times = [best_of(lambda: builder(size)) for builder in builders]
+        query = chained(size)
+        times.append(best_of(query.to_dict))
+        print(f"{size:>8}" + "".join(f" {t * 1000:>8.1f}ms" for t in times))
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,64 @@
+"""Time building the same query shape with different values.
+Usage::
+
+    python benchmarks/bench_woql_template.py [number_of_calls]
+
+with the package installed (``pip install -e .``).
+
+Each call makes the json a client sends, for a lookup and for an update
+query, either by building the query again with the builder methods and
+calling :meth:`WOQLQuery.to_json`, or by binding a template compiled once
+with :meth:`WOQLQuery.compile`. The ``bind+to_dict`` column also decodes the
+bound query with :meth:`WOQLQuery.to_dict`, as :meth:`WOQLClient.query` does.
+"""
+
+import sys
+import timeit
+
+from terminusdb_client import Parameter, WOQLQuery
+
+
+def lookup(name, min_age):
+    return (
+        WOQLQuery()
+        .select("v:Person", "v:Age")
+        .woql_and(
+            WOQLQuery().triple("v:Person", "type", "scm:Person"),
+            WOQLQuery().triple("v:Person", "scm:name", name),
+            WOQLQuery().triple("v:Person", "scm:age", "v:Age"),
+            WOQLQuery().greater("v:Age", min_age),
+        )
+    )
+
+
+def update(person, name, age):
+    return WOQLQuery().woql_and(
+        WOQLQuery().insert(person, "scm:Person"),
+        WOQLQuery().add_triple(person, "scm:name", name),
+        WOQLQuery().add_triple(person, "scm:age", age),
+    )
+
+
+def best_of(func, calls, repeat=3):
+    return min(timeit.repeat(func, number=calls, repeat=repeat)) / calls
+
+
+def main(calls=2000):
+    shapes = {
+        "lookup": (lookup, {"name": "Alice", "min_age": 30}),
+        "update": (update, {"person": "doc:alice", "name": "Alice", "age": 30}),
+    }
+    columns = ["build", "bind", "bind+to_dict"]
+    print(f"{'query':>8}" + "".join(f" {column:>13}" for column in columns))
+    for shape, (builder, values) in shapes.items():
+        template = builder(**{key: Parameter(key) for key in values}).compile()
+        times = [
+            best_of(lambda: builder(**values).to_json(), calls),
+            best_of(lambda: template.bind(**values).to_json(), calls),
+            best_of(lambda: template.bind(**values).to_dict(), calls),
+        ]
+        print(f"{shape:>8}" + "".join(f" {t * 1e6:>11.1f}us" for t in times))
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -17,7 +17,12 @@ test_requirements = [
     "pytest-runner",
 ]
 
-extras_require = {"dataframe": ["numpy >= 1.13.0", "pandas >= 0.23.0"]}
+extras_require = {
+    "dataframe": ["numpy >= 1.13.0", "pandas >= 0.23.0"],
+    "async": ["httpx >= 0.18.0"],
+    "fastjson": ["orjson >= 3.0.0"],
+    "http2": ["httpx[http2] >= 0.18.0"],
+}
 
 setuptools.setup(
     name="terminusdb-client",
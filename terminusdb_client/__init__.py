@@ -1,8 +1,18 @@
+from .woqlclient import AsyncWOQLClient  # noqa
+from .woqlclient import Deadline  # noqa
+from .woqlclient import MultiServerWOQLClient  # noqa
+from .woqlclient import QueryCache  # noqa
+from .woqlclient import RetryPolicy  # noqa
+from .woqlclient import SchemaCache  # noqa
 from .woqlclient import WOQLClient  # noqa
 from .woqldataframe import woqlDataframe as WOQLDataFrame  # noqa
+from .woqlquery import AsyncBulkWriter  # noqa
+from .woqlquery import BulkWriter  # noqa
+from .woqlquery import Parameter  # noqa
 from .woqlquery import TerminusDB  # noqa
 from .woqlquery import WOQLClass  # noqa
 from .woqlquery import WOQLLib  # noqa
 from .woqlquery import WOQLObj  # noqa
 from .woqlquery import WOQLQuery  # noqa
+from .woqlquery import WOQLTemplate  # noqa
 from .woqlview import WOQLView  # noqa
@@ -0,0 +1,220 @@
+"""json_backend.py
+
+Pluggable JSON encoder/decoder used for request bodies, multipart payload parts,
+response decoding and :meth:`WOQLQuery.to_json`.
+
+The fastest installed backend is picked on import (``orjson``, then ``ujson``,
+then the standard library ``json``). A different one can be selected with
+:func:`set_backend`, by name or with any object providing the
+:class:`JSONBackend` methods.
+
+All the backends write the same text: compact JSON, without whitespace and
+with the non-ASCII characters left unescaped, so the output of
+:meth:`WOQLQuery.to_json` does not depend on the installed backend.
+"""
+import json
+import re
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ujson
+except ImportError:
+    ujson = None
+
+
+# run of digits long enough for an integer out of the 64 bits orjson decodes
+# exactly (18446744073709551616 and -9223372036854775809 have 20 and 19)
+_LONG_NUMBER = re.compile(r"\d{19}")
+_LONG_NUMBER_BYTES = re.compile(rb"\d{19}")
+
+
+def _may_overflow(data):
+    """Whether the JSON ``data`` may hold an integer out of 64 bits."""
+    if isinstance(data, str):
+        return _LONG_NUMBER.search(data) is not None
+    return _LONG_NUMBER_BYTES.search(data) is not None
+
+
+def _std_dumps(obj, sort_keys):
+    """Serialize ``obj`` with the standard library, in the format of orjson."""
+    return json.dumps(
+        obj, sort_keys=sort_keys, separators=(",", ":"), ensure_ascii=False
+    )
+
+
+class JSONBackend:
+    """JSON backend built on the standard library ``json`` module.
+
+    It is also the interface of every backend: subclasses override
+    :meth:`dumps`, :meth:`dumps_bytes` and :meth:`loads`, and write the same
+    text as :meth:`dumps`."""
+
+    name = "json"
+
+    def dumps(self, obj, sort_keys=False):
+        """Serialize ``obj`` to a compact JSON string.
+
+        There is no whitespace between the tokens, and the non-ASCII characters
+        are not escaped.
+
+        Parameters
+        ----------
+        obj
+            The object to serialize.
+        sort_keys : bool
+            If ``True``, the keys of the objects are sorted.
+
+        Returns
+        -------
+        str
+        """
+        return _std_dumps(obj, sort_keys)
+
+    def dumps_bytes(self, obj):
+        """Serialize ``obj`` to UTF-8 encoded JSON, ready to be sent over HTTP.
+
+        Returns
+        -------
+        bytes
+        """
+        return self.dumps(obj).encode("utf-8")
+
+    def loads(self, data):
+        """Deserialize a JSON document.
+
+        Parameters
+        ----------
+        data : str or bytes
+            The JSON document.
+
+        Raises
+        ------
+        ValueError
+            If ``data`` is not valid JSON.
+        """
+        return json.loads(data)
+
+
+class OrjsonBackend(JSONBackend):
+    """JSON backend built on ``orjson``, which encodes straight to bytes.
+
+    Objects ``orjson`` refuses (non-string keys, integers over 64 bits) are
+    serialized by the standard library instead, and documents which may hold
+    integers over 64 bits, that ``orjson`` would turn into floats, are
+    deserialized by the standard library."""
+
+    name = "orjson"
+
+    def dumps(self, obj, sort_keys=False):
+        return self.dumps_bytes(obj, sort_keys).decode("utf-8")
+
+    def dumps_bytes(self, obj, sort_keys=False):
+        try:
+            return orjson.dumps(obj, option=orjson.OPT_SORT_KEYS if sort_keys else 0)
+        except TypeError:
+            return _std_dumps(obj, sort_keys).encode("utf-8")
+
+    def loads(self, data):
+        if _may_overflow(data):
+            return json.loads(data)
+        return orjson.loads(data)
+
+
+class UjsonBackend(JSONBackend):
+    """JSON backend built on ``ujson``."""
+
+    name = "ujson"
+
+    def dumps(self, obj, sort_keys=False):
+        return ujson.dumps(
+            obj,
+            sort_keys=sort_keys,
+            ensure_ascii=False,
+            escape_forward_slashes=False,
+        )
+
+    def loads(self, data):
+        return ujson.loads(data)
+
+
+_BACKENDS = {
+    "orjson": (orjson, OrjsonBackend),
+    "ujson": (ujson, UjsonBackend),
+    "json": (json, JSONBackend),
+}
+
+
+def available_backends():
+    """Names of the installed backends, fastest first.
+
+    Returns
+    -------
+    list
+    """
+    return [name for name, (module, _) in _BACKENDS.items() if module is not None]
+
+
+def get_backend():
+    """The backend currently in use.
+
+    Returns
+    -------
+    JSONBackend
+    """
+    return _backend
+
+
+def set_backend(backend=None):
+    """Select the backend used by the client.
+
+    Parameters
+    ----------
+    backend : str or JSONBackend, optional
+        Name of an installed backend (``"orjson"``, ``"ujson"`` or ``"json"``),
+        or an object with ``dumps``, ``dumps_bytes`` and ``loads`` methods. If
+        ``None``, the fastest installed backend is used.
+
+    Raises
+    ------
+    ValueError
+        If the named backend is unknown or not installed.
+
+    Returns
+    -------
+    JSONBackend
+        The previous backend, so it can be restored.
+    """
+    global _backend
+    previous = _backend
+    if backend is None:
+        backend = available_backends()[0]
+    if isinstance(backend, str):
+        module, backend_class = _BACKENDS.get(backend, (None, None))
+        if module is None:
+            raise ValueError(f"JSON backend {backend} is not installed")
+        backend = backend_class()
+    _backend = backend
+    return previous
+
+
+def dumps(obj, sort_keys=False):
+    """Serialize ``obj`` to a JSON string with the current backend."""
+    return _backend.dumps(obj, sort_keys=sort_keys)
+
+
+def dumps_bytes(obj):
+    """Serialize ``obj`` to UTF-8 encoded JSON with the current backend."""
+    return _backend.dumps_bytes(obj)
+
+
+def loads(data):
+    """Deserialize a JSON ``str`` or ``bytes`` with the current backend."""
+    return _backend.loads(data)
+
+
+_backend = None
+set_backend()
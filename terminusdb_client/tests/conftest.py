@@ -1,2 +1,53 @@
+import http.server
+import threading
+import unittest.mock as mock
+
+import pytest
+from terminusdb_client.woqlclient.woqlClient import WOQLClient
+
+from .mockResponse import mocked_requests
+
+
 def pytest_addoption(parser):
     parser.addoption("--docker-compose", action="store", default=None)
+
+
+@pytest.fixture
+def stub_server():
+    """Start local HTTP servers answering with a request handler class.
+
+    Call it with the handler class to get the URL of a new server, the servers
+    are stopped at the end of the test. A ``received`` list attribute of the
+    handler, where it records the requests, is emptied first."""
+    servers = []
+
+    def start(handler):
+        if hasattr(handler, "received"):
+            handler.received = []
+        server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return f"http://127.0.0.1:{server.server_port}"
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.fixture
+def connected_client():
+    """Make clients connected to the myDBName database with a mocked GET.
+
+    Call it with the server URL (``http://localhost:6363`` by default), the
+    ``client_class`` (``WOQLClient`` by default) and its keyword arguments."""
+
+    def connect(server_url="http://localhost:6363", client_class=WOQLClient, **kwargs):
+        woql_client = client_class(server_url, **kwargs)
+        with mock.patch("requests.Session.get", side_effect=mocked_requests):
+            woql_client.connect(
+                user="admin", account="admin", key="root", db="myDBName"
+            )
+        return woql_client
+
+    return connect
@@ -1,3 +1,5 @@
+import json
+
 from terminusdb_client.woqlclient.api_endpoint_const import APIEndpointConst
 
 from .connectCapabilitiesResponse import ConnectResponse
@@ -11,6 +13,12 @@ def mocked_requests(*args, **kwargs):
                 raise ValueError("EXCEPTION NO JSON OBJECT")
             return self._json_data
 
+        @property
+        def content(self):
+            if self._json_data is None:
+                return self._content
+            return json.dumps(self._json_data).encode("utf-8")
+
         @property
         def status_code(self):
             return self._status_code
@@ -29,7 +37,7 @@ def mocked_requests(*args, **kwargs):
             self._json_data = None
             self._text = None
             self._status_code = status
-            self._content = "cont"
+            self._content = b"cont"
             self._url = url
             # add json data if provided
 
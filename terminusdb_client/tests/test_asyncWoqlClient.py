@@ -0,0 +1,414 @@
+import asyncio
+import json
+
+import pytest
+from terminusdb_client.woqlclient.api_endpoint_const import APIEndpointConst
+from terminusdb_client.woqlclient.asyncWoqlClient import AsyncWOQLClient
+from terminusdb_client.woqlclient.errors import APIError, DeadlineExceededError
+from terminusdb_client.woqlclient.queryCache import QueryCache
+from terminusdb_client.woqlclient.retryPolicy import RetryPolicy
+from terminusdb_client.woqlclient.schemaCache import SchemaCache
+from terminusdb_client.woqlquery.woql_query import WOQLQuery
+
+from .connectCapabilitiesResponse import ConnectResponse
+from .woqljson.woqlStarJson import WoqlStar
+
+httpx = pytest.importorskip("httpx")
+
+
+def make_client(handler):
+    woql_client = AsyncWOQLClient("http://localhost:6363")
+    woql_client._async_pool.transport = httpx.MockTransport(handler)
+    return woql_client
+
+
+def mocked_handler(calls):
+    def handler(request):
+        calls.append(request)
+        if request.url.path == "/api/":
+            return httpx.Response(200, json=ConnectResponse)
+        return httpx.Response(200, json={"bindings": [{"A": "doc:a"}]})
+
+    return handler
+
+
+def test_connect_and_query():
+    calls = []
+
+    async def run():
+        async with make_client(mocked_handler(calls)) as woql_client:
+            await woql_client.connect(
+                user="admin", account="admin", key="root", db="myDBName"
+            )
+            return await woql_client.query(WoqlStar)
+
+    result = asyncio.run(run())
+
+    assert result == {"bindings": [{"A": "doc:a"}]}
+    assert calls[0].method == "GET"
+    assert calls[0].headers["Authorization"] == "Basic YWRtaW46cm9vdA=="
+    assert calls[1].method == "POST"
+    assert (
+        str(calls[1].url)
+        == "http://localhost:6363/api/woql/admin/myDBName/local/branch/main"
+    )
+    assert json.loads(calls[1].content) == {"query": WoqlStar}
+
+
+def test_concurrent_queries_with_execute():
+    calls = []
+
+    async def run():
+        woql_client = make_client(mocked_handler(calls))
+        await woql_client.connect(
+            user="admin", account="admin", key="root", db="myDBName"
+        )
+        query = WOQLQuery().star()
+        results = await asyncio.gather(*[query.execute(woql_client) for _ in range(5)])
+        await woql_client.aclose()
+        return results
+
+    results = asyncio.run(run())
+
+    assert len(results) == 5
+    assert len(calls) == 6
+
+
+def test_api_error():
+    def handler(request):
+        return httpx.Response(404, json={"api:message": "not found"})
+
+    async def run():
+        woql_client = make_client(handler)
+        await woql_client.dispatch(
+            APIEndpointConst.GET_TRIPLES, "http://localhost:6363/api/x"
+        )
+
+    with pytest.raises(APIError) as error:
+        asyncio.run(run())
+    assert error.value.status_code == 404
+
+
+def test_query_many():
+    calls = []
+
+    async def run():
+        woql_client = make_client(mocked_handler(calls))
+        await woql_client.connect(
+            user="admin", account="admin", key="root", db="myDBName"
+        )
+        results = await woql_client.query_many(
+            [WOQLQuery().star() for _ in range(4)], max_workers=2
+        )
+        await woql_client.aclose()
+        return results
+
+    results = asyncio.run(run())
+
+    assert results == [{"bindings": [{"A": "doc:a"}]}] * 4
+    assert len(calls) == 5
+
+
+def test_query_stream():
+    def handler(request):
+        return httpx.Response(
+            200, content=b'{"bindings": [{"A": 1}, {"A": 2}, {"A": 3}]}'
+        )
+
+    async def run():
+        woql_client = make_client(handler)
+        return [binding async for binding in woql_client.query(WoqlStar, stream=True)]
+
+    assert asyncio.run(run()) == [{"A": 1}, {"A": 2}, {"A": 3}]
+
+
+def test_iter_query():
+    def handler(request):
+        limit_query = json.loads(request.content)["query"]
+        start = limit_query["woql:query"]["woql:start"]["woql:datatype"]["@value"]
+        return httpx.Response(
+            200, json={"bindings": [{"N": n} for n in range(start, min(start + 4, 10))]}
+        )
+
+    async def run():
+        woql_client = make_client(handler)
+        return [
+            binding
+            async for binding in woql_client.iter_query(WOQLQuery().star(), page_size=4)
+        ]
+
+    assert asyncio.run(run()) == [{"N": n} for n in range(10)]
+
+
+def test_iter_query_rejects_updates():
+    woql_client = make_client(lambda request: httpx.Response(200, json={}))
+    with pytest.raises(ValueError):
+        woql_client.iter_query(WOQLQuery().add_triple("doc:a", "type", "X"))
+
+
+def test_unsupported_compression():
+    with pytest.raises(ValueError):
+        AsyncWOQLClient("http://localhost:6363", compression="br")
+
+
+def test_retry_transient_errors():
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        if len(calls) == 1:
+            raise httpx.ConnectError("connection refused")
+        if len(calls) == 2:
+            return httpx.Response(503, text="Service Unavailable")
+        return httpx.Response(200, json=ConnectResponse)
+
+    async def run():
+        woql_client = make_client(handler)
+        woql_client.retry_policy = RetryPolicy(backoff_factor=0)
+        await woql_client.connect(user="admin", account="admin", key="root")
+        return woql_client.retry_policy.stats()
+
+    assert asyncio.run(run()) == {
+        "retries": 2,
+        "retried_requests": 1,
+        "failed_requests": 0,
+    }
+
+
+def test_retry_closed_keep_alive_connections():
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        if len(calls) == 1:
+            raise httpx.RemoteProtocolError("Server disconnected without response")
+        return httpx.Response(200, json=ConnectResponse)
+
+    async def run():
+        woql_client = make_client(handler)
+        woql_client.retry_policy = RetryPolicy(backoff_factor=0)
+        await woql_client.connect(user="admin", account="admin", key="root")
+        return woql_client.retry_policy.stats()
+
+    assert asyncio.run(run())["retries"] == 1
+    assert len(calls) == 2
+
+
+def test_timeout_and_deadline():
+    calls = []
+
+    async def run():
+        woql_client = make_client(mocked_handler(calls))
+        woql_client.timeout = (3, 30)
+        await woql_client.connect(user="admin", account="admin", key="root")
+        await woql_client.query(WoqlStar, timeout=5)
+        await woql_client.query(WoqlStar, deadline=10)
+        with pytest.raises(DeadlineExceededError):
+            await woql_client.query(WoqlStar, deadline=0)
+
+    asyncio.run(run())
+
+    timeouts = [call.extensions["timeout"] for call in calls]
+    assert timeouts[0] == {"connect": 3, "read": 30, "write": None, "pool": None}
+    assert timeouts[1] == {"connect": 5, "read": 5, "write": 5, "pool": 5}
+    assert timeouts[2]["connect"] == 3 and 9 < timeouts[2]["read"] <= 10
+    assert len(calls) == 3
+
+
+def test_streamed_triples_upload():
+    calls = []
+
+    async def run():
+        async with make_client(mocked_handler(calls)) as woql_client:
+            await woql_client.connect(
+                user="admin", account="admin", key="root", db="myDBName"
+            )
+            chunks = (f"doc:a{n} scm:p {n} .\n" for n in range(3))
+            await woql_client.insert_triples("instance", "main", chunks, "load")
+
+    asyncio.run(run())
+
+    assert calls[1].method == "PUT"
+    assert calls[1].headers["Transfer-Encoding"] == "chunked"
+    assert json.loads(calls[1].content)["turtle"] == (
+        "doc:a0 scm:p 0 .\ndoc:a1 scm:p 1 .\ndoc:a2 scm:p 2 .\n"
+    )
+
+
+def test_streamed_downloads(tmp_path):
+    triples = 'doc:a scm:name "☃" .\n'
+
+    def handler(request):
+        if request.url.path == "/api/":
+            return httpx.Response(200, json=ConnectResponse)
+        if request.url.path.startswith("/api/triples/"):
+            return httpx.Response(200, json=triples)
+        return httpx.Response(200, content=b"a,b\n1,2\n")
+
+    async def run():
+        async with make_client(handler) as woql_client:
+            await woql_client.connect(
+                user="admin", account="admin", key="root", db="myDBName"
+            )
+            await woql_client.get_triples("instance", "main", dest=tmp_path / "g.ttl")
+            await woql_client.get_csv("data.csv", str(tmp_path), stream=True)
+
+    asyncio.run(run())
+
+    assert (tmp_path / "g.ttl").read_text(encoding="utf-8") == triples
+    assert (tmp_path / "data.csv").read_text() == "a,b\n1,2\n"
+
+
+def test_bulk_insert_triples():
+    calls = []
+    turtle = "".join(f"doc:a{n} scm:p {n} .\n" for n in range(5))
+
+    async def run():
+        async with make_client(mocked_handler(calls)) as woql_client:
+            await woql_client.connect(
+                user="admin", account="admin", key="root", db="myDBName"
+            )
+            return await woql_client.bulk_insert_triples(
+                "instance", "main", turtle, "load", chunk_triples=2, workers=2
+            )
+
+    stats = asyncio.run(run())
+
+    assert stats == {"chunks": 3, "triples": 5, "skipped": 0, "squash": None}
+    messages = sorted(
+        json.loads(call.content)["commit_info"]["message"] for call in calls[1:]
+    )
+    assert messages == ["load (chunk 1)", "load (chunk 2)", "load (chunk 3)"]
+
+
+def test_bulk_insert_csv(tmp_path):
+    calls = []
+    failures = {"b.csv": 1}
+    paths = []
+    for name in "abc":
+        (tmp_path / f"{name}.csv").write_text(f"{name},1\n")
+        paths.append(str(tmp_path / f"{name}.csv"))
+
+    def handler(request):
+        if request.url.path == "/api/":
+            return httpx.Response(200, json=ConnectResponse)
+        calls.append(request)
+        for name in failures:
+            if f'filename="{name}"'.encode() in request.content and failures[name]:
+                failures[name] -= 1
+                return httpx.Response(503, json={"api:message": "Unavailable"})
+        return httpx.Response(200, json={"@type": "api:CsvInsertResponse"})
+
+    async def run():
+        async with make_client(handler) as woql_client:
+            await woql_client.connect(
+                user="admin", account="admin", key="root", db="myDBName"
+            )
+            woql_client.retry_policy = None
+            return await woql_client.bulk_insert_csv(paths, "load", workers=2)
+
+    result = asyncio.run(run())
+
+    assert result["loaded"] == ["a.csv", "b.csv", "c.csv"]
+    assert [shard["attempts"] for shard in result["shards"]] == [1, 2, 1]
+    assert len(calls) == 4
+    assert {call.method for call in calls} == {"POST"}
+
+
+def test_query_cache():
+    calls = []
+
+    async def run():
+        async with make_client(mocked_handler(calls)) as woql_client:
+            woql_client.query_cache = QueryCache()
+            await woql_client.connect(
+                user="admin", account="admin", key="root", db="myDBName"
+            )
+            first = await woql_client.query(WoqlStar)
+            second = await woql_client.query(WoqlStar)
+            await woql_client.query(WOQLQuery().add_triple("doc:a", "scm:p", "doc:b"))
+            third = await woql_client.query(WoqlStar)
+            return first, second, third
+
+    first, second, third = asyncio.run(run())
+
+    assert first == second == third == {"bindings": [{"A": "doc:a"}]}
+    assert len(calls) == 4
+
+
+def test_schema_cache():
+    calls = []
+    heads = ["c1", "c1", "c2"]
+
+    def handler(request):
+        if request.url.path == "/api/":
+            return httpx.Response(200, json=ConnectResponse)
+        calls.append(request.url.path.split("/")[2])
+        if b"ref:branch_name" in request.content:
+            commit_id = {"@type": "xsd:string", "@value": heads.pop(0)}
+            return httpx.Response(200, json={"bindings": [{"Commit ID": commit_id}]})
+        return httpx.Response(200, json={"@type": "owl:Class"})
+
+    async def run():
+        async with make_client(handler) as woql_client:
+            woql_client.schema_cache = SchemaCache(revalidate_after=0)
+            await woql_client.connect(
+                user="admin", account="admin", key="root", db="myDBName"
+            )
+            for _ in range(3):
+                frame = await woql_client.get_class_frame("scm:Person")
+            return frame
+
+    assert asyncio.run(run()) == {"@type": "owl:Class"}
+    assert calls == ["woql", "frame", "woql", "woql", "frame"]
+
+
+def test_bulk_writer():
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        if request.url.path == "/api/":
+            return httpx.Response(200, json=ConnectResponse)
+        return httpx.Response(200, json={"inserts": 2, "deletes": 0})
+
+    async def run():
+        async with make_client(handler) as woql_client:
+            await woql_client.connect(
+                user="admin", account="admin", key="root", db="myDBName"
+            )
+            async with woql_client.bulk_writer("load", max_triples=2) as writer:
+                for n in range(4):
+                    await writer.add_triple(f"doc:a{n}", "scm:p", f"doc:b{n}")
+            return writer
+
+    writer = asyncio.run(run())
+
+    queries = [json.loads(call.content) for call in calls[1:]]
+    assert len(queries) == 2
+    assert all(query["commit_info"]["message"] == "load" for query in queries)
+    assert writer.stats["batches"] == 2
+    assert writer.stats["inserts"] == 4
+    with pytest.raises(TypeError):
+        writer.close()
+
+
+def test_copies_share_the_connections():
+    calls = []
+
+    async def run():
+        woql_client = make_client(mocked_handler(calls))
+        view = woql_client.scoped(db="myDBName")
+        await woql_client.connect(user="admin", account="admin", key="root")
+        await view.query(WoqlStar)
+        assert view._http() is woql_client._http()
+        await woql_client.aclose()
+        assert woql_client._async_pool._client is None
+        later = woql_client.copy()
+        await view.query(WoqlStar)
+        await later.connect()
+        assert later._http() is view._http()
+        await view.aclose()
+
+    asyncio.run(run())
+    assert [call.method for call in calls] == ["GET", "POST", "POST", "GET"]
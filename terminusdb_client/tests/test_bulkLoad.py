@@ -0,0 +1,187 @@
+import re
+import threading
+import time
+import unittest.mock as mock
+
+import pytest
+from terminusdb_client.woqlclient.api_endpoint_const import APIEndpointConst
+from terminusdb_client.woqlclient.bulkLoad import iter_turtle_chunks
+from terminusdb_client.woqlclient.errors import APIError, BulkLoadError
+
+TURTLE = """@prefix ex: <http://ex.org/> .
+# a comment with a . inside
+ex:a ex:b "x . y" ; ex:c 1.5 .
+PREFIX foo: <http://foo.org/>
+foo:a ex:b \"\"\"multi
+line . "quoted" \"\"\" , 'z' .
+<http://ex.org/s> ex:p ex:o.
+"""
+
+STATEMENTS = "@prefix ex: <http://ex.org/> .\n" + "".join(
+    f"ex:s{n} ex:p {n} .\n" for n in range(10)
+)
+
+
+def test_split_turtle():
+    expected = [
+        (
+            "@prefix ex: <http://ex.org/> .\n# a comment with a . inside\n"
+            'ex:a ex:b "x . y" ; ex:c 1.5 .\n',
+            2,
+        ),
+        (
+            "@prefix ex: <http://ex.org/> .\nPREFIX foo: <http://foo.org/>\n"
+            'foo:a ex:b """multi\nline . "quoted" """ , \'z\' .\n',
+            2,
+        ),
+        (
+            "@prefix ex: <http://ex.org/> .\nPREFIX foo: <http://foo.org/>\n"
+            "<http://ex.org/s> ex:p ex:o.\n",
+            1,
+        ),
+    ]
+    data = TURTLE.encode()
+
+    for size in (1, 3, len(data)):
+        chunks = (data[i : i + size] for i in range(0, len(data), size))
+        assert list(iter_turtle_chunks(chunks, chunk_triples=2)) == expected
+    with pytest.raises(ValueError):
+        list(iter_turtle_chunks(['ex:a ex:b "unterminated .\n']))
+
+
+def test_bulk_insert_triples(connected_client):
+    woql_client = connected_client()
+    sent = []
+    running = []
+    lock = threading.Lock()
+
+    def dispatch(action, url, payload=None, idempotent=None, **_):
+        with lock:
+            running.append(1)
+            concurrent = len(running)
+        time.sleep(0.01)
+        with lock:
+            running.pop()
+            sent.append((action, payload, idempotent, concurrent))
+        return {"@type": "api:TriplesInsertResponse"}
+
+    with mock.patch.object(woql_client, "dispatch", side_effect=dispatch):
+        stats = woql_client.bulk_insert_triples(
+            "instance",
+            "main",
+            STATEMENTS,
+            "load",
+            chunk_triples=3,
+            workers=2,
+            squash=True,
+        )
+
+    inserts = sorted(
+        (payload["commit_info"]["message"], payload["turtle"])
+        for action, payload, _, _ in sent
+        if action == APIEndpointConst.INSERT_TRIPLES
+    )
+    assert stats == {
+        "chunks": 4,
+        "triples": 10,
+        "skipped": 0,
+        "squash": {"@type": "api:TriplesInsertResponse"},
+    }
+    assert [message for message, _ in inserts] == [
+        f"load (chunk {n})" for n in range(1, 5)
+    ]
+    assert inserts[1][1] == (
+        "@prefix ex: <http://ex.org/> .\n"
+        "ex:s3 ex:p 3 .\nex:s4 ex:p 4 .\nex:s5 ex:p 5 .\n"
+    )
+    assert all(idempotent for _, _, idempotent, _ in sent[:-1])
+    assert max(concurrent for *_, concurrent in sent) <= 2
+    assert sent[-1][0] == APIEndpointConst.SQUASH
+
+
+def test_bulk_insert_resumes_from_checkpoint(connected_client, tmp_path):
+    woql_client = connected_client()
+    checkpoint = str(tmp_path / "load.checkpoint")
+    loaded = []
+
+    failing = ["load (chunk 3)"]
+
+    def dispatch(action, url, payload=None, **_):
+        message = payload["commit_info"]["message"]
+        if message in failing:
+            raise APIError("Service Unavailable", url, status_code=503)
+        loaded.append(message)
+
+    def load():
+        return woql_client.bulk_insert_triples(
+            "instance",
+            "main",
+            STATEMENTS,
+            "load",
+            chunk_triples=3,
+            workers=1,
+            checkpoint=checkpoint,
+        )
+
+    with mock.patch.object(woql_client, "dispatch", side_effect=dispatch):
+        with pytest.raises(BulkLoadError) as error:
+            load()
+        assert error.value.acknowledged == 2
+        assert loaded == ["load (chunk 1)", "load (chunk 2)"]
+
+        loaded.clear()
+        failing.clear()
+        stats = load()
+    assert sorted(loaded) == ["load (chunk 3)", "load (chunk 4)"]
+    assert stats["skipped"] == 2 and stats["chunks"] == 2
+    assert not (tmp_path / "load.checkpoint").exists()
+
+
+def test_bulk_insert_csv(connected_client, tmp_path):
+    woql_client = connected_client()
+    paths = []
+    for name in "abcde":
+        path = tmp_path / f"{name}.csv"
+        path.write_text(f"{name},1\n")
+        paths.append(str(path))
+    shards = paths + [("f.csv", iter([b"f,1\n"]))]
+    failures = {"c.csv": 1, "f.csv": 1, "e.csv": 5}
+    requests = []
+
+    def dispatch(action, url, payload=None, **_):
+        body = b"".join(payload)
+        names = [
+            name.decode()
+            for name in re.findall(rb'; name="([^"]+)"', body)
+            if name != b"payload"
+        ]
+        requests.append(names)
+        assert all(f"{name[0]},1".encode() in body for name in names)
+        for name in names:
+            if failures.get(name):
+                failures[name] -= 1
+                raise APIError("Internal Server Error", url, status_code=500)
+
+    with mock.patch.object(woql_client, "dispatch", side_effect=dispatch):
+        result = woql_client.bulk_insert_csv(
+            shards, "load", batch_size=2, workers=2, retries=2
+        )
+
+    assert sorted(map(tuple, requests)) == [
+        ("a.csv", "b.csv"),
+        ("c.csv",),
+        ("c.csv", "d.csv"),
+        ("d.csv",),
+        ("e.csv",),
+        ("e.csv",),
+        ("e.csv", "f.csv"),
+    ]
+    assert result["loaded"] == ["a.csv", "b.csv", "c.csv", "d.csv"]
+    assert result["failed"] == ["e.csv", "f.csv"]
+    report = {shard["name"]: shard for shard in result["shards"]}
+    assert report["a.csv"]["attempts"] == 1
+    assert report["c.csv"]["attempts"] == 2
+    assert report["e.csv"]["attempts"] == 3
+    assert report["f.csv"]["attempts"] == 1
+    assert isinstance(report["e.csv"]["error"], APIError)
+    assert all(shard["seconds"] >= 0 for shard in result["shards"])
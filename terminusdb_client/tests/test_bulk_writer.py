@@ -0,0 +1,126 @@
+import json
+import threading
+import time
+import unittest.mock as mock
+
+import pytest
+from terminusdb_client.woqlclient.errors import APIError
+from terminusdb_client.woqlclient.woqlClient import WOQLClient
+from terminusdb_client.woqlquery.bulk_writer import BulkWriter
+
+from .mockResponse import mocked_requests
+
+
+class FakeClient:
+    """Records the queries and answers like an update query response."""
+
+    def __init__(self, delay=0, fail_on=None):
+        self.queries = []
+        self.delay = delay
+        self.fail_on = fail_on
+        self.running = 0
+        self.max_running = 0
+        self.lock = threading.Lock()
+
+    def query(self, woql_query, commit_msg=None):
+        with self.lock:
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+            self.queries.append((woql_query.to_dict(), commit_msg))
+            number = len(self.queries)
+        time.sleep(self.delay)
+        with self.lock:
+            self.running -= 1
+        if number == self.fail_on:
+            raise APIError("Bad Request", status_code=400)
+        return {"inserts": triple_count(woql_query.to_dict()), "deletes": 0}
+
+
+def triple_count(query):
+    return json.dumps(query).count('"woql:AddTriple"') + json.dumps(query).count(
+        '"woql:AddQuad"'
+    )
+
+
+def batch_sizes(client):
+    return [triple_count(query) for query, _ in client.queries]
+
+
+def test_flush_on_triple_count():
+    client = FakeClient()
+    writer = BulkWriter(client, "load", max_triples=3, pipeline=0)
+
+    for n in range(7):
+        writer.add_triple(f"doc:a{n}", "scm:p", f"doc:b{n}")
+    writer.insert("doc:x", "scm:X", label="X")
+    stats = writer.close()
+
+    assert batch_sizes(client) == [3, 3, 3]
+    first, commit_msg = client.queries[0]
+    assert commit_msg == "load"
+    assert first["@type"] == "woql:And"
+    assert first["woql:query_list"][2]["woql:query"]["@type"] == "woql:AddTriple"
+    assert stats["batches"] == 3
+    assert stats["triples"] == 9
+    assert stats["inserts"] == 9
+
+
+def test_flush_on_size():
+    client = FakeClient()
+
+    with BulkWriter(client, max_bytes=2000, pipeline=0) as writer:
+        for n in range(20):
+            writer.add_quad(f"doc:a{n}", "scm:p", f"doc:b{n}", "instance/main")
+
+    assert sum(batch_sizes(client)) == 20
+    assert len(client.queries) > 1
+    assert all(
+        len(json.dumps(query, separators=(",", ":"))) <= 2000
+        for query, _ in client.queries
+    )
+    assert writer.stats["bytes"] <= 2000 * len(client.queries)
+
+
+def test_background_pipeline():
+    client = FakeClient(delay=0.05)
+    writer = BulkWriter(client, max_triples=2, pipeline=2)
+
+    started = time.monotonic()
+    for n in range(6):
+        writer.add_triple(f"doc:a{n}", "scm:p", n)
+    queued = time.monotonic() - started
+    stats = writer.close()
+
+    assert queued < 0.1
+    assert client.max_running == 2
+    assert stats["batches"] == 3
+    assert stats["inserts"] == 6
+
+
+def test_failed_batch():
+    client = FakeClient(fail_on=2)
+    writer = BulkWriter(client, max_triples=1, pipeline=1)
+
+    with pytest.raises(APIError):
+        for n in range(5):
+            writer.add_triple(f"doc:a{n}", "scm:p", n)
+        writer.close()
+    with pytest.raises(APIError):
+        writer.close()
+    assert len(client.queries) <= 3
+
+
+@mock.patch("requests.Session.post", side_effect=mocked_requests)
+@mock.patch("requests.Session.get", side_effect=mocked_requests)
+def test_client_bulk_writer(mocked_get, mocked_post):
+    woql_client = WOQLClient("http://localhost:6363")
+    woql_client.connect(user="admin", account="admin", key="root", db="myDBName")
+
+    with woql_client.bulk_writer("Import", max_triples=2) as writer:
+        for n in range(3):
+            writer.add_triple(f"doc:a{n}", "scm:p", n)
+
+    assert mocked_post.call_count == 2
+    payload = json.loads(mocked_post.call_args[1]["data"])
+    assert payload["commit_info"]["message"] == "Import"
+    assert payload["query"]["@type"] == "woql:AddTriple"
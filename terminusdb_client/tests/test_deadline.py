@@ -0,0 +1,141 @@
+import time
+import unittest.mock as mock
+
+import pytest
+import requests
+from terminusdb_client.woqlclient.api_endpoint_const import APIEndpointConst
+from terminusdb_client.woqlclient.deadline import Deadline
+from terminusdb_client.woqlclient.errors import APIError, DeadlineExceededError
+from terminusdb_client.woqlclient.retryPolicy import RetryPolicy
+from terminusdb_client.woqlclient.woqlClient import WOQLClient
+from terminusdb_client.woqlquery.woql_query import WOQLQuery
+
+from .mockResponse import mocked_requests
+
+
+def test_deadline():
+    deadline = Deadline(60)
+
+    assert 59 < deadline.remaining() <= 60
+    assert not deadline.expired()
+    assert Deadline.coerce(deadline) is deadline
+    assert Deadline.coerce(None) is None
+    assert Deadline.coerce(5).seconds == 5
+    assert deadline.cap(None) == pytest.approx(60, abs=1)
+    assert deadline.cap(2) == 2
+    assert deadline.cap(120) == pytest.approx(60, abs=1)
+    connect, read = deadline.cap((3, None))
+    assert connect == 3 and read == pytest.approx(60, abs=1)
+
+
+def test_cap_once_expired():
+    deadline = Deadline(5)
+    with mock.patch("time.monotonic", return_value=deadline.expires_at):
+        with pytest.raises(DeadlineExceededError):
+            deadline.cap(None)
+        with pytest.raises(DeadlineExceededError):
+            deadline.cap((3, 10))
+    with mock.patch("time.monotonic", return_value=deadline.expires_at - 0.001):
+        assert deadline.cap(2) == pytest.approx(0.001)
+
+
+def test_expired_deadline():
+    deadline = Deadline(0)
+
+    assert deadline.expired()
+    assert deadline.remaining() == 0
+    with pytest.raises(DeadlineExceededError):
+        deadline.check()
+
+
+@mock.patch("requests.Session.post", side_effect=mocked_requests)
+@mock.patch("requests.Session.get", side_effect=mocked_requests)
+def test_client_and_call_timeouts(mocked_get, mocked_post):
+    woql_client = WOQLClient("http://localhost:6363", timeout=(3.05, 30))
+    woql_client.connect(user="admin", account="admin", key="root", db="myDBName")
+
+    woql_client.query(WOQLQuery().star())
+    woql_client.query(WOQLQuery().star(), timeout=600)
+
+    assert mocked_get.call_args[1]["timeout"] == (3.05, 30)
+    assert [call[1]["timeout"] for call in mocked_post.call_args_list] == [
+        (3.05, 30),
+        600,
+    ]
+
+
+@mock.patch("requests.Session.post", side_effect=mocked_requests)
+def test_deadline_caps_the_timeout(mocked_post):
+    woql_client = WOQLClient("http://localhost:6363", timeout=(3.05, 300))
+
+    woql_client.query(WOQLQuery().star(), deadline=10)
+
+    connect, read = mocked_post.call_args[1]["timeout"]
+    assert connect == 3.05
+    assert 9 < read <= 10
+
+
+@mock.patch("requests.Session.post", side_effect=mocked_requests)
+def test_no_request_after_the_deadline(mocked_post):
+    woql_client = WOQLClient("http://localhost:6363")
+
+    with pytest.raises(DeadlineExceededError):
+        woql_client.query(WOQLQuery().star(), deadline=Deadline(0))
+    mocked_post.assert_not_called()
+
+
+def test_timeout_at_the_deadline():
+    woql_client = WOQLClient("http://localhost:6363")
+
+    def post(*args, **kwargs):
+        time.sleep(kwargs["timeout"])
+        raise requests.exceptions.ReadTimeout("read timed out")
+
+    with mock.patch("requests.Session.post", side_effect=post):
+        with pytest.raises(DeadlineExceededError):
+            woql_client.query(WOQLQuery().star(), deadline=0.05)
+        with pytest.raises(requests.exceptions.ReadTimeout):
+            woql_client.query(WOQLQuery().star(), timeout=0.01, deadline=60)
+
+
+def test_no_retry_past_the_deadline():
+    woql_client = WOQLClient(
+        "http://localhost:6363",
+        retry_policy=RetryPolicy(backoff_factor=60, max_backoff=60),
+    )
+    unavailable = APIError("Service Unavailable", status_code=503)
+
+    with mock.patch(
+        "terminusdb_client.woqlclient.dispatchRequest.DispatchRequest"
+        ".send_request_by_action",
+        side_effect=unavailable,
+    ) as send, mock.patch("random.uniform", return_value=30):
+        with pytest.raises(APIError):
+            woql_client.dispatch(
+                APIEndpointConst.CONNECT, "http://localhost:6363/api/", deadline=10
+            )
+    assert send.call_count == 1
+    assert woql_client.retry_policy.stats()["retries"] == 0
+
+
+def test_deadline_covers_all_pages():
+    woql_client = WOQLClient("http://localhost:6363")
+    deadlines = []
+
+    def dispatch(action, url, payload=None, deadline=None, **_):
+        deadlines.append(deadline)
+        deadline.check()
+        start = payload["query"]["woql:query"]["woql:start"]["woql:datatype"]
+        if start["@value"] >= 4:
+            time.sleep(0.1)
+        return {"bindings": [{"N": 0}] * 2}
+
+    with mock.patch.object(woql_client, "dispatch", side_effect=dispatch):
+        with pytest.raises(DeadlineExceededError):
+            list(
+                woql_client.iter_query(
+                    WOQLQuery().star(), page_size=2, prefetch=0, deadline=0.25
+                )
+            )
+    assert len(deadlines) > 3
+    assert all(deadline is deadlines[0] for deadline in deadlines)
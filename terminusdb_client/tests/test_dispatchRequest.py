@@ -1,9 +1,12 @@
 import sys
 import unittest.mock as mock
+import warnings
 
 import requests
+import terminusdb_client.json_backend as json_backend
 from terminusdb_client.woqlclient.api_endpoint_const import APIEndpointConst
 from terminusdb_client.woqlclient.dispatchRequest import DispatchRequest
+from urllib3.exceptions import InsecureRequestWarning
 
 from .connectCapabilitiesResponse import ConnectResponse
 from .mockResponse import mocked_requests
@@ -51,7 +54,9 @@ def test_create_database(mocked_requests):
             "content-type": "application/json",
         },
         verify=False,
-        json={"label": "my first db", "comment": "my first db"},
+        data=json_backend.dumps_bytes(
+            {"label": "my first db", "comment": "my first db"}
+        ),
     )
 
 
@@ -68,3 +73,49 @@ def test_delete_database(mocked_requests):
         verify=False,
     )
     # print("call_args_list", requests.delete.call_args_list)
+
+
+def unverified_warning(host):
+    return InsecureRequestWarning(
+        f"Unverified HTTPS request is being made to host '{host}'. "
+        "Adding certificate verification is strongly advised."
+    )
+
+
+@mock.patch("requests.get", side_effect=mocked_requests)
+def test_insecure_requests_keep_warning_filters(mocked_requests):
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter("always")
+        warnings.filterwarnings("error", category=DeprecationWarning)
+        user_filters = list(warnings.filters)
+
+        for _ in range(3):
+            DispatchRequest.send_request_by_action(
+                "https://127.0.0.1:6363/", APIEndpointConst.CONNECT, insecure=True
+            )
+        DispatchRequest.send_request_by_action(
+            "https://db.example.com/", APIEndpointConst.CONNECT, insecure=True
+        )
+
+        assert warnings.filters[-len(user_filters) :] == user_filters
+        assert len(warnings.filters) == len(user_filters) + 2
+        warnings.warn(unverified_warning("127.0.0.1"))
+        warnings.warn(unverified_warning("db.example.com"))
+        warnings.warn(unverified_warning("other.example.com"))
+    assert [str(warning.message) for warning in caught] == [
+        str(unverified_warning("other.example.com"))
+    ]
+    assert requests.get.call_args[1]["verify"] is False
+
+
+@mock.patch("requests.get", side_effect=mocked_requests)
+def test_insecure_warning_filter_survives_resets(mocked_requests):
+    for _ in range(2):
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.resetwarnings()
+            warnings.simplefilter("always")
+            DispatchRequest.send_request_by_action(
+                "https://127.0.0.1:6363/", APIEndpointConst.CONNECT, insecure=True
+            )
+            warnings.warn(unverified_warning("127.0.0.1"))
+        assert caught == []
@@ -0,0 +1,126 @@
+import http.server
+import json
+import socket
+import unittest.mock as mock
+
+import pytest
+import requests
+from terminusdb_client.woqlclient import dispatchRequest, http2Session
+from terminusdb_client.woqlclient.dispatchRequest import ConnectionPool
+from terminusdb_client.woqlclient.http2Session import HTTP2Session
+from terminusdb_client.woqlclient.woqlClient import WOQLClient
+from terminusdb_client.woqlquery.woql_query import WOQLQuery
+
+pytestmark = pytest.mark.skipif(
+    not http2Session.http2_available(), reason="httpx[http2] is not installed"
+)
+
+
+class StubHandler(http.server.BaseHTTPRequestHandler):
+    """HTTP/1.1 only server answering every query with its bindings."""
+
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        reply = json.dumps({"bindings": [{"Query": body["query"]["@type"]}]})
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(reply)))
+        self.end_headers()
+        self.wfile.write(reply.encode())
+
+    def log_message(self, *args):
+        pass
+
+
+def test_falls_back_to_http1_servers(stub_server):
+    server_url = stub_server(StubHandler)
+    woql_client = WOQLClient(server_url, http2=True)
+
+    result = woql_client.query(WOQLQuery().star())
+    response = woql_client._connection_pool.session().post(
+        server_url + "/api/woql", data=b'{"query": {"@type": "woql:True"}}'
+    )
+
+    assert result == {"bindings": [{"Query": "woql:Triple"}]}
+    assert response.http_version == "HTTP/1.1"
+    assert b"".join(response.iter_content(4)) == response.content
+    woql_client.close()
+    assert woql_client._connection_pool.session()._clients == {}
+
+
+def test_talks_http2_to_http2_servers():
+    httpx = http2Session.httpx
+    requests_sent = []
+
+    def handler(request):
+        requests_sent.append(request)
+        query = json.loads(request.content)["query"]
+        return httpx.Response(
+            200,
+            json={"bindings": [{"Query": query["@type"], "N": n} for n in range(3)]},
+            extensions={"http_version": b"HTTP/2"},
+        )
+
+    transports = []
+
+    def make_transport(**kwargs):
+        transports.append(kwargs)
+        return httpx.MockTransport(handler)
+
+    with mock.patch.object(httpx, "HTTPTransport", side_effect=make_transport):
+        woql_client = WOQLClient("https://127.0.0.1:6363", http2=True)
+        result = woql_client.query(WOQLQuery().star())
+        streamed = list(woql_client.query(WOQLQuery().star(), stream=True))
+        response = woql_client._connection_pool.session().post(
+            "https://127.0.0.1:6363/api/woql",
+            headers={"Content-Type": "application/json"},
+            data=b'{"query": {"@type": "woql:True"}}',
+            stream=True,
+        )
+
+    assert transports[0]["http2"] is True
+    assert result["bindings"][2] == {"Query": "woql:Triple", "N": 2}
+    assert streamed == result["bindings"]
+    assert response.http_version == "HTTP/2"
+    assert response.status_code == 200
+    assert b"".join(response.iter_content(5)).startswith(b'{"bindings":')
+    assert response.json()["bindings"][0] == {"Query": "woql:True", "N": 0}
+    assert [request.method for request in requests_sent] == ["POST"] * 3
+    assert requests_sent[2].url == "https://127.0.0.1:6363/api/woql"
+    assert requests_sent[2].headers["content-type"] == "application/json"
+    woql_client.close()
+
+
+def test_pool_uses_http2_session():
+    pool = ConnectionPool(http2=True, pool_maxsize=4, idle_timeout=30)
+    session = pool.session()
+
+    assert isinstance(session, HTTP2Session)
+    client = session._client(True)
+    assert session._client(True) is client
+    assert session._client(False) is not client
+    pool.close()
+    assert session._clients == {}
+    assert isinstance(ConnectionPool().session(), requests.Session)
+
+
+def test_fallback_without_h2():
+    with mock.patch.object(dispatchRequest, "http2_available", return_value=False):
+        with pytest.warns(RuntimeWarning, match="HTTP/1.1"):
+            pool = ConnectionPool(http2=True)
+
+    assert not pool.http2
+    assert isinstance(pool.session(), requests.Session)
+
+
+def test_transport_errors_raised_as_requests_errors():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    session = HTTP2Session()
+
+    with pytest.raises(requests.exceptions.ConnectionError):
+        session.get(f"http://127.0.0.1:{port}/api/", timeout=1)
+    session.close()
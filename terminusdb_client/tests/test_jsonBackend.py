@@ -0,0 +1,112 @@
+import json
+import unittest.mock as mock
+
+import pytest
+import terminusdb_client.json_backend as json_backend
+from terminusdb_client.woqlclient.woqlClient import WOQLClient
+from terminusdb_client.woqlquery.woql_query import WOQLQuery
+
+from .mockResponse import mocked_requests
+
+DOCUMENT = {
+    "@type": "woql:Triple",
+    "woql:subject": {"@type": "woql:Node", "woql:node": "doc:été"},
+    "woql:object": {"@type": "xsd:decimal", "@value": 12.5},
+    "woql:count": 123456789,
+}
+
+
+@pytest.fixture
+def restore_backend():
+    previous = json_backend.get_backend()
+    yield
+    json_backend.set_backend(previous)
+
+
+@pytest.mark.parametrize("name", json_backend.available_backends())
+def test_backend_round_trip(name, restore_backend):
+    json_backend.set_backend(name)
+    backend = json_backend.get_backend()
+
+    assert backend.name == name
+    assert json.loads(json_backend.dumps(DOCUMENT)) == DOCUMENT
+    assert json.loads(json_backend.dumps_bytes(DOCUMENT)) == DOCUMENT
+    assert json_backend.loads(json.dumps(DOCUMENT)) == DOCUMENT
+    assert json_backend.loads(json.dumps(DOCUMENT).encode()) == DOCUMENT
+    with pytest.raises(ValueError):
+        json_backend.loads(b"cont")
+
+
+@pytest.mark.parametrize("name", json_backend.available_backends())
+def test_to_json_sorts_keys(name, restore_backend):
+    json_backend.set_backend(name)
+    query = WOQLQuery().triple("v:S", "v:P", "v:O")
+
+    assert list(json.loads(query.to_json())) == sorted(query.to_dict())
+    assert WOQLQuery().from_json(query.to_json()).to_dict() == query.to_dict()
+
+
+@pytest.mark.parametrize("name", json_backend.available_backends())
+def test_to_json_is_the_same_with_every_backend(name, restore_backend):
+    json_backend.set_backend(name)
+    query = WOQLQuery().triple("doc:été", "scm:price", 12.5)
+
+    assert query.to_json() == json.dumps(
+        query.to_dict(), sort_keys=True, separators=(",", ":"), ensure_ascii=False
+    )
+    assert json_backend.dumps(DOCUMENT) == (
+        '{"@type":"woql:Triple",'
+        '"woql:subject":{"@type":"woql:Node","woql:node":"doc:été"},'
+        '"woql:object":{"@type":"xsd:decimal","@value":12.5},'
+        '"woql:count":123456789}'
+    )
+
+
+@pytest.mark.parametrize("name", json_backend.available_backends())
+def test_loads_big_integers_exactly(name, restore_backend):
+    json_backend.set_backend(name)
+    values = [2**64 + 1, -(2**63) - 1, 2**64 - 1]
+    response = {
+        "bindings": [
+            {"N": {"@type": "xsd:integer", "@value": value}} for value in values
+        ]
+    }
+
+    for data in (json.dumps(response), json.dumps(response).encode()):
+        bindings = json_backend.loads(data)["bindings"]
+        assert [binding["N"]["@value"] for binding in bindings] == values
+        assert all(type(binding["N"]["@value"]) is int for binding in bindings)
+
+
+def test_default_is_fastest_installed():
+    assert json_backend.get_backend().name == json_backend.available_backends()[0]
+    assert json_backend.available_backends()[-1] == "json"
+
+
+def test_unknown_backend(restore_backend):
+    with pytest.raises(ValueError):
+        json_backend.set_backend("simdjson")
+
+
+def test_orjson_falls_back_on_unsupported_objects():
+    if "orjson" not in json_backend.available_backends():
+        pytest.skip("orjson is not installed")
+    backend = json_backend.OrjsonBackend()
+
+    assert json.loads(backend.dumps({1: 2**70})) == {"1": 2**70}
+
+
+@mock.patch("requests.Session.post", side_effect=mocked_requests)
+@mock.patch("requests.Session.get", side_effect=mocked_requests)
+def test_client_uses_backend(mocked_get, mocked_post, restore_backend):
+    backend = mock.Mock(wraps=json_backend.JSONBackend())
+    json_backend.set_backend(backend)
+    woql_client = WOQLClient("http://localhost:6363")
+
+    woql_client.connect(user="admin", account="admin", key="root", db="myDBName")
+    woql_client.query(WOQLQuery().star())
+
+    backend.loads.assert_called()
+    body = backend.dumps_bytes.call_args[0][0]
+    assert body["query"]["@type"] == "woql:Triple"
+    assert json.loads(mocked_post.call_args[1]["data"]) == body
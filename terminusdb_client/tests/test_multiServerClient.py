@@ -0,0 +1,166 @@
+import threading
+import unittest.mock as mock
+
+import pytest
+import requests
+from terminusdb_client.woqlclient.errors import APIError
+from terminusdb_client.woqlclient.loadBalancer import (
+    EWMAPolicy,
+    LeastOutstandingPolicy,
+    LoadBalancer,
+    ServerNode,
+)
+from terminusdb_client.woqlclient.multiServerClient import MultiServerWOQLClient
+from terminusdb_client.woqlquery.woql_query import WOQLQuery
+
+from .mockResponse import mocked_requests
+
+SERVERS = ["http://db1:6363", "http://db2:6363", "http://db3:6363"]
+
+
+@pytest.fixture
+def connect_servers(connected_client):
+    def connect(**kwargs):
+        return connected_client(
+            SERVERS, MultiServerWOQLClient, retry_policy=None, **kwargs
+        )
+
+    return connect
+
+
+def servers_of(mocked):
+    return [call[0][0].split("/api/")[0] for call in mocked.call_args_list]
+
+
+@mock.patch("requests.Session.post", side_effect=mocked_requests)
+def test_reads_round_robin_and_writes_to_primary(mocked_post, connect_servers):
+    woql_client = connect_servers(primary="http://db2:6363/")
+
+    for _ in range(6):
+        woql_client.query(WOQLQuery().star())
+    assert sorted(servers_of(mocked_post)) == sorted(
+        ["http://db1:6363", "http://db2:6363", "http://db3:6363"] * 2
+    )
+
+    mocked_post.reset_mock()
+    woql_client.query(WOQLQuery().add_triple("doc:a", "scm:b", "doc:c"))
+    woql_client.branch("dev")
+    assert servers_of(mocked_post) == ["http://db2:6363"] * 2
+
+
+@mock.patch("requests.Session.get", side_effect=mocked_requests)
+def test_connect_and_reads_off_primary(mocked_get, connect_servers):
+    woql_client = connect_servers(read_from_primary=False)
+    mocked_get.reset_mock()
+
+    woql_client.connect()
+    woql_client.get_triples("instance", "mygraph")
+    woql_client.get_triples("instance", "mygraph")
+
+    assert servers_of(mocked_get) == [
+        "http://db1:6363",
+        "http://db2:6363",
+        "http://db3:6363",
+    ]
+    assert "/api/triples/admin/myDBName/" in mocked_get.call_args[0][0]
+
+
+def test_eject_and_readmit(connect_servers):
+    woql_client = connect_servers(max_failures=2)
+    down = "http://db3:6363"
+
+    def post(url, *args, **kwargs):
+        if url.startswith(down):
+            raise requests.exceptions.ConnectionError("connection refused")
+        return mocked_requests(url, *args, **kwargs)
+
+    with mock.patch("requests.Session.post", side_effect=post) as mocked_post:
+        for _ in range(9):
+            try:
+                woql_client.query(WOQLQuery().star())
+            except requests.exceptions.ConnectionError:
+                pass
+        assert servers_of(mocked_post).count(down) == 2
+        mocked_post.reset_mock()
+        for _ in range(4):
+            woql_client.query(WOQLQuery().star())
+        assert down not in servers_of(mocked_post)
+
+    def get(url, *args, **kwargs):
+        if url.startswith("http://db1:6363"):
+            raise requests.exceptions.ConnectionError("connection refused")
+        return mocked_requests(url, *args, **kwargs)
+
+    with mock.patch("requests.Session.get", side_effect=get):
+        health = woql_client.check_health()
+    assert health == {
+        "http://db1:6363/": False,
+        "http://db2:6363/": True,
+        "http://db3:6363/": True,
+    }
+
+    with mock.patch("requests.Session.post", side_effect=mocked_requests) as post:
+        for _ in range(4):
+            woql_client.query(WOQLQuery().star())
+        assert sorted(set(servers_of(post))) == ["http://db2:6363", down]
+
+
+def test_client_errors_do_not_eject():
+    balancer = LoadBalancer(SERVERS, max_failures=1)
+    woql_client = MultiServerWOQLClient(SERVERS, retry_policy=None)
+    woql_client.balancer = balancer
+
+    with mock.patch(
+        "terminusdb_client.woqlclient.woqlClient.WOQLClient._send_request",
+        side_effect=APIError("Bad Request", status_code=400),
+    ):
+        with pytest.raises(APIError):
+            woql_client.query(WOQLQuery().star())
+    assert all(node.healthy for node in balancer.nodes)
+
+
+def test_least_outstanding_policy():
+    nodes = [ServerNode(url) for url in SERVERS]
+    nodes[0].outstanding, nodes[1].outstanding, nodes[2].outstanding = 3, 1, 2
+
+    assert LeastOutstandingPolicy().choose(nodes) is nodes[1]
+
+
+def test_ewma_policy():
+    balancer = LoadBalancer(SERVERS, policy=EWMAPolicy(), decay=0.5)
+    fast, slow, busy = balancer.nodes
+
+    assert balancer.choose(True).latency is None
+    with mock.patch("time.monotonic", side_effect=[0, 1, 0, 0.1, 0, 0.05]):
+        for node in (slow, fast, busy):
+            balancer.finished(node, balancer.started(node))
+    busy.outstanding = 5
+
+    assert (fast.latency, slow.latency, busy.latency) == (0.1, 1, 0.05)
+    assert balancer.choose(True) is fast
+    assert balancer.choose(False) is balancer.primary
+
+
+def test_background_health_checks(connect_servers):
+    woql_client = connect_servers()
+    checked = threading.Event()
+
+    with mock.patch.object(woql_client, "check_health", side_effect=checked.set):
+        woql_client.start_health_checks(interval=0.01)
+        assert checked.wait(5)
+        woql_client.close()
+    assert woql_client._health_checks is None
+
+
+def test_closing_a_copy_keeps_the_health_checks(connect_servers):
+    woql_client = connect_servers()
+
+    with mock.patch.object(woql_client, "check_health"):
+        woql_client.start_health_checks(interval=0.01)
+        thread, stopped = woql_client._health_checks
+        view = woql_client.scoped(db="other")
+        assert view.balancer is woql_client.balancer
+        view.close()
+        assert not stopped.is_set() and thread.is_alive()
+        woql_client.close()
+    assert stopped.is_set() and not thread.is_alive()
@@ -0,0 +1,163 @@
+import unittest.mock as mock
+
+import terminusdb_client.json_backend as json_backend
+from terminusdb_client.woqlclient.api_endpoint_const import APIEndpointConst
+from terminusdb_client.woqlclient.queryCache import QueryCache
+from terminusdb_client.woqlquery.woql_query import WOQLQuery
+
+MAIN = "http://localhost:6363/api/woql/admin/myDBName/local/branch/main"
+DEV = "http://localhost:6363/api/woql/admin/myDBName/local/branch/dev"
+OTHER = "http://localhost:6363/api/woql/admin/myDBName2/local/branch/main"
+
+
+def test_lru_eviction():
+    cache = QueryCache(max_entries=2)
+    for n in range(2):
+        cache.put(QueryCache.key(MAIN, {"n": n}), {"bindings": [n]})
+    assert cache.get(QueryCache.key(MAIN, {"n": 0})) == {"bindings": [0]}
+
+    cache.put(QueryCache.key(MAIN, {"n": 2}), {"bindings": [2]})
+
+    assert cache.get(QueryCache.key(MAIN, {"n": 1})) is None
+    assert cache.get(QueryCache.key(MAIN, {"n": 0})) == {"bindings": [0]}
+    assert cache.stats() == {
+        "hits": 2,
+        "misses": 1,
+        "evictions": 1,
+        "invalidations": 0,
+        "entries": 2,
+        "bytes": 2 * len(json_backend.dumps_bytes({"bindings": [0]})),
+    }
+
+
+def test_size_limit():
+    cache = QueryCache(max_bytes=40)
+    cache.put(QueryCache.key(MAIN, 1), {"bindings": ["x" * 50]})
+    assert cache.stats()["entries"] == 0
+
+    cache.put(QueryCache.key(MAIN, 1), {"bindings": ["x" * 10]})
+    cache.put(QueryCache.key(MAIN, 2), {"bindings": ["y" * 10]})
+
+    assert cache.get(QueryCache.key(MAIN, 1)) is None
+    assert cache.stats()["bytes"] == len(
+        json_backend.dumps_bytes({"bindings": ["y" * 10]})
+    )
+
+
+def test_ttl():
+    cache = QueryCache(ttl=10)
+    with mock.patch("time.monotonic", side_effect=[100, 105, 111]):
+        cache.put(QueryCache.key(MAIN, 1), {"bindings": []})
+        assert cache.get(QueryCache.key(MAIN, 1)) == {"bindings": []}
+        assert cache.get(QueryCache.key(MAIN, 1)) is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_canonical_key_and_copies():
+    cache = QueryCache()
+    cache.put(QueryCache.key(MAIN, {"a": 1, "b": 2}), {"bindings": [{"A": 1}]})
+
+    result = cache.get(QueryCache.key(MAIN, {"b": 2, "a": 1}))
+    result["bindings"].append({"A": 2})
+
+    assert cache.get(QueryCache.key(MAIN, {"a": 1, "b": 2})) == {"bindings": [{"A": 1}]}
+    assert cache.get(QueryCache.key(DEV, {"a": 1, "b": 2})) is None
+
+
+def test_invalidate_prefix():
+    cache = QueryCache()
+    for url in (MAIN, DEV, OTHER):
+        cache.put(QueryCache.key(url, 1), {"bindings": []})
+
+    repo = "http://localhost:6363/api/woql/admin/myDBName/local"
+    assert cache.invalidate(repo) == 2
+    assert cache.invalidate("http://localhost:6363/api/woql/admin/myDBName") == 0
+    assert cache.get(QueryCache.key(OTHER, 1)) == {"bindings": []}
+    assert cache.stats()["invalidations"] == 2
+
+
+def query_response(action, url, *args, **kwargs):
+    return {"bindings": [{"URL": url}], "inserts": 0, "deletes": 0}
+
+
+@mock.patch(
+    "terminusdb_client.woqlclient.woqlClient.WOQLClient._send_request",
+    side_effect=query_response,
+)
+def test_client_query_cache(send_request, connected_client):
+    woql_client = connected_client(query_cache=QueryCache())
+    send_request.reset_mock()
+    read = WOQLQuery().triple("v:S", "v:P", "v:O")
+
+    first = woql_client.query(read)
+    assert woql_client.query(read) == first
+    woql_client.scoped(branch="dev").query(read)
+    woql_client.query(read, stream=True)
+    assert send_request.call_count == 3
+    assert woql_client.query_cache.stats()["hits"] == 1
+
+    woql_client.query(WOQLQuery().add_triple("doc:a", "scm:p", "doc:b"), "update")
+    woql_client.query(read)
+    woql_client.scoped(branch="dev").query(read)
+
+    assert send_request.call_count == 6
+    assert woql_client.query_cache.stats()["invalidations"] == 2
+
+
+@mock.patch(
+    "terminusdb_client.woqlclient.woqlClient.WOQLClient._send_request",
+    side_effect=query_response,
+)
+def test_clients_of_different_users(send_request, connected_client):
+    cache = QueryCache()
+    admin = connected_client(query_cache=cache)
+    other = connected_client(query_cache=cache)
+    other.basic_auth("secret", "bob")
+    jwt = connected_client(query_cache=cache)
+    jwt.remote_auth({"type": "jwt", "user": "carol", "key": "<token>"})
+    send_request.reset_mock()
+    read = WOQLQuery().triple("v:S", "v:P", "v:O")
+
+    for woql_client in (admin, other, jwt, admin.copy(), other.copy()):
+        woql_client.query(read)
+
+    assert send_request.call_count == 3
+    assert cache.stats()["hits"] == 2
+    assert all("secret" not in str(key) for key in cache._entries)
+
+
+@mock.patch(
+    "terminusdb_client.woqlclient.woqlClient.WOQLClient._send_request",
+    side_effect=query_response,
+)
+def test_client_writes_invalidate(send_request, connected_client):
+    woql_client = connected_client(query_cache=QueryCache())
+    send_request.reset_mock()
+    read = WOQLQuery().triple("v:S", "v:P", "v:O")
+
+    for write in (
+        lambda: woql_client.insert_triples("instance", "main", "<a> <b> <c>.", "m"),
+        lambda: woql_client.squash("squashed"),
+        lambda: woql_client.reset("admin/myDBName/local/commit/abc"),
+    ):
+        woql_client.query(read)
+        write()
+    woql_client.query(read)
+
+    assert send_request.call_count == 7
+    assert send_request.call_args_list[1][0][0] == APIEndpointConst.INSERT_TRIPLES
+    assert woql_client.query_cache.stats()["hits"] == 0
+
+
+@mock.patch(
+    "terminusdb_client.woqlclient.woqlClient.WOQLClient._send_request",
+    side_effect=query_response,
+)
+def test_no_cache_by_default(send_request, connected_client):
+    woql_client = connected_client()
+    send_request.reset_mock()
+    woql_client.query(WOQLQuery().star())
+    woql_client.query(WOQLQuery().star())
+
+    assert woql_client.query_cache is None
+    assert send_request.call_count == 2
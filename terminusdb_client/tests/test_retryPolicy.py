@@ -0,0 +1,120 @@
+import unittest.mock as mock
+
+import pytest
+import requests
+from terminusdb_client.woqlclient.errors import APIError
+from terminusdb_client.woqlclient.retryPolicy import RetryPolicy
+from terminusdb_client.woqlclient.woqlClient import WOQLClient
+from terminusdb_client.woqlquery.woql_query import WOQLQuery
+
+from .mockResponse import mocked_requests
+
+
+def flaky(*outcomes):
+    """A send function raising or returning the given outcomes in turn."""
+    outcomes = list(outcomes)
+
+    def send():
+        outcome = outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    return send
+
+
+def test_retry_transient_errors():
+    policy = RetryPolicy(backoff_factor=0)
+    send = flaky(
+        APIError("Bad Gateway", status_code=502),
+        requests.exceptions.ConnectionError("connection reset"),
+        "ok",
+    )
+
+    assert policy.call(send, idempotent=True) == "ok"
+    assert policy.stats() == {"retries": 2, "retried_requests": 1, "failed_requests": 0}
+
+
+def test_no_retry_of_non_idempotent_requests():
+    policy = RetryPolicy(backoff_factor=0)
+
+    with pytest.raises(APIError):
+        policy.call(flaky(APIError(status_code=503), "ok"), idempotent=False)
+    assert policy.retries == 0
+
+
+def test_opt_in_retry_of_non_idempotent_requests():
+    policy = RetryPolicy(backoff_factor=0, idempotent_only=False)
+
+    assert policy.call(flaky(APIError(status_code=503), "ok")) == "ok"
+    assert policy.retries == 1
+
+
+def test_no_retry_of_client_errors():
+    policy = RetryPolicy(backoff_factor=0)
+
+    with pytest.raises(APIError):
+        policy.call(flaky(APIError(status_code=400), "ok"), idempotent=True)
+    assert policy.retries == 0
+
+
+def test_give_up_after_max_retries():
+    policy = RetryPolicy(max_retries=2, backoff_factor=0)
+    send = flaky(*[APIError(status_code=503)] * 3, "ok")
+
+    with pytest.raises(APIError):
+        policy.call(send, idempotent=True)
+    assert policy.stats() == {"retries": 2, "retried_requests": 1, "failed_requests": 1}
+
+
+def test_give_up_after_max_total_time():
+    policy = RetryPolicy(backoff_factor=100, max_backoff=100, max_total_time=1)
+
+    with mock.patch("random.uniform", return_value=50), mock.patch(
+        "time.sleep"
+    ) as sleep:
+        with pytest.raises(APIError):
+            policy.call(flaky(APIError(status_code=503), "ok"), idempotent=True)
+    sleep.assert_not_called()
+
+
+def test_backoff_is_exponential_with_jitter():
+    policy = RetryPolicy(backoff_factor=0.5, max_backoff=3)
+
+    for retry, ceiling in [(1, 0.5), (2, 1), (3, 2), (4, 3), (10, 3)]:
+        delays = [policy.backoff(retry) for _ in range(50)]
+        assert all(0 <= delay <= ceiling for delay in delays)
+        assert len(set(delays)) > 1
+
+
+@mock.patch("requests.Session.get", side_effect=mocked_requests)
+def test_client_retries_read_only_query(mocked_requests):
+    woql_client = WOQLClient(
+        "http://localhost:6363", retry_policy=RetryPolicy(backoff_factor=0)
+    )
+    woql_client.connect(user="admin", account="admin", key="root", db="myDBName")
+    reset = requests.exceptions.ConnectionError("connection reset")
+
+    with mock.patch(
+        "requests.Session.post", side_effect=[reset, mocked_requests("url")]
+    ) as post:
+        woql_client.query(WOQLQuery().star())
+    assert post.call_count == 2
+
+    with mock.patch("requests.Session.post", side_effect=[reset]) as post:
+        with pytest.raises(requests.exceptions.ConnectionError):
+            woql_client.query(WOQLQuery().add_triple("doc:a", "scm:b", "doc:c"))
+    assert post.call_count == 1
+    assert woql_client.retry_policy.retries == 1
+    assert woql_client.copy().retry_policy is woql_client.retry_policy
+
+
+def test_client_without_retry_policy():
+    woql_client = WOQLClient("http://localhost:6363")
+    assert woql_client.retry_policy is None
+    reset = requests.exceptions.ConnectionError("connection reset")
+
+    with mock.patch("requests.Session.get", side_effect=[reset]) as get:
+        with pytest.raises(requests.exceptions.ConnectionError):
+            woql_client.connect(user="admin", account="admin", key="root")
+    assert get.call_count == 1
@@ -0,0 +1,143 @@
+import json
+import unittest.mock as mock
+
+import pytest
+from terminusdb_client.woqlclient.api_endpoint_const import APIEndpointConst
+from terminusdb_client.woqlclient.schemaCache import SchemaCache
+from terminusdb_client.woqlquery.woql_library import WOQLLib
+
+MAIN = "http://localhost:6363/api/woql/admin/myDBName/local/branch/main"
+
+
+@pytest.fixture
+def fake_server_client(connected_client):
+    """Connected client whose requests are answered by a :class:`FakeServer`."""
+
+    def connect(server, **kwargs):
+        woql_client = connected_client(**kwargs)
+        woql_client._send_request = server
+        return woql_client
+
+    return connect
+
+
+class FakeServer:
+    """Answers the head commit, class frame and schema queries."""
+
+    def __init__(self, head="c1"):
+        self.head = head
+        self.requests = []
+
+    def __call__(self, action, url, payload, *args, **kwargs):
+        if "ref:branch_name" in json.dumps(payload):
+            self.requests.append("head")
+            if self.head is None:
+                return {"bindings": [{"Commit ID": "", "Branch ID": "main"}]}
+            commit_id = {"@type": "xsd:string", "@value": self.head}
+            return {"bindings": [{"Commit ID": commit_id}]}
+        self.requests.append(action)
+        if action == APIEndpointConst.CLASS_FRAME:
+            return {"class": payload["class"], "at": self.head}
+        return {"bindings": [{"Class ID": "scm:Person"}], "at": self.head}
+
+
+def test_cache_entries():
+    cache = SchemaCache(max_entries=2, revalidate_after=10)
+    assert cache.head(MAIN) is None
+    cache.set_head(MAIN, "c1")
+    assert cache.head(MAIN) == "c1"
+
+    cache.put(MAIN, "a", "c1", {"a": 1})
+    cache.put(MAIN, "b", "c1", {"b": 1})
+    assert cache.get(MAIN, "a", "c1") == {"a": 1}
+    assert cache.get(MAIN, "a", "c2") is None
+    cache.put(MAIN, "c", "c1", {"c": 1})
+
+    assert cache.get(MAIN, "b", "c1") is None
+    assert cache.stats() == {"hits": 1, "misses": 2, "revalidations": 1, "entries": 2}
+
+    cache.invalidate("http://localhost:6363/api/woql/admin/myDBName/local")
+    assert cache.head(MAIN) is None
+    assert cache.get(MAIN, "a", "c1") == {"a": 1}
+
+
+def test_head_expires():
+    cache = SchemaCache(revalidate_after=5)
+    with mock.patch("time.monotonic", side_effect=[100, 104, 105]):
+        cache.set_head(MAIN, "c1")
+        assert cache.head(MAIN) == "c1"
+        assert cache.head(MAIN) is None
+
+
+def test_head_commit(fake_server_client):
+    server = FakeServer()
+    woql_client = fake_server_client(server)
+
+    assert woql_client.head_commit() == "c1"
+    server.head = None
+    assert woql_client.head_commit() is None
+    woql_client.ref("c0")
+    assert woql_client.head_commit() == "c0"
+    assert server.requests == ["head", "head"]
+
+
+def test_revalidate_on_head_change(fake_server_client):
+    server = FakeServer()
+    woql_client = fake_server_client(
+        server, schema_cache=SchemaCache(revalidate_after=0)
+    )
+
+    first = woql_client.get_class_frame("scm:Person")
+    assert woql_client.get_class_frame("scm:Person") == first
+    assert server.requests == ["head", APIEndpointConst.CLASS_FRAME, "head"]
+
+    server.head = "c2"
+    assert woql_client.get_class_frame("scm:Person")["at"] == "c2"
+    assert server.requests[3:] == ["head", APIEndpointConst.CLASS_FRAME]
+
+
+def test_lookups_share_a_check(fake_server_client):
+    server = FakeServer()
+    woql_client = fake_server_client(server, schema_cache=SchemaCache())
+
+    for _ in range(2):
+        woql_client.get_class_frame("scm:Person")
+        woql_client.schema_query(WOQLLib().classes())
+        woql_client.schema_query(WOQLLib().property())
+
+    assert server.requests == [
+        "head",
+        APIEndpointConst.CLASS_FRAME,
+        APIEndpointConst.WOQL_QUERY,
+        APIEndpointConst.WOQL_QUERY,
+    ]
+    assert woql_client.schema_cache.stats()["hits"] == 3
+
+
+def test_own_commits_revalidate(fake_server_client):
+    server = FakeServer()
+    woql_client = fake_server_client(server, schema_cache=SchemaCache())
+
+    woql_client.get_class_frame("scm:Person")
+    woql_client.insert_triples("schema", "main", "<a> <b> <c>.", "update schema")
+    server.head = "c2"
+    assert woql_client.get_class_frame("scm:Person")["at"] == "c2"
+
+    assert server.requests.count("head") == 2
+
+
+def test_schema_query_must_be_read_only(fake_server_client):
+    woql_client = fake_server_client(FakeServer(), schema_cache=SchemaCache())
+
+    with pytest.raises(ValueError):
+        woql_client.schema_query(WOQLLib().insert_prefix(["ex", "http://ex.com/"]))
+
+
+def test_no_cache_by_default(fake_server_client):
+    server = FakeServer()
+    woql_client = fake_server_client(server)
+
+    woql_client.get_class_frame("scm:Person")
+    woql_client.get_class_frame("scm:Person")
+
+    assert server.requests == [APIEndpointConst.CLASS_FRAME] * 2
@@ -0,0 +1,81 @@
+import gzip
+import http.server
+import io
+import json
+import unittest.mock as mock
+
+import pytest
+from terminusdb_client.woqlclient.streamingDownload import JSONStringDecoder
+
+TURTLE = '@prefix ex: <http://ex.org/> .\nex:a ex:name "Zoë \\"😀\\" ☃" .\n' * 50
+CSV = "Subject,Predicate,Object\n" + "doc:a,scm:b,doc:c\n" * 1000
+
+
+class DownloadStubHandler(http.server.BaseHTTPRequestHandler):
+    """Serves the triples as a json string and the csv, gzipped on request."""
+
+    def do_GET(self):
+        if self.path.startswith("/api/triples/"):
+            body = json.dumps(TURTLE).encode()
+        else:
+            body = CSV.encode()
+        self.send_response(200)
+        if "gzip" in self.headers.get("Accept-Encoding", ""):
+            body = gzip.compress(body)
+            self.send_header("Content-Encoding", "gzip")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def test_json_string_decoder():
+    body = json.dumps(TURTLE).encode()
+    decoder = JSONStringDecoder()
+
+    text = "".join(decoder.decode(body[i : i + 1]) for i in range(len(body)))
+
+    assert text + decoder.decode(b"", final=True) == TURTLE
+    with pytest.raises(ValueError):
+        JSONStringDecoder().decode(b'{"a": 1}')
+    with pytest.raises(ValueError):
+        JSONStringDecoder().decode(b'"abc', final=True)
+    with pytest.raises(ValueError):
+        JSONStringDecoder().decode(b'"abc" 1')
+
+
+def test_get_triples_to_file(stub_server, connected_client, tmp_path):
+    woql_client = connected_client(stub_server(DownloadStubHandler))
+    path = tmp_path / "graph.ttl"
+    progress = []
+
+    result = woql_client.get_triples(
+        "instance", "main", dest=path, progress=lambda *args: progress.append(args)
+    )
+    stream = io.StringIO()
+    woql_client.get_triples("instance", "main", dest=stream)
+
+    assert result == path
+    assert path.read_text(encoding="utf-8") == TURTLE
+    assert stream.getvalue() == TURTLE
+    # gzipped, so the size of the data is unknown
+    assert progress[-1] == (len(json.dumps(TURTLE)), None)
+
+
+def test_get_csv_stream(stub_server, connected_client, tmp_path):
+    woql_client = connected_client(stub_server(DownloadStubHandler))
+    progress = []
+
+    with mock.patch.dict(woql_client._connection_pool.session().headers) as headers:
+        headers["Accept-Encoding"] = "identity"
+        woql_client.get_csv(
+            "data.csv",
+            str(tmp_path),
+            stream=True,
+            progress=lambda *args: progress.append(args),
+        )
+
+    assert (tmp_path / "data.csv").read_text() == CSV
+    assert progress[-1] == (len(CSV), len(CSV))
@@ -0,0 +1,141 @@
+import email.parser
+import http.server
+import io
+import json
+
+import pytest
+from terminusdb_client.woqlclient.streamingUpload import StreamingBody, iter_chunks
+
+TURTLE = '@prefix ex: <http://ex.org/> .\nex:a ex:name "Zoë \\"the\\" ☃" .\n'
+
+
+class ChunkedStubHandler(http.server.BaseHTTPRequestHandler):
+    """Records the chunked request bodies it receives."""
+
+    protocol_version = "HTTP/1.1"
+    received = []
+
+    def read_chunked(self):
+        body = b""
+        while True:
+            size = int(self.rfile.readline().strip(), 16)
+            chunk = self.rfile.read(size + 2)[:-2]
+            if size == 0:
+                return body
+            body += chunk
+
+    def do_PUT(self):
+        body = self.read_chunked()
+        self.received.append((self.command, self.path, self.headers, body))
+        reply = b'{"@type": "api:TriplesInsertResponse"}'
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(reply)))
+        self.end_headers()
+        self.wfile.write(reply)
+
+    do_POST = do_PUT
+
+    def log_message(self, *args):
+        pass
+
+
+def parse_multipart(headers, body):
+    message = email.parser.BytesParser().parsebytes(
+        f"Content-Type: {headers['Content-Type']}\r\n\r\n".encode() + body
+    )
+    return {
+        part.get_param("name", header="content-disposition"): part.get_payload(
+            decode=True
+        )
+        for part in message.get_payload()
+    }
+
+
+def test_insert_triples_from_chunks(stub_server, connected_client):
+    # split in the middle of the multi-byte characters
+    data = TURTLE.encode("utf-8")
+    chunks = (data[i : i + 3] for i in range(0, len(data), 3))
+
+    connected_client(stub_server(ChunkedStubHandler)).insert_triples(
+        "instance", "main", chunks, "load the triples"
+    )
+
+    [(method, path, headers, body)] = ChunkedStubHandler.received
+    assert method == "PUT"
+    assert path == "/api/triples/admin/myDBName/local/branch/main/instance/main"
+    assert headers["Transfer-Encoding"] == "chunked"
+    assert headers["Content-Type"] == "application/json"
+    payload = json.loads(body)
+    assert payload["turtle"] == TURTLE
+    assert payload["commit_info"]["message"] == "load the triples"
+
+
+def test_update_triples_from_file_and_string(stub_server, connected_client, tmp_path):
+    path = tmp_path / "dump.ttl"
+    path.write_text(TURTLE, encoding="utf-8")
+    woql_client = connected_client(stub_server(ChunkedStubHandler))
+
+    woql_client.update_triples("instance", "main", path, "update")
+    with open(path, encoding="utf-8") as stream:
+        woql_client.update_triples("instance", "main", stream, "update")
+        assert not stream.closed
+
+    bodies = [received[3] for received in ChunkedStubHandler.received]
+    assert [json.loads(body)["turtle"] for body in bodies] == [TURTLE, TURTLE]
+    assert woql_client._turtle_payload("update", TURTLE)["turtle"] == TURTLE
+
+
+def test_insert_csv_sources(stub_server, connected_client, tmp_path):
+    first = tmp_path / "first.csv"
+    first.write_text("a,b\n1,2\n")
+    second = io.BytesIO(b"c,d\n3,4\n")
+    second.name = "/data/second.csv"
+
+    connected_client(stub_server(ChunkedStubHandler)).insert_csv(
+        [str(first), second, ("third.csv", (f"{n},{n}\n" for n in range(3)))],
+        "load the csvs",
+    )
+
+    [(method, path, headers, body)] = ChunkedStubHandler.received
+    assert method == "POST"
+    assert headers["Transfer-Encoding"] == "chunked"
+    parts = parse_multipart(headers, body)
+    assert list(parts) == ["first.csv", "second.csv", "third.csv", "payload"]
+    assert parts["first.csv"] == b"a,b\n1,2\n"
+    assert parts["second.csv"] == b"c,d\n3,4\n"
+    assert parts["third.csv"] == b"0,0\n1,1\n2,2\n"
+    assert json.loads(parts["payload"])["commit_info"]["message"] == "load the csvs"
+
+
+def test_insert_csv_tuple_of_paths(stub_server, connected_client, tmp_path):
+    first = tmp_path / "a.csv"
+    first.write_text("a\n1\n")
+    second = tmp_path / "b.csv"
+    second.write_text("b\n2\n")
+
+    connected_client(stub_server(ChunkedStubHandler)).insert_csv(
+        (str(first), str(second)), "load the csvs"
+    )
+
+    [(_, _, headers, body)] = ChunkedStubHandler.received
+    parts = parse_multipart(headers, body)
+    assert list(parts) == ["a.csv", "b.csv", "payload"]
+    assert parts["a.csv"] == b"a\n1\n"
+    assert parts["b.csv"] == b"b\n2\n"
+
+
+def test_csv_file_object_needs_a_name(connected_client):
+    with pytest.raises(ValueError):
+        connected_client().insert_csv(io.BytesIO(b"a\n"), "load")
+
+
+def test_chunks_are_read_lazily(tmp_path):
+    path = tmp_path / "big.ttl"
+    path.write_bytes(b"x" * 1000)
+    chunks = iter_chunks(path, chunk_size=100)
+    body = iter(StreamingBody.json({}, "turtle", chunks))
+
+    assert next(body) == b'{"turtle": "'
+    assert next(body) == b"x" * 100
+    assert json.loads(b'{"turtle": "' + b"".join(body))["turtle"] == "x" * 900
@@ -1,10 +1,17 @@
 # import sys
 # sys.path.append('woqlclient')
+import gzip
+import http.server
+import json
 import unittest.mock as mock
+from concurrent.futures import ThreadPoolExecutor
 
 import pytest
 import requests
+import terminusdb_client.json_backend as json_backend
+from terminusdb_client.woqlclient import dispatchRequest
 from terminusdb_client.woqlclient.woqlClient import WOQLClient
+from terminusdb_client.woqlquery.woql_query import WOQLQuery
 
 from .mockResponse import mocked_requests
 from .woqljson.woqlStarJson import WoqlStar
@@ -22,7 +29,7 @@ def mock_func_no_arg():
     return True
 
 
-@mock.patch("requests.get", side_effect=mocked_requests)
+@mock.patch("requests.Session.get", side_effect=mocked_requests)
 def test_connection(mocked_requests, monkeypatch):
 
     woql_client = WOQLClient("http://localhost:6363")
@@ -31,15 +38,15 @@ def test_connection(mocked_requests, monkeypatch):
 
     woql_client.connect(key="root", account="admin", user="admin")
 
-    requests.get.assert_called_once_with(
+    requests.Session.get.assert_called_once_with(
         "http://localhost:6363/api/",
         headers={"Authorization": "Basic YWRtaW46cm9vdA=="},
         verify=False,
     )
 
 
-@mock.patch("requests.post", side_effect=mocked_requests)
-@mock.patch("requests.get", side_effect=mocked_requests)
+@mock.patch("requests.Session.post", side_effect=mocked_requests)
+@mock.patch("requests.Session.get", side_effect=mocked_requests)
 def test_create_database(mocked_requests, mocked_requests2):
     woql_client = WOQLClient(
         "http://localhost:6363", user="admin", key="root", account="admin"
@@ -55,19 +62,21 @@ def test_create_database(mocked_requests, mocked_requests2):
         include_schema=False,
     )
 
-    requests.post.assert_called_once_with(
+    requests.Session.post.assert_called_once_with(
         "http://localhost:6363/api/db/admin/myFirstTerminusDB",
         headers={
             "Authorization": "Basic YWRtaW46cm9vdA==",
             "content-type": "application/json",
         },
         verify=False,
-        json={"label": "my first db", "comment": "my first db comment"},
+        data=json_backend.dumps_bytes(
+            {"label": "my first db", "comment": "my first db comment"}
+        ),
     )
 
 
-@mock.patch("requests.post", side_effect=mocked_requests)
-@mock.patch("requests.get", side_effect=mocked_requests)
+@mock.patch("requests.Session.post", side_effect=mocked_requests)
+@mock.patch("requests.Session.get", side_effect=mocked_requests)
 @mock.patch("terminusdb_client.woqlclient.woqlClient.WOQLClient.create_graph")
 def test_create_database_with_schema(
     mocked_requests, mocked_requests2, create_schema_obj
@@ -86,19 +95,21 @@ def test_create_database_with_schema(
         include_schema=True,
     )
 
-    requests.post.assert_called_once_with(
+    requests.Session.post.assert_called_once_with(
         "http://localhost:6363/api/db/admin/myFirstTerminusDB",
         headers={
             "Authorization": "Basic YWRtaW46cm9vdA==",
             "content-type": "application/json",
         },
         verify=False,
-        json={"label": "my first db", "comment": "my first db comment", "schema": True},
+        data=json_backend.dumps_bytes(
+            {"label": "my first db", "comment": "my first db comment", "schema": True}
+        ),
     )
 
 
-@mock.patch("requests.post", side_effect=mocked_requests)
-@mock.patch("requests.get", side_effect=mocked_requests)
+@mock.patch("requests.Session.post", side_effect=mocked_requests)
+@mock.patch("requests.Session.get", side_effect=mocked_requests)
 def test_create_database_and_change_account(mocked_requests, mocked_requests2):
     woql_client = WOQLClient(
         "http://localhost:6363", user="admin", account="admin", key="root"
@@ -112,39 +123,41 @@ def test_create_database_and_change_account(mocked_requests, mocked_requests2):
         include_schema=False,
     )
 
-    requests.post.assert_called_once_with(
+    requests.Session.post.assert_called_once_with(
         "http://localhost:6363/api/db/my_new_account/myFirstTerminusDB",
         headers={
             "Authorization": "Basic YWRtaW46cm9vdA==",
             "content-type": "application/json",
         },
         verify=False,
-        json={"label": "my first db", "comment": "my first db comment"},
+        data=json_backend.dumps_bytes(
+            {"label": "my first db", "comment": "my first db comment"}
+        ),
     )
 
     assert woql_client.basic_auth() == "admin:root"
 
 
-@mock.patch("requests.get", side_effect=mocked_requests)
-@mock.patch("requests.post", side_effect=mocked_requests)
+@mock.patch("requests.Session.get", side_effect=mocked_requests)
+@mock.patch("requests.Session.post", side_effect=mocked_requests)
 def test_branch(mocked_requests, mocked_requests2):
     woql_client = WOQLClient("http://localhost:6363")
     woql_client.connect(user="admin", account="admin", key="root", db="myDBName")
     woql_client.branch("my_new_branch")
 
-    requests.post.assert_called_once_with(
+    requests.Session.post.assert_called_once_with(
         "http://localhost:6363/api/branch/admin/myDBName/local/branch/my_new_branch",
         headers={
             "Authorization": "Basic YWRtaW46cm9vdA==",
             "content-type": "application/json",
         },
         verify=False,
-        json={"origin": "admin/myDBName/local/branch/main"},
+        data=json_backend.dumps_bytes({"origin": "admin/myDBName/local/branch/main"}),
     )
 
 
-@mock.patch("requests.get", side_effect=mocked_requests)
-@mock.patch("requests.post", side_effect=mocked_requests)
+@mock.patch("requests.Session.get", side_effect=mocked_requests)
+@mock.patch("requests.Session.post", side_effect=mocked_requests)
 def test_wrong_graph_type(mocked_requests, mocked_requests2):
     woql_client = WOQLClient("http://localhost:6363")
     woql_client.connect(user="admin", account="admin", key="root", db="myDBName")
@@ -153,22 +166,22 @@ def test_wrong_graph_type(mocked_requests, mocked_requests2):
         woql_client.create_graph("wrong_graph_name", "mygraph", "add a new graph")
 
 
-@mock.patch("requests.get", side_effect=mocked_requests)
+@mock.patch("requests.Session.get", side_effect=mocked_requests)
 def test_get_triples(mocked_requests):
     woql_client = WOQLClient("http://localhost:6363")
     woql_client.connect(user="admin", account="admin", key="root", db="myDBName")
 
     woql_client.get_triples("instance", "mygraph")
 
-    requests.get.assert_called_with(
+    requests.Session.get.assert_called_with(
         "http://localhost:6363/api/triples/admin/myDBName/local/branch/main/instance/mygraph",
         headers={"Authorization": "Basic YWRtaW46cm9vdA=="},
         verify=False,
     )
 
 
-@mock.patch("requests.post", side_effect=mocked_requests)
-@mock.patch("requests.get", side_effect=mocked_requests)
+@mock.patch("requests.Session.post", side_effect=mocked_requests)
+@mock.patch("requests.Session.get", side_effect=mocked_requests)
 def test_query(mocked_requests, mocked_requests2):
     woql_client = WOQLClient("http://localhost:6363")
     woql_client.connect(user="admin", account="admin", key="root", db="myDBName")
@@ -177,12 +190,268 @@ def test_query(mocked_requests, mocked_requests2):
 
     woql_client.query(WoqlStar)
 
-    requests.post.assert_called_once_with(
+    requests.Session.post.assert_called_once_with(
         "http://localhost:6363/api/woql/admin/myDBName/local/branch/main",
         headers={
             "Authorization": "Basic YWRtaW46cm9vdA==",
             "content-type": "application/json",
         },
         verify=False,
-        json={"query": WoqlStar},
+        data=json_backend.dumps_bytes({"query": WoqlStar}),
     )
+
+
+@mock.patch("requests.Session.get", side_effect=mocked_requests)
+def test_requests_share_one_session(mocked_requests):
+    woql_client = WOQLClient("http://localhost:6363")
+    woql_client.connect(user="admin", account="admin", key="root", db="myDBName")
+    session = woql_client._connection_pool.session()
+
+    woql_client.get_triples("instance", "mygraph")
+
+    assert requests.Session.get.call_count == 2
+    assert woql_client._connection_pool.session() is session
+    assert woql_client.copy()._connection_pool is woql_client._connection_pool
+
+
+@mock.patch("requests.Session.post", side_effect=mocked_requests)
+@mock.patch("requests.Session.get", side_effect=mocked_requests)
+def test_scoped_views_across_threads(mocked_get, mocked_post):
+    woql_client = WOQLClient("http://localhost:6363")
+    woql_client.connect(user="admin", account="admin", key="root", db="myDBName")
+    dbids = [f"db{n}" for n in range(20)]
+
+    def run(dbid):
+        view = woql_client.scoped(db=dbid, branch="dev")
+        view.query(WOQLQuery().star())
+        return view
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        views = list(executor.map(run, dbids))
+
+    urls = {call[0][0] for call in mocked_post.call_args_list}
+    assert urls == {
+        f"http://localhost:6363/api/woql/admin/{dbid}/local/branch/dev"
+        for dbid in dbids
+    }
+    assert woql_client.db() == "myDBName"
+    assert woql_client.checkout() == "main"
+    for view in views:
+        assert view._connection_pool is woql_client._connection_pool
+        assert view.conCapabilities is woql_client.conCapabilities
+        assert view.basic_auth() == "admin:root"
+    with pytest.raises(ValueError):
+        woql_client.scoped(key="secret")
+
+
+@mock.patch("requests.Session.get", side_effect=mocked_requests)
+def test_connect_replaces_capabilities(mocked_requests):
+    woql_client = WOQLClient("http://localhost:6363")
+    woql_client.connect(user="admin", account="admin", key="root")
+    capabilities = woql_client.conCapabilities
+    user = capabilities.get_user()
+
+    woql_client.connect()
+
+    assert woql_client.conCapabilities is not capabilities
+    assert capabilities.get_user() is user
+    assert woql_client.conCapabilities.get_user() == user
+
+
+@mock.patch("requests.Session.get", side_effect=mocked_requests)
+def test_copy_shares_capabilities(mocked_requests):
+    woql_client = WOQLClient(
+        "http://localhost:6363",
+        remote_auth={"type": "jwt", "user": "admin", "key": "<token>"},
+    )
+    woql_client.connect(user="admin", account="admin", key="root", db="myDBName")
+    capabilities = woql_client.conCapabilities
+
+    clone = woql_client.copy()
+    clone.db("otherDB")
+    clone.checkout("dev")
+    clone.remote_auth()["key"] = "<other token>"
+    clone.connect(user="other", key="secret")
+
+    assert clone.conCapabilities is not capabilities
+    assert woql_client.conCapabilities is capabilities
+    assert woql_client.copy().conCapabilities is capabilities
+    assert woql_client.db() == "myDBName"
+    assert woql_client.checkout() == "main"
+    assert woql_client.basic_auth() == "admin:root"
+    assert woql_client.remote_auth()["key"] == "<token>"
+
+
+def test_connection_pool_settings():
+    woql_client = WOQLClient(
+        "http://localhost:6363", pool_maxsize=32, max_retries=3, pool_idle_timeout=5
+    )
+    session = woql_client._connection_pool.session()
+    adapter = session.get_adapter("http://localhost:6363")
+
+    assert adapter._pool_maxsize == 32
+    assert adapter.max_retries.total == 3
+    assert woql_client._connection_pool.idle_timeout == 5
+
+
+def test_connection_pool_drops_idle_connections():
+    woql_client = WOQLClient("http://localhost:6363", pool_idle_timeout=5)
+    pool = woql_client._connection_pool
+    session = pool.session()
+    adapter = session.get_adapter("http://localhost:6363")
+    pool._last_used -= 10
+
+    with mock.patch.object(adapter, "close") as close:
+        assert pool.session() is session
+        close.assert_called()
+
+    woql_client.close()
+    assert pool._session is None
+
+
+@mock.patch("requests.Session.post", side_effect=mocked_requests)
+@mock.patch("requests.Session.get", side_effect=mocked_requests)
+def test_query_many(mocked_requests, mocked_requests2):
+    woql_client = WOQLClient("http://localhost:6363")
+    woql_client.connect(user="admin", account="admin", key="root", db="myDBName")
+
+    with mock.patch.object(
+        woql_client.conCapabilities,
+        "get_context_for_outbound_query",
+        wraps=woql_client.conCapabilities.get_context_for_outbound_query,
+    ) as get_context:
+        results = woql_client.query_many([WoqlStar, WoqlStar, WoqlStar], max_workers=2)
+
+    assert len(results) == 3
+    assert requests.Session.post.call_count == 3
+    get_context.assert_called_once()
+
+
+@mock.patch("requests.Session.get", side_effect=mocked_requests)
+def test_query_many_reports_errors(mocked_requests):
+    woql_client = WOQLClient("http://localhost:6363")
+    woql_client.connect(user="admin", account="admin", key="root", db="myDBName")
+
+    def dispatch(action, url, payload=None, file_dict=None, idempotent=None, **_):
+        if payload["query"]["fail"]:
+            raise ValueError("broken query")
+        return payload["query"]["fail"]
+
+    with mock.patch.object(woql_client, "dispatch", side_effect=dispatch):
+        results = woql_client.query_many([{"fail": False}, {"fail": True}])
+        unordered = dict(woql_client.query_many([{"fail": True}], ordered=False))
+
+    assert results[0] is False
+    assert isinstance(results[1], ValueError)
+    assert isinstance(unordered[0], ValueError)
+
+
+@mock.patch("requests.Session.get", side_effect=mocked_requests)
+def test_query_stream(mocked_requests):
+    woql_client = WOQLClient("http://localhost:6363")
+    woql_client.connect(user="admin", account="admin", key="root", db="myDBName")
+    response = mock.MagicMock(status_code=200)
+    response.iter_content.return_value = [
+        b'{"api:variable_names": ["A"], "bindings": [{"A": 1}',
+        b', {"A": 2}], "inserts": 0}',
+    ]
+
+    with mock.patch("requests.Session.post", return_value=response):
+        bindings = woql_client.query(WoqlStar, stream=True)
+        assert requests.Session.post.call_args[1]["stream"] is True
+        assert next(bindings) == {"A": 1}
+        assert list(bindings) == [{"A": 2}]
+
+    response.close.assert_called_once()
+
+
+def paged_dispatch(total, requested):
+    def dispatch(action, url, payload=None, file_dict=None, idempotent=None, **_):
+        assert idempotent
+        limit_query = payload["query"]
+        limit = limit_query["woql:limit"]["woql:datatype"]["@value"]
+        start = limit_query["woql:query"]["woql:start"]["woql:datatype"]["@value"]
+        assert limit_query["woql:query"]["woql:query"] == WOQLQuery().star().to_dict()
+        requested.append(start)
+        return {"bindings": [{"N": n} for n in range(start, min(start + limit, total))]}
+
+    return dispatch
+
+
+@pytest.mark.parametrize("prefetch", [0, 1, 3])
+def test_iter_query(prefetch):
+    woql_client = WOQLClient("http://localhost:6363")
+    requested = []
+
+    with mock.patch.object(
+        woql_client, "dispatch", side_effect=paged_dispatch(25, requested)
+    ):
+        bindings = list(
+            woql_client.iter_query(WOQLQuery().star(), page_size=10, prefetch=prefetch)
+        )
+
+    assert bindings == [{"N": n} for n in range(25)]
+    assert requested[:3] == [0, 10, 20]
+    assert len(requested) <= 3 + prefetch
+
+
+def test_iter_query_rejects_updates():
+    woql_client = WOQLClient("http://localhost:6363")
+    with pytest.raises(ValueError):
+        woql_client.iter_query(WOQLQuery().add_triple("doc:a", "type", "X"))
+
+
+class CompressionStubHandler(http.server.BaseHTTPRequestHandler):
+    """Decodes compressed request bodies and answers with gzipped json."""
+
+    received = []
+
+    def do_POST(self):
+        raw = self.rfile.read(int(self.headers["Content-Length"]))
+        encoding = self.headers.get("Content-Encoding")
+        body = gzip.decompress(raw) if encoding == "gzip" else raw
+        self.received.append((encoding, len(raw), json.loads(body)))
+        reply = gzip.compress(
+            json.dumps({"bindings": [{"N": n} for n in range(1000)]}).encode()
+        )
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Encoding", "gzip")
+        self.send_header("Content-Length", str(len(reply)))
+        self.end_headers()
+        self.wfile.write(reply)
+
+    def log_message(self, *args):
+        pass
+
+
+def test_query_compression(stub_server):
+    big_query = WOQLQuery().woql_and(
+        *[WOQLQuery().triple(f"doc:s{n}", "scm:p", f"v:O{n}") for n in range(200)]
+    )
+    small_query = WOQLQuery().triple("v:S", "v:P", "v:O")
+    woql_client = WOQLClient(
+        stub_server(CompressionStubHandler), compression_threshold=1024
+    )
+
+    result = woql_client.query(big_query)
+    woql_client.query(small_query)
+
+    assert result["bindings"][999] == {"N": 999}
+    (encoding, sent, payload), (small_encoding, _, _) = CompressionStubHandler.received
+    assert encoding == "gzip"
+    assert payload["query"]["woql:query_list"][199]["woql:query"]["woql:subject"] == {
+        "@type": "woql:Node",
+        "woql:node": "doc:s199",
+    }
+    assert sent * 5 < len(json.dumps(payload).encode())
+    assert small_encoding is None
+
+
+def test_unsupported_compression():
+    with pytest.raises(ValueError, match="lzma"):
+        WOQLClient("http://localhost:6363", compression="lzma")
+    with mock.patch.object(dispatchRequest, "zstandard", None), pytest.raises(
+        ValueError, match="zstandard"
+    ):
+        WOQLClient("http://localhost:6363", compression="zstd")
@@ -1,4 +1,8 @@
+import copy
+import gc
+import pickle
 import pprint
+import unittest.mock as mock
 
 from terminusdb_client.woqlquery.woql_query import WOQLQuery
 
@@ -34,6 +38,78 @@ class TestWoqlQueries:
         assert not woql_object._contains_update
         assert woql_object._vocab["type"] == "rdf:type"
 
+    def test_lightweight_instances(self):
+        assert not hasattr(WOQLQuery(), "__dict__")
+        gc.collect()
+        gc.disable()
+        try:
+            for n in range(10):
+                WOQLQuery().woql_and(WOQLQuery().add_triple(f"doc:{n}", "b", "c"))
+            assert gc.collect() == 0
+        finally:
+            gc.enable()
+
+    def test_copy_and_pickle(self):
+        woql_object = WOQLQuery().triple("v:S", "type", "scm:Person").opt()
+        for copied in [
+            copy.deepcopy(woql_object),
+            pickle.loads(pickle.dumps(woql_object)),
+            copy.deepcopy(WOQLQuery()),
+            pickle.loads(pickle.dumps(WOQLQuery())),
+        ]:
+            assert copied._vocab["type"] == "rdf:type"
+        copied = pickle.loads(pickle.dumps(woql_object))
+        assert copied.to_dict() == woql_object.to_dict()
+        copied.triple("v:S", "label", "v:L")
+        woql_object.triple("v:S", "label", "v:L")
+        assert copied.to_dict() == woql_object.to_dict()
+        assert copy.deepcopy(woql_object).to_json() == woql_object.to_json()
+
+    def test_aliases(self):
+        assert WOQLQuery.equals is WOQLQuery.eq
+        assert (
+            WOQLQuery().optional().triple("a", "b", "c").to_dict()
+            == WOQLQuery().opt().triple("a", "b", "c").to_dict()
+        )
+
+    def test_load_vocabulary(self):
+        client = mock.Mock()
+        client.query.return_value = {"bindings": [{"scm:Person": "x"}]}
+        woql_object = WOQLQuery()
+        woql_object.load_vocabulary(client)
+
+        assert woql_object._vocab["scm"] == "Person"
+        assert woql_object._vocab["type"] == "rdf:type"
+        assert "scm" not in WOQLQuery()._vocab
+
+    def test_serialization_cache(self):
+        woql_object = WOQLQuery().triple("v:S", "v:P", "v:O")
+        json_text = woql_object.to_json()
+        with mock.patch(
+            "terminusdb_client.woqlquery.woql_query._copy_dict"
+        ) as copy_dict:
+            assert woql_object.to_json() is json_text
+            first = woql_object.to_dict()
+            first["@context"] = {}
+            assert "@context" not in woql_object.to_dict()
+            copy_dict.assert_not_called()
+
+        woql_object.triple("v:O", "v:P", "v:S")
+        assert woql_object.to_json() != json_text
+        assert woql_object.to_dict()["@type"] == "woql:And"
+
+    def test_fingerprint(self):
+        woql_object = WOQLQuery().triple("v:S", "v:P", "v:O")
+        fingerprint = woql_object.fingerprint()
+        assert len(fingerprint) == 64
+        assert woql_object.fingerprint() == fingerprint
+        assert WOQLQuery().triple("v:S", "v:P", "v:O").fingerprint() == fingerprint
+        assert WOQLQuery().from_dict(woql_object.to_dict()).fingerprint() == (
+            fingerprint
+        )
+        woql_object.triple("v:O", "v:P", "v:S")
+        assert woql_object.fingerprint() != fingerprint
+
     def test_limit_method(self):
         woql_object = WOQLQuery().limit(10)
         limit_json = {}
@@ -529,6 +605,51 @@ class TestTripleBuilderChainer:
         assert woql_object.to_dict() == v2.to_dict()
         assert woql_object.to_dict() == v3.to_dict()
 
+    def test_long_dot_chain(self):
+        woql_object = WOQLQuery()
+        for n in range(5000):
+            woql_object.add_triple(f"doc:a{n}", "scm:p", f"doc:b{n}")
+        woql_and = WOQLQuery().woql_and(
+            *[
+                WOQLQuery().add_triple(f"doc:a{n}", "scm:p", f"doc:b{n}")
+                for n in range(3)
+            ]
+        )
+
+        query = woql_object.to_dict()
+        assert len(query["woql:query_list"]) == 5000
+        assert query["woql:query_list"][4999]["woql:index"]["@value"] == 4999
+        query["woql:query_list"] = query["woql:query_list"][:3]
+        assert query == woql_and.to_dict()
+
+    def test_nested_dot_chain(self):
+        woql_object = (
+            WOQLQuery()
+            .triple("A", "B", "C")
+            .woql_not()
+            .triple("D", "E", "F")
+            .triple("G", "H", "I")
+        )
+        expected = WOQLQuery().woql_and(
+            WOQLQuery().triple("A", "B", "C"),
+            WOQLQuery()
+            .woql_not()
+            .woql_and(
+                WOQLQuery().triple("D", "E", "F"), WOQLQuery().triple("G", "H", "I")
+            ),
+        )
+        assert woql_object.to_dict() == expected.to_dict()
+
+    def test_in_place_and(self):
+        woql_object = WOQLQuery().triple("a", "b", "c")
+        original = woql_object
+        woql_object += WOQLQuery().triple("1", "2", "3")
+
+        assert woql_object is original
+        assert woql_object.to_dict() == WOQL_AND_JSON
+        woql_object += WOQLQuery().triple("x", "y", "z")
+        assert len(woql_object.to_dict()["woql:query_list"]) == 3
+
     def test_vars(self):
         single_vars = WOQLQuery().vars("a")
         vars1, vars2, vars3 = WOQLQuery().vars("a", "b", "c")
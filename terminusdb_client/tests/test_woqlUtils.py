@@ -0,0 +1,42 @@
+import json
+
+import pytest
+from terminusdb_client.woql_utils import JSONArrayItemDecoder, iter_json_array_items
+
+RESPONSE = {
+    "@type": "api:WoqlResponse",
+    "api:status": "api:success",
+    "api:variable_names": ["A", "B"],
+    "bindings": [
+        {"A": "doc:a", "B": {"@type": "xsd:decimal", "@value": 12.5}},
+        {"A": "doc:été", "B": {"@type": "xsd:string", "@value": "x ] } ,"}},
+        {"A": "doc:c", "B": 1234567},
+    ],
+    "inserts": 0,
+    "deletes": 0,
+    "transaction_retry_count": 0,
+}
+
+
+def chunked(data, size):
+    return [data[i : i + size] for i in range(0, len(data), size)]
+
+
+@pytest.mark.parametrize("size", [1, 2, 7, 64, 100000])
+def test_iter_json_array_items(size):
+    data = json.dumps(RESPONSE, indent=1, ensure_ascii=False).encode("utf-8")
+    items = list(iter_json_array_items(chunked(data, size), "bindings"))
+    assert items == RESPONSE["bindings"]
+
+
+def test_iter_json_array_items_without_key():
+    data = json.dumps({"api:status": "api:failure", "bindings": []}).encode()
+    assert list(iter_json_array_items(chunked(data, 3), "bindings")) == []
+    assert list(iter_json_array_items([b"{}"], "bindings")) == []
+
+
+def test_truncated_document():
+    decoder = JSONArrayItemDecoder("bindings")
+    assert decoder.feed(b'{"bindings": [{"A": 1}, {"A": 2') == [{"A": 1}]
+    with pytest.raises(ValueError):
+        decoder.close()
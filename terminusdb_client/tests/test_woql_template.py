@@ -0,0 +1,106 @@
+import datetime as dt
+import unittest.mock as mock
+
+import pytest
+from terminusdb_client.woqlquery.woql_query import WOQLQuery
+from terminusdb_client.woqlquery.woql_template import Parameter
+
+
+def person_query(person, name, predicate, since, graph):
+    return (
+        WOQLQuery()
+        .select("v:Age")
+        .woql_and(
+            WOQLQuery().isa(person, "Person"),
+            WOQLQuery().triple(person, "scm:name", name),
+            WOQLQuery().quad(person, predicate, "v:Age", graph),
+            WOQLQuery().greater("v:Since", since),
+            WOQLQuery().limit(10).triple(person, "scm:friend", "v:Friend"),
+        )
+    )
+
+
+PARAMETERS = {
+    name: Parameter(name) for name in ["person", "name", "predicate", "since", "graph"]
+}
+
+
+def test_bind_matches_builder():
+    template = person_query(**PARAMETERS).compile()
+    assert template.parameters == ("person", "name", "predicate", "graph", "since")
+    for values in [
+        {
+            "person": "doc:alice",
+            "name": "Alice",
+            "predicate": "age",
+            "since": 2000,
+            "graph": "instance/main",
+        },
+        {
+            "person": "v:Person",
+            "name": "scm:Name",
+            "predicate": "v:P",
+            "since": dt.datetime(2020, 1, 1, 12, 30),
+            "graph": "schema/main",
+        },
+    ]:
+        query = template.bind(**values)
+        expected = person_query(**values)
+        assert query.to_json() == expected.to_json()
+        assert query.to_dict() == expected.to_dict()
+        assert template.bind_json(**values) == expected.to_json()
+
+
+def test_bind_does_not_build():
+    template = person_query(**PARAMETERS).compile()
+    with mock.patch.object(WOQLQuery, "triple") as triple:
+        query = template.bind(
+            person="doc:bob",
+            name="Bob",
+            predicate="age",
+            since=1990,
+            graph="instance/main",
+        )
+        triple.assert_not_called()
+    assert query.to_dict()["@type"] == "woql:Select"
+
+
+def test_template_is_independent():
+    query = WOQLQuery().triple("v:Person", "scm:name", Parameter("name"))
+    template = query.compile()
+    query.triple("v:Person", "scm:age", "v:Age")
+    bound = template.bind(name="Alice")
+    assert (
+        bound.to_dict() == WOQLQuery().triple("v:Person", "scm:name", "Alice").to_dict()
+    )
+    bound.triple("v:Person", "scm:age", "v:Age")
+    assert template.bind(name="Alice").to_dict()["@type"] == "woql:Triple"
+
+
+def test_bind_update_and_vocabulary():
+    query = WOQLQuery()
+    query._vocab = {"name": "scm:name"}
+    template = query.add_triple(
+        Parameter("person"), "name", Parameter("name")
+    ).compile()
+    bound = template.bind(person="alice", name="Alice")
+    assert bound._contains_update_check()
+    expected = WOQLQuery()
+    expected._vocab = {"name": "scm:name"}
+    assert bound.to_dict() == expected.add_triple("alice", "name", "Alice").to_dict()
+    assert template.bind(person="name", name="x").to_dict()["woql:subject"] == {
+        "@type": "woql:Node",
+        "woql:node": "scm:name",
+    }
+
+
+def test_bind_errors():
+    template = WOQLQuery().triple(Parameter("a"), "scm:p", Parameter("b")).compile()
+    with pytest.raises(ValueError, match="No value for the parameters: b"):
+        template.bind(a="doc:x")
+    with pytest.raises(ValueError, match="Unknown parameters: c"):
+        template.bind(a="doc:x", b=1, c=2)
+    with pytest.raises(ValueError, match="cannot be used in a list"):
+        WOQLQuery().member("v:X", [Parameter("a"), "b"]).compile()
+    with pytest.raises(ValueError):
+        Parameter("")
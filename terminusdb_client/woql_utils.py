@@ -1,3 +1,5 @@
+import codecs
+import json
 import urllib.parse
 
 STANDARD_URLS = {
@@ -45,6 +47,168 @@ def add_params_to_url(url, payload):
     return url
 
 
+_JSON_WHITESPACE = " \t\n\r"
+
+
+class JSONArrayItemDecoder:
+    """Incrementally decodes the items of one array member of a streamed json object.
+
+    Chunks of the document are pushed with :meth:`feed`, which returns the items
+    of the ``key`` array that are complete so far, so only the item being read is
+    held in memory. Every other member of the object is decoded and discarded.
+
+    Parameters
+    ----------
+    key : str
+        Name of the top level member that holds the array, e.g. ``"bindings"``.
+
+    Examples
+    --------
+    >>> decoder = JSONArrayItemDecoder("bindings")
+    >>> decoder.feed(b'{"bindings": [{"A": 1}, {"A"')
+    [{'A': 1}]
+    >>> decoder.feed(b': 2}]}')
+    [{'A': 2}]
+    >>> decoder.close()
+    []
+    """
+
+    def __init__(self, key):
+        self.key = key
+        self._decoder = json.JSONDecoder()
+        self._text = codecs.getincrementaldecoder("utf-8")()
+        self._buffer = ""
+        self._pos = 0
+        self._state = "object"
+        self._member = None
+        self._closed = False
+
+    def feed(self, chunk):
+        """Add the next chunk (bytes or str) and return the newly completed items."""
+        if isinstance(chunk, bytes):
+            chunk = self._text.decode(chunk)
+        self._buffer = self._buffer[self._pos :] + chunk
+        self._pos = 0
+        return self._parse()
+
+    def close(self):
+        """Signal the end of the document and return the remaining items.
+
+        Raises
+        ------
+        ValueError
+            If the document is truncated or is not a json object.
+        """
+        self._closed = True
+        self._buffer = self._buffer[self._pos :] + self._text.decode(b"", True)
+        self._pos = 0
+        items = self._parse()
+        if self._state != "done":
+            raise ValueError("Truncated json document")
+        return items
+
+    def _parse(self):
+        items = []
+        while self._state != "done":
+            char = self._next_char()
+            if char is None:
+                break
+            state = self._state
+            if state == "object":
+                self._expect(char, "{")
+                self._state = "first_key"
+            elif state in ("first_key", "key"):
+                if char == "}" and state == "first_key":
+                    self._pos += 1
+                    self._state = "done"
+                    continue
+                found, member = self._value()
+                if not found:
+                    break
+                self._member = member
+                self._state = "colon"
+            elif state == "colon":
+                self._expect(char, ":")
+                self._state = "array" if self._member == self.key else "member"
+            elif state == "member":
+                found, _ = self._value()
+                if not found:
+                    break
+                self._state = "next_member"
+            elif state == "next_member":
+                self._pos += 1
+                if char == ",":
+                    self._state = "key"
+                elif char == "}":
+                    self._state = "done"
+                else:
+                    raise ValueError(f"Unexpected character {char!r} in json object")
+            elif state == "array":
+                self._expect(char, "[")
+                self._state = "first_item"
+            elif state in ("first_item", "item"):
+                if char == "]" and state == "first_item":
+                    self._pos += 1
+                    self._state = "next_member"
+                    continue
+                found, item = self._value()
+                if not found:
+                    break
+                items.append(item)
+                self._state = "next_item"
+            elif state == "next_item":
+                self._pos += 1
+                if char == ",":
+                    self._state = "item"
+                elif char == "]":
+                    self._state = "next_member"
+                else:
+                    raise ValueError(f"Unexpected character {char!r} in json array")
+        return items
+
+    def _next_char(self):
+        buffer = self._buffer
+        while self._pos < len(buffer) and buffer[self._pos] in _JSON_WHITESPACE:
+            self._pos += 1
+        if self._pos < len(buffer):
+            return buffer[self._pos]
+        return None
+
+    def _expect(self, char, expected):
+        if char != expected:
+            raise ValueError(f"Expected {expected!r} but found {char!r}")
+        self._pos += 1
+
+    def _value(self):
+        try:
+            value, end = self._decoder.raw_decode(self._buffer, self._pos)
+        except json.JSONDecodeError:
+            if self._closed:
+                raise
+            return False, None
+        # a number at the end of the buffer may continue in the next chunk
+        if end == len(self._buffer) and not self._closed:
+            return False, None
+        self._pos = end
+        return True, value
+
+
+def iter_json_array_items(chunks, key):
+    """Yield the items of the ``key`` array of a json object read from ``chunks``.
+
+    Parameters
+    ----------
+    chunks : iterable of bytes or str
+        The json document, split in chunks of any size.
+    key : str
+        Name of the top level member that holds the array.
+    """
+    decoder = JSONArrayItemDecoder(key)
+    for chunk in chunks:
+        yield from decoder.feed(chunk)
+    yield from decoder.close()
+
+
 # below are utils for WOQLQuery
 
 
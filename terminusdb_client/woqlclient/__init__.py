@@ -1 +1,7 @@
+from .asyncWoqlClient import AsyncWOQLClient  # noqa
+from .deadline import Deadline  # noqa
+from .multiServerClient import MultiServerWOQLClient  # noqa
+from .queryCache import QueryCache  # noqa
+from .retryPolicy import RetryPolicy  # noqa
+from .schemaCache import SchemaCache  # noqa
 from .woqlClient import WOQLClient  # noqa
@@ -0,0 +1,738 @@
+"""asyncWoqlClient.py"""
+import asyncio
+import os
+import time
+from collections import deque
+
+import terminusdb_client.json_backend as json_backend
+import terminusdb_client.woql_utils as utils
+
+from .api_endpoint_const import APIEndpointConst
+from .bulkLoad import BulkLoadProgress, iter_turtle_chunks
+from .deadline import Deadline
+from .dispatchRequest import DispatchRequest, _is_multipart, _verify_check
+from .errors import DeadlineExceededError
+from .http2Session import httpx_timeout
+from .streamingDownload import Download
+from .streamingUpload import StreamingBody, iter_chunks
+from .woqlClient import STREAM_CHUNK_SIZE, WOQLClient
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+_HTTPX_MISSING = (
+    "AsyncWOQLClient requirements are not installed.\n\n"
+    "If you want to use AsyncWOQLClient, please pip install as follows:\n\n"
+    "  python -m pip install -U terminusdb-client[async]"
+)
+
+
+class AsyncDispatchRequest(DispatchRequest):
+    """Non-blocking counterpart of :class:`DispatchRequest` built on ``httpx``."""
+
+    @classmethod
+    async def send_request_by_action(
+        cls,
+        url,
+        action,
+        payload=None,
+        basic_auth=None,
+        remote_auth=None,
+        file_dict=None,
+        insecure=False,
+        session=None,
+        stream=False,
+        compression="gzip",
+        compression_threshold=None,
+        timeout=None,
+    ):
+        if payload is None:
+            payload = {}
+        headers = cls._authorization_header(basic_auth, remote_auth)
+        # extra keyword arguments for building the request
+        options = {}
+        if timeout is not None:
+            options["timeout"] = httpx_timeout(timeout)
+        body = cls._encode_body(
+            action, payload, file_dict, headers, compression, compression_threshold
+        )
+        if isinstance(body, StreamingBody):
+            body = body.async_chunks()
+
+        try:
+            request_response = None
+
+            if action in cls.GET_ACTIONS:
+                request = session.build_request(
+                    "GET",
+                    utils.add_params_to_url(url, payload),
+                    headers=headers,
+                    **options,
+                )
+
+            elif action in cls.DELETE_ACTIONS:
+                request = session.build_request(
+                    "DELETE",
+                    utils.add_params_to_url(url, payload),
+                    headers=headers,
+                    **options,
+                )
+
+            elif file_dict:
+                # multipart uploads are always POSTed, like the sync client
+                file_dict["payload"] = (
+                    "payload",
+                    json_backend.dumps(payload),
+                    "application/json",
+                )
+                request = session.build_request(
+                    "POST", url, headers=headers, files=file_dict, **options
+                )
+
+            else:
+                headers.setdefault("content-type", "application/json")
+                # multipart uploads are POSTed, streamed or not
+                if action in cls.PUT_ACTIONS and not _is_multipart(headers):
+                    method = "PUT"
+                else:
+                    method = "POST"
+                request = session.build_request(
+                    method, url, content=body, headers=headers, **options
+                )
+
+            try:
+                request_response = await session.send(request, stream=stream)
+            finally:
+                if file_dict:
+                    for key in file_dict:
+                        _, file_stream, _ = file_dict[key]
+                        if type(file_stream) != str:
+                            file_stream.close()
+
+            if stream:
+                if request_response.status_code == 200:
+                    return request_response
+                await request_response.aread()
+            return cls._process_response(url, request_response)
+
+        # the server in the response return always content-type application/json
+        except ValueError:
+            # if the response type is not a json
+            return request_response
+
+
+class AsyncConnectionPool:
+    """Shared ``httpx.AsyncClient`` of an :class:`AsyncWOQLClient` and its copies.
+
+    The client is created on first use, with the settings of a
+    :class:`ConnectionPool`, and created again after :meth:`aclose`.
+
+    Parameters
+    ----------
+    pool : ConnectionPool
+        Pool whose ``pool_maxsize``, ``idle_timeout``, ``max_retries`` and
+        ``http2`` settings are used.
+    transport : httpx.AsyncBaseTransport, optional
+        Transport of the requests, instead of a pooled ``httpx`` transport.
+    """
+
+    def __init__(self, pool, transport=None):
+        self.pool = pool
+        self.transport = transport
+        self._client = None
+
+    def client(self, verify=True):
+        """Return the shared ``httpx.AsyncClient``, creating it if needed.
+
+        Parameters
+        ----------
+        verify : bool or str
+            TLS verification of a new client, see :func:`_verify_check`.
+        """
+        if self._client is None or self._client.is_closed:
+            transport = self.transport
+            if transport is None:
+                limits = httpx.Limits(
+                    max_connections=self.pool.pool_maxsize,
+                    max_keepalive_connections=self.pool.pool_maxsize,
+                    keepalive_expiry=self.pool.idle_timeout,
+                )
+                transport = httpx.AsyncHTTPTransport(
+                    verify=verify,
+                    limits=limits,
+                    retries=self.pool.max_retries,
+                    http2=self.pool.http2,
+                )
+            self._client = httpx.AsyncClient(transport=transport, timeout=None)
+        return self._client
+
+    async def aclose(self):
+        """Close the pooled connections, a new client is made on the next use."""
+        client, self._client = self._client, None
+        if client is not None:
+            await client.aclose()
+
+
+class AsyncWOQLClient(WOQLClient):
+    """Asyncio client for querying a TerminusDB server using WOQL queries.
+
+    It has the same interface as :class:`WOQLClient`, but every method that talks
+    to the server returns an awaitable (``query(..., stream=True)`` returns an
+    asynchronous generator). The requests are sent through a pooled,
+    non-blocking ``httpx.AsyncClient`` so many queries can be in flight at once.
+
+    Examples
+    --------
+    >>> async def main():
+    ...     async with AsyncWOQLClient("http://localhost:6363") as client:
+    ...         await client.connect(user="admin", key="root", account="admin")
+    ...         return await client.query(WOQLQuery().star())
+    """
+
+    def __init__(self, server_url, **kwargs):
+        r"""The AsyncWOQLClient constructor.
+
+        Parameters
+        ----------
+        server_url : str
+            URL of the server that this client will connect to.
+        \**kwargs
+            Same configuration options as :class:`WOQLClient`.
+
+        Raises
+        ------
+        ImportError
+            If ``httpx`` is not installed.
+        """
+        if httpx is None:
+            raise ImportError(_HTTPX_MISSING)
+        super().__init__(server_url, **kwargs)
+        # shared with the copies, like the connection pool
+        self._async_pool = AsyncConnectionPool(self._connection_pool)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.aclose()
+
+    def _http(self):
+        """Return the ``httpx.AsyncClient`` shared with the copies of this client."""
+        return self._async_pool.client(
+            _verify_check(self.conConfig.server, self.insecure)
+        )
+
+    async def aclose(self):
+        """Close the pooled connections of this client and of its copies.
+
+        The connections are opened again by the next request."""
+        await self._async_pool.aclose()
+
+    async def connect(self, **kwargs):
+        r"""Connect to a Terminus server at the given URI with an API key.
+
+        See :meth:`WOQLClient.connect`.
+
+        Parameters
+        ----------
+        \**kwargs
+            Configuration options added to :attr:`conConfig`.
+
+        Returns
+        -------
+        dict
+        """
+        if len(kwargs) > 0:
+            self.conConfig.update(**kwargs)
+        if self.insecure is None:
+            self.insecure = kwargs.get("insecure")
+
+        json_obj = await self.dispatch(APIEndpointConst.CONNECT, self.conConfig.api)
+        self._load_capabilities(json_obj)
+        return json_obj
+
+    async def get_triples(self, graph_type, graph_id, dest=None, progress=None):
+        """Retrieves the contents of the specified graph as triples encoded in turtle format
+
+        See :meth:`WOQLClient.get_triples`.
+
+        Returns
+        -------
+        str
+            The triples, or ``dest`` if it is given.
+        """
+        url = self.conConfig.triples_url(graph_type, graph_id)
+        if dest is None:
+            return await self.dispatch(APIEndpointConst.GET_TRIPLES, url)
+        response = await self.dispatch(APIEndpointConst.GET_TRIPLES, url, stream=True)
+        await self._download(response, dest, progress, json_string=True)
+        return dest
+
+    async def bulk_insert_triples(
+        self,
+        graph_type,
+        graph_id,
+        source,
+        commit_msg="Bulk load",
+        chunk_triples=100000,
+        workers=4,
+        squash=False,
+        resume_from=0,
+        checkpoint=None,
+    ):
+        """Inserts a large Turtle document into the specified graph in chunks.
+
+        See :meth:`WOQLClient.bulk_insert_triples`, ``workers`` bounds the number
+        of chunks in flight at once.
+
+        Returns
+        -------
+        dict
+            The number of ``"chunks"`` and ``"triples"`` loaded, of chunks
+            ``"skipped"``, and the ``"squash"`` response or ``None``.
+        """
+        progress = BulkLoadProgress(resume_from, chunk_triples, checkpoint)
+        url = self.conConfig.triples_url(graph_type, graph_id)
+        chunks = [source] if isinstance(source, str) else iter_chunks(source)
+        pending = {}
+
+        def collect(finished):
+            for task in finished:
+                index, triples = pending.pop(task)
+                task.result()
+                progress.loaded(index, triples)
+
+        try:
+            for index, (turtle, triples) in enumerate(
+                iter_turtle_chunks(chunks, chunk_triples)
+            ):
+                if index < progress.stats["skipped"]:
+                    continue
+                while len(pending) >= max(1, workers):
+                    finished, _ = await asyncio.wait(
+                        pending, return_when=asyncio.FIRST_COMPLETED
+                    )
+                    collect(finished)
+                task = asyncio.ensure_future(
+                    self._insert_chunk(url, commit_msg, index, turtle)
+                )
+                pending[task] = (index, triples)
+            if pending:
+                await asyncio.wait(pending)
+            collect(list(pending))
+        except Exception as err:
+            # the chunks in flight may still extend the acknowledged ones
+            if pending:
+                await asyncio.wait(pending)
+            for task in list(pending):
+                try:
+                    collect([task])
+                except Exception:
+                    pass
+            raise progress.error(err, url) from err
+
+        progress.stats["squash"] = await self.squash(commit_msg) if squash else None
+        progress.finish()
+        return progress.stats
+
+    def bulk_writer(self, commit_msg="Bulk update", **kwargs):
+        r"""An :class:`AsyncBulkWriter` batching updates sent by this client.
+
+        See :meth:`WOQLClient.bulk_writer`.
+
+        Returns
+        -------
+        AsyncBulkWriter
+        """
+        from ..woqlquery.bulk_writer import AsyncBulkWriter
+
+        return AsyncBulkWriter(self, commit_msg, **kwargs)
+
+    async def bulk_insert_csv(
+        self,
+        csv_paths,
+        commit_msg="Load",
+        graph_type=None,
+        graph_id=None,
+        batch_size=1,
+        workers=4,
+        retries=1,
+    ):
+        """Inserts many CSV shards concurrently, in separate requests and commits.
+
+        See :meth:`WOQLClient.bulk_insert_csv`, ``workers`` bounds the number of
+        requests in flight at once.
+
+        Returns
+        -------
+        dict
+            The names of the shards ``"loaded"`` and ``"failed"``, and a report
+            per shard in ``"shards"``.
+        """
+        url = self.conConfig.csv_url(graph_type, graph_id)
+        shards, report, batches = self._csv_shards(csv_paths, batch_size)
+        semaphore = asyncio.Semaphore(max(1, workers))
+
+        async def send(indexes):
+            async with semaphore:
+                batch = [shards[index] for index in indexes]
+                return await self._insert_csv_batch(url, commit_msg, batch)
+
+        for _ in range(retries + 1):
+            outcomes = await asyncio.gather(*(send(batch) for batch in batches))
+            batches = self._record_csv_batches(report, shards, batches, outcomes)
+            if not batches:
+                break
+        return self._csv_report(report)
+
+    async def _insert_csv_batch(self, url, commit_msg, batch):
+        """Insert a batch of :meth:`bulk_insert_csv`, returns its duration and error."""
+        names = ", ".join(name for name, _ in batch)
+        started = time.monotonic()
+        try:
+            await self.dispatch(
+                APIEndpointConst.INSERT_CSV,
+                url,
+                self._csv_payload(f"{commit_msg}: {names}", batch),
+            )
+        except Exception as err:
+            return time.monotonic() - started, err
+        return time.monotonic() - started, None
+
+    async def get_csv(
+        self,
+        csv_name,
+        csv_directory=None,
+        graph_type=None,
+        graph_id=None,
+        stream=False,
+        progress=None,
+    ):
+        """Retrieves the contents of the specified graph as a CSV
+
+        See :meth:`WOQLClient.get_csv`.
+
+        Returns
+        -------
+        dict
+            An API success message
+        """
+        options = {}
+        if csv_directory is None:
+            csv_directory = os.getcwd()
+        options["csv_name"] = csv_name
+
+        result = await self.dispatch(
+            APIEndpointConst.GET_CSV,
+            self.conConfig.csv_url(graph_type, graph_id),
+            options,
+            stream=stream,
+        )
+        path = os.path.join(csv_directory, csv_name)
+        if stream:
+            await self._download(result, path, progress)
+            return result
+        stream = open(path, "w")
+        stream.write(result.text)
+        stream.close()
+        return result
+
+    async def _download(self, response, dest, progress=None, json_string=False):
+        """Write the body of a streamed response to ``dest``, then close it."""
+        try:
+            total = Download.expected_size(response.headers)
+            with Download(dest, total, progress, json_string) as download:
+                async for chunk in response.aiter_bytes(STREAM_CHUNK_SIZE):
+                    download.write(chunk)
+                download.finish()
+        finally:
+            await response.aclose()
+
+    async def query_many(
+        self,
+        queries,
+        commit_msg=None,
+        max_workers=None,
+        ordered=True,
+        timeout=None,
+        deadline=None,
+    ):
+        """Run several independent queries concurrently on the event loop.
+
+        See :meth:`WOQLClient.query_many`, ``max_workers`` bounds the number of
+        queries in flight at once.
+
+        Returns
+        -------
+        list
+            The result of each query, or the exception raised by it, in the
+            order of ``queries``. If ``ordered`` is ``False`` a list of
+            ``(index, result)`` pairs in completion order.
+        """
+        context = self.conCapabilities.get_context_for_outbound_query(None, self.db())
+        url = self.conConfig.query_url()
+        prepared = [
+            (self._read_only(query),)
+            + self._prepare_query(query, commit_msg, context=context)
+            for query in queries
+        ]
+        if max_workers is None:
+            max_workers = self._connection_pool.pool_maxsize
+        deadline = Deadline.coerce(deadline)
+        semaphore = asyncio.Semaphore(max(1, max_workers))
+
+        async def run(index, idempotent, payload, request_file_dict):
+            async with semaphore:
+                try:
+                    result = await self.dispatch(
+                        APIEndpointConst.WOQL_QUERY,
+                        url,
+                        payload,
+                        request_file_dict,
+                        idempotent=idempotent,
+                        timeout=timeout,
+                        deadline=deadline,
+                    )
+                except Exception as err:
+                    result = err
+            return index, result
+
+        tasks = [run(index, *request) for index, request in enumerate(prepared)]
+        if ordered:
+            return [result for _, result in await asyncio.gather(*tasks)]
+        return [await task for task in asyncio.as_completed(tasks)]
+
+    def iter_query(
+        self, woql_query, page_size=10000, prefetch=1, timeout=None, deadline=None
+    ):
+        """Asynchronously iterate over the bindings of a read-only query, page by page.
+
+        See :meth:`WOQLClient.iter_query`.
+
+        Returns
+        -------
+        async generator
+            The bindings of the query.
+        """
+        woql_query, context = self._prepare_paging(woql_query, page_size)
+        return self._iter_pages(
+            woql_query, context, page_size, prefetch, timeout, Deadline.coerce(deadline)
+        )
+
+    async def _iter_pages(
+        self, woql_query, context, page_size, prefetch, timeout, deadline
+    ):
+        """Asynchronously yield the bindings of the pages of a query prepared by
+        :meth:`_prepare_paging`."""
+        url = self.conConfig.query_url()
+        pending = deque()
+        next_start = 0
+        try:
+            while True:
+                while len(pending) <= prefetch:
+                    payload = self._page_payload(
+                        woql_query, next_start, page_size, context
+                    )
+                    pending.append(
+                        asyncio.ensure_future(
+                            self.dispatch(
+                                APIEndpointConst.WOQL_QUERY,
+                                url,
+                                payload,
+                                idempotent=True,
+                                timeout=timeout,
+                                deadline=deadline,
+                            )
+                        )
+                    )
+                    next_start += page_size
+                result = await pending.popleft()
+                bindings = result.get("bindings", [])
+                for binding in bindings:
+                    yield binding
+                if len(bindings) < page_size:
+                    return
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def _stream_bindings(self, response, chunk_size=STREAM_CHUNK_SIZE):
+        """Asynchronously yield the bindings of a streamed query response."""
+        response = await response
+        decoder = utils.JSONArrayItemDecoder("bindings")
+        try:
+            async for chunk in response.aiter_bytes(chunk_size):
+                for binding in decoder.feed(chunk):
+                    yield binding
+            for binding in decoder.close():
+                yield binding
+        finally:
+            await response.aclose()
+
+    async def get_class_frame(self, class_name):
+        """Get the frame of a class of the schema.
+
+        See :meth:`WOQLClient.get_class_frame`.
+        """
+        opts = {"class": class_name}
+
+        def fetch():
+            return self.dispatch(
+                APIEndpointConst.CLASS_FRAME, self.conConfig.class_frame_url(), opts
+            )
+
+        return await self._schema_lookup(f"class_frame:{class_name}", fetch)
+
+    async def schema_query(self, woql_query):
+        """Run a read-only schema query, see :meth:`WOQLClient.schema_query`."""
+        key, payload = self._prepare_schema_query(woql_query)
+
+        def fetch():
+            return self.dispatch(
+                APIEndpointConst.WOQL_QUERY,
+                self.conConfig.query_url(),
+                payload,
+                idempotent=True,
+                cache=False,
+            )
+
+        return await self._schema_lookup(key, fetch)
+
+    async def head_commit(self):
+        """Get the id of the head commit of the current branch.
+
+        See :meth:`WOQLClient.head_commit`.
+        """
+        if self.conConfig.ref:
+            return self.conConfig.ref
+        result = await self.dispatch(
+            APIEndpointConst.WOQL_QUERY,
+            self.conConfig.query_url(),
+            self._head_commit_payload(),
+            idempotent=True,
+            cache=False,
+        )
+        return self._head_commit_id(result)
+
+    async def _schema_lookup(self, key, fetch):
+        """Value of the schema lookup ``key``, from the cache or ``fetch()``."""
+        scope, head = self._schema_scope()
+        if scope is None:
+            return await fetch()
+        if head is None:
+            head = await self.head_commit() or ""
+            self.schema_cache.set_head(scope, head)
+        value = self.schema_cache.get(scope, key, head)
+        if value is None:
+            value = await fetch()
+            self.schema_cache.put(scope, key, head, value)
+        return value
+
+    async def dispatch(
+        self,
+        action,
+        url,
+        payload=None,
+        file_dict=None,
+        stream=False,
+        idempotent=None,
+        timeout=None,
+        deadline=None,
+        cache=True,
+    ):
+        """Directly dispatch to a TerminusDB database without blocking the event loop.
+
+        Requests that fail with a transient error are retried according to
+        :attr:`retry_policy` if they are idempotent.
+
+        Parameters
+        ----------
+        action
+            The action to perform on the server.
+        url : str
+            The server URL to point the action at.
+        payload : dict
+            Payload to send to the server.
+        file_dict : dict, optional
+            Dict of files to include in the query.
+        stream : bool
+            If ``True``, the response of a successful request is returned
+            without reading its body.
+        idempotent : bool, optional
+            Whether the request can safely be sent more than once, see
+            :meth:`WOQLClient.dispatch`.
+        timeout : float or tuple, optional
+            Timeout of the request, defaults to the timeout of the client.
+        deadline : float or Deadline, optional
+            Seconds (or a :class:`Deadline`) within which the request, retries
+            included, must complete.
+        cache : bool
+            If ``False``, :attr:`query_cache` is not used for this request.
+
+        Returns
+        -------
+        dict
+        """
+        if payload is None:
+            payload = {}
+        if idempotent is None:
+            idempotent = action in AsyncDispatchRequest.IDEMPOTENT_ACTIONS
+        if timeout is None:
+            timeout = self.timeout
+        deadline = Deadline.coerce(deadline)
+
+        async def send():
+            if deadline is not None:
+                deadline.check()
+            try:
+                return await AsyncDispatchRequest.send_request_by_action(
+                    url,
+                    action,
+                    payload,
+                    self.basic_auth(),
+                    self.remote_auth(),
+                    file_dict,
+                    self.insecure,
+                    session=self._http(),
+                    stream=stream,
+                    compression=self.compression,
+                    compression_threshold=self.compression_threshold,
+                    timeout=timeout if deadline is None else deadline.cap(timeout),
+                )
+            except httpx.TimeoutException as err:
+                if deadline is not None and deadline.expired():
+                    raise DeadlineExceededError(str(err), url) from err
+                raise
+
+        cache_key = None
+        if cache:
+            cache_key = self._cache_key(
+                action, url, payload, file_dict, stream, idempotent
+            )
+        if cache_key is not None:
+            result = self.query_cache.get(cache_key)
+            if result is not None:
+                return result
+        try:
+            if self.retry_policy is None:
+                result = await send()
+            else:
+                result = await self.retry_policy.acall(
+                    send,
+                    idempotent
+                    and not file_dict
+                    and not isinstance(payload, StreamingBody),
+                    deadline,
+                    retry_errors=(
+                        httpx.NetworkError,
+                        httpx.ConnectTimeout,
+                        httpx.RemoteProtocolError,
+                    ),
+                )
+        finally:
+            self._invalidate_cache(action, idempotent)
+        if cache_key is not None:
+            self.query_cache.put(cache_key, result)
+        return result
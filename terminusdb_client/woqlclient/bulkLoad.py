@@ -0,0 +1,232 @@
+"""bulkLoad.py"""
+import codecs
+import os
+import re
+
+import terminusdb_client.json_backend as json_backend
+
+from .errors import BulkLoadError
+
+_LONG_STRING = re.compile(
+    r"""(?P<long_string>
+        \"\"\"(?:[^"\\]|\\.|"(?!""))*\"\"\"
+        | '''(?:[^'\\]|\\.|'(?!''))*'''
+    )""",
+    re.VERBOSE | re.DOTALL,
+)
+_TURTLE_TOKEN = re.compile(
+    r"""
+    (?P<space>\s+)
+    | (?P<comment>\#[^\n]*\n)
+    | (?P<string>"(?:[^"\\\n]|\\.)*"|'(?:[^'\\\n]|\\.)*')
+    | (?P<iri><[^>\s]*>)
+    | (?P<separator>[;,])
+    | (?P<end>\.(?=[\s\#]))
+    | (?P<word>[^"'<\#\s;,.]+|\.(?=[^\s\#]))
+    """,
+    re.VERBOSE | re.DOTALL,
+)
+
+
+class TurtleStatementReader:
+    """Incrementally splits a Turtle document into its statements.
+
+    Chunks of the document are pushed with :meth:`feed`, which returns the
+    statements that are complete so far as ``(text, triples)`` tuples, where
+    ``triples`` is the number of triples of the statement, ``0`` for the
+    ``@prefix``, ``@base``, ``PREFIX`` and ``BASE`` directives. Only the
+    statement being read is held in memory.
+
+    Examples
+    --------
+    >>> reader = TurtleStatementReader()
+    >>> reader.feed('@prefix ex: <http://ex.org/> .\\nex:a ex:b ex:c ;\\n  ex:d "e')
+    [('@prefix ex: <http://ex.org/> .', 0)]
+    >>> reader.feed('" .\\n')
+    [('\\nex:a ex:b ex:c ;\\n  ex:d "e" .', 2)]
+    >>> reader.close()
+    []
+    """
+
+    def __init__(self):
+        self._text = codecs.getincrementaldecoder("utf-8")()
+        self._buffer = ""
+        self._pos = 0
+        self._new_statement()
+
+    def _new_statement(self):
+        self._start = self._pos
+        self._first_word = None
+        self._triples = 1
+
+    def feed(self, chunk):
+        """Add the next chunk (bytes or str) and return the completed statements."""
+        if isinstance(chunk, bytes):
+            chunk = self._text.decode(chunk)
+        self._buffer = self._buffer[self._start :] + chunk
+        self._pos -= self._start
+        self._start = 0
+        return self._parse(False)
+
+    def close(self):
+        """Signal the end of the document and return the remaining statements.
+
+        Raises
+        ------
+        ValueError
+            If the document ends in the middle of a statement.
+        """
+        # a trailing newline ends the last comment and the last statement
+        statements = self.feed(self._text.decode(b"", True) + "\n")
+        statements += self._parse(True)
+        if self._first_word is not None:
+            raise ValueError("Truncated or invalid Turtle statement")
+        return statements
+
+    def _parse(self, final):
+        statements = []
+        buffer = self._buffer
+        while self._pos < len(buffer):
+            if buffer.startswith(('"""', "'''"), self._pos):
+                match = _LONG_STRING.match(buffer, self._pos)
+            elif buffer[self._pos] in "\"'" and len(buffer) - self._pos < 3:
+                # may be the start of a long string
+                match = None if not final else _TURTLE_TOKEN.match(buffer, self._pos)
+            else:
+                match = _TURTLE_TOKEN.match(buffer, self._pos)
+            if match is None:
+                if final:
+                    raise ValueError("Truncated or invalid Turtle statement")
+                break
+            kind = match.lastgroup
+            if kind == "word" and match.end() == len(buffer) and not final:
+                # the word may continue in the next chunk
+                break
+            self._pos = match.end()
+            if kind in ("space", "comment"):
+                continue
+            if self._first_word is None:
+                self._first_word = match.group() if kind == "word" else ""
+            directive = self._first_word.lower() in ("@prefix", "@base")
+            sparql_directive = self._first_word.upper() in ("PREFIX", "BASE")
+            if kind == "separator":
+                self._triples += 1
+            elif kind == "end" or (kind == "iri" and sparql_directive):
+                text = buffer[self._start : self._pos]
+                triples = 0 if directive or sparql_directive else self._triples
+                statements.append((text, triples))
+                self._new_statement()
+        return statements
+
+
+def iter_turtle_chunks(chunks, chunk_triples=100000):
+    """Split a Turtle document into smaller documents of about ``chunk_triples``.
+
+    The document is split between statements, and every piece starts with the
+    prefix and base directives that precede it in the document, so the pieces
+    can be loaded independently.
+
+    Parameters
+    ----------
+    chunks : iterable of bytes or str
+        The Turtle document, split in chunks of any size.
+    chunk_triples : int
+        Number of triples after which a piece is completed. A piece ends with
+        a whole statement, so it may have a few more triples.
+
+    Yields
+    ------
+    tuple
+        ``(turtle, triples)``, a piece of the document and its number of
+        triples.
+    """
+    reader = TurtleStatementReader()
+    directives = []
+    statements = []
+    triples = 0
+
+    def piece():
+        return "\n".join(directives[:header] + statements) + "\n", triples
+
+    header = 0
+    for chunk in _with_end(chunks):
+        new_statements = reader.close() if chunk is None else reader.feed(chunk)
+        for text, count in new_statements:
+            text = text.strip()
+            if count == 0:
+                directives.append(text)
+            statements.append(text)
+            triples += count
+            if triples >= chunk_triples:
+                yield piece()
+                header = len(directives)
+                statements = []
+                triples = 0
+    if triples:
+        yield piece()
+
+
+def _with_end(chunks):
+    yield from chunks
+    yield None
+
+
+class BulkLoadProgress:
+    """Chunks of a bulk load loaded so far, optionally saved to a checkpoint.
+
+    Chunks may be loaded in any order, :attr:`acknowledged` is the number of
+    chunks loaded from the start of the input, from which the load can be
+    resumed.
+
+    Parameters
+    ----------
+    resume_from : int
+        Number of chunks loaded by a previous load.
+    chunk_size : int
+        Size of the chunks, a resumed load must split its input the same way.
+    checkpoint : str, optional
+        Path of a file where the progress is saved after each chunk. If it
+        exists, the load resumes from the progress it holds.
+    """
+
+    def __init__(self, resume_from=0, chunk_size=None, checkpoint=None):
+        if checkpoint is not None and os.path.exists(checkpoint):
+            with open(checkpoint, "rb") as stream:
+                state = json_backend.loads(stream.read())
+            if state["chunk_size"] != chunk_size:
+                raise ValueError(
+                    f"{checkpoint} was saved for chunks of size {state['chunk_size']}"
+                )
+            resume_from = max(resume_from, state["acknowledged"])
+        self.chunk_size = chunk_size
+        self.checkpoint = checkpoint
+        self.acknowledged = resume_from
+        self.stats = {"chunks": 0, "triples": 0, "skipped": resume_from}
+        self._loaded = set()
+
+    def loaded(self, index, triples):
+        """Record that chunk number ``index`` (from 0) with ``triples`` is loaded."""
+        self._loaded.add(index)
+        self.stats["chunks"] += 1
+        self.stats["triples"] += triples
+        while self.acknowledged in self._loaded:
+            self._loaded.remove(self.acknowledged)
+            self.acknowledged += 1
+        if self.checkpoint is not None:
+            state = {"acknowledged": self.acknowledged, "chunk_size": self.chunk_size}
+            with open(f"{self.checkpoint}.tmp", "wb") as stream:
+                stream.write(json_backend.dumps_bytes(state))
+            os.replace(f"{self.checkpoint}.tmp", self.checkpoint)
+
+    def error(self, cause, url=None):
+        """The :class:`BulkLoadError` to raise when the load fails with ``cause``."""
+        return BulkLoadError(
+            f"Bulk load stopped after {self.acknowledged} chunks: {cause}",
+            url,
+            acknowledged=self.acknowledged,
+        )
+
+    def finish(self):
+        """Remove the checkpoint of a completed load."""
+        if self.checkpoint is not None and os.path.exists(self.checkpoint):
+            os.remove(self.checkpoint)
@@ -18,6 +18,11 @@ pp = pprint.PrettyPrinter(indent=4)
 
 
 class ConnectionCapabilities:
+    """Register of what the connected user can see and do on the server.
+
+    A register is loaded once by :meth:`WOQLClient.connect` and then shared,
+    read-only, by the copies and views of the client."""
+
     def __init__(self):
         self.user = None
         self.dbdocs = {}
@@ -0,0 +1,80 @@
+"""deadline.py"""
+import time
+
+from .errors import DeadlineExceededError
+
+
+class Deadline:
+    """Point in time by which an operation must be complete.
+
+    A deadline covers every request made for the operation, retries and pages
+    included: the timeout of each request is capped by the time left, and no
+    request or retry is started once it has expired.
+
+    Parameters
+    ----------
+    seconds : float
+        Time allowed to the operation, from now.
+
+    Examples
+    --------
+    >>> deadline = Deadline(30)
+    >>> for binding in client.iter_query(query, deadline=deadline):
+    ...     print(binding)
+    """
+
+    def __init__(self, seconds):
+        self.seconds = seconds
+        self.expires_at = time.monotonic() + seconds
+
+    @classmethod
+    def coerce(cls, deadline):
+        """Deadline from a :class:`Deadline`, a number of seconds or ``None``."""
+        if deadline is None or isinstance(deadline, cls):
+            return deadline
+        return cls(deadline)
+
+    def remaining(self):
+        """Seconds left before the deadline, ``0`` once it has passed."""
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self):
+        """Whether the deadline has passed."""
+        return self.remaining() <= 0
+
+    def check(self):
+        """Raise a :class:`DeadlineExceededError` if the deadline has passed."""
+        if self.expired():
+            raise self._exceeded()
+
+    def cap(self, timeout):
+        """Cap a request timeout by the time left before the deadline.
+
+        Parameters
+        ----------
+        timeout : float or tuple, optional
+            A timeout in seconds or a ``(connect, read)`` tuple, ``None`` for
+            no timeout.
+
+        Returns
+        -------
+        float or tuple
+
+        Raises
+        ------
+        DeadlineExceededError
+            If no time is left, as a zero timeout would not be a timeout.
+        """
+        remaining = self.remaining()
+        if remaining <= 0:
+            raise self._exceeded()
+        if timeout is None:
+            return remaining
+        if isinstance(timeout, tuple):
+            return tuple(
+                remaining if part is None else min(part, remaining) for part in timeout
+            )
+        return min(timeout, remaining)
+
+    def _exceeded(self):
+        return DeadlineExceededError(f"Deadline of {self.seconds}s exceeded")
@@ -1,14 +1,37 @@
 # from .errorMessage import ErrorMessage
-import json
+import gzip
+import re
+import threading
+import time
+import urllib.parse
 import warnings
+import zlib
 from base64 import b64encode
 
 import requests
+import terminusdb_client.json_backend as json_backend
 import terminusdb_client.woql_utils as utils
+from requests.adapters import HTTPAdapter
 from urllib3.exceptions import InsecureRequestWarning
 
 from .api_endpoint_const import APIEndpointConst
 from .errors import APIError
+from .http2Session import _HTTP2_MISSING, HTTP2Session, http2_available
+from .streamingUpload import StreamingBody
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+def _check_compression(compression):
+    """Raise ``ValueError`` if request bodies cannot be compressed with
+    ``compression``."""
+    if compression not in ("gzip", "deflate", "zstd"):
+        raise ValueError(f"Unsupported compression: {compression}")
+    if compression == "zstd" and zstandard is None:
+        raise ValueError("zstd compression requires the zstandard package")
 
 
 def _verify_check(url, insecure=False):
@@ -18,35 +41,214 @@ def _verify_check(url, insecure=False):
         return True
 
 
+_insecure_warning_lock = threading.Lock()
+
+
+def _ignore_insecure_warning(url):
+    """Ignore the InsecureRequestWarning of unverified HTTPS requests to ``url``.
+
+    A filter matching only the host of ``url`` is installed if it is not in
+    the warning filters yet, so the other filters of the application are left
+    untouched, and the filter is installed again if the application resets
+    them (with ``warnings.resetwarnings()`` or ``warnings.catch_warnings()``).
+    """
+    if url[:8] != "https://":
+        return
+    host = urllib.parse.urlsplit(url).hostname
+    message = f"Unverified HTTPS request is being made to host '{re.escape(host)}'"
+    with _insecure_warning_lock:
+        if not any(
+            action == "ignore"
+            and category is InsecureRequestWarning
+            and regex is not None
+            and regex.pattern == message
+            for action, regex, category, *_ in warnings.filters
+        ):
+            warnings.filterwarnings(
+                "ignore", message=message, category=InsecureRequestWarning
+            )
+
+
+def _is_multipart(headers):
+    """Whether the request with ``headers`` has a multipart body."""
+    return headers.get("content-type", "").startswith("multipart/")
+
+
+class ConnectionPool:
+    """Long-lived HTTP session with a keep-alive connection pool.
+
+    A single pool is shared by every request dispatched by a client (and by its
+    copies) so that TCP and TLS connections are reused instead of being opened
+    for each call.
+
+    Parameters
+    ----------
+    pool_connections : int
+        Number of host pools to cache.
+    pool_maxsize : int
+        Maximum number of connections kept alive per host.
+    max_retries : int
+        Number of connection level retries done by the transport adapter.
+    idle_timeout : float, optional
+        Seconds after which idle pooled connections are dropped before the next
+        request rather than reused. ``None`` keeps them until closed.
+    http2 : bool
+        If ``True``, the requests are sent with a :class:`HTTP2Session`, which
+        multiplexes them over HTTP/2 connections. Falls back to HTTP/1.1, with
+        a warning, if ``httpx`` and ``h2`` are not installed.
+    """
+
+    def __init__(
+        self,
+        pool_connections=10,
+        pool_maxsize=10,
+        max_retries=0,
+        idle_timeout=None,
+        http2=False,
+    ):
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.max_retries = max_retries
+        self.idle_timeout = idle_timeout
+        if http2 and not http2_available():
+            warnings.warn(_HTTP2_MISSING, RuntimeWarning, stacklevel=2)
+            http2 = False
+        self.http2 = http2
+        self._session = None
+        self._last_used = None
+        self._lock = threading.Lock()
+
+    def session(self):
+        """Return the shared session, creating it on first use."""
+        with self._lock:
+            now = time.monotonic()
+            if self._session is None:
+                self._session = self._new_session()
+            elif (
+                self.idle_timeout is not None
+                and self._last_used is not None
+                and now - self._last_used > self.idle_timeout
+            ):
+                self._close_connections()
+            self._last_used = now
+            return self._session
+
+    def close(self):
+        """Close all the pooled connections and drop the session."""
+        with self._lock:
+            if self._session is not None:
+                self._session.close()
+            self._session = None
+            self._last_used = None
+
+    def _new_session(self):
+        if self.http2:
+            return HTTP2Session(
+                pool_maxsize=self.pool_maxsize,
+                max_retries=self.max_retries,
+                idle_timeout=self.idle_timeout,
+            )
+        session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=self.pool_connections,
+            pool_maxsize=self.pool_maxsize,
+            max_retries=self.max_retries,
+        )
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
+
+    def _close_connections(self):
+        if isinstance(self._session, HTTP2Session):
+            self._session.close()
+            return
+        for adapter in self._session.adapters.values():
+            adapter.close()
+
+
 class DispatchRequest:
+    # HTTP verb used by the server for each API action
+    GET_ACTIONS = (
+        APIEndpointConst.GET_TRIPLES,
+        APIEndpointConst.GET_CSV,
+        APIEndpointConst.CONNECT,
+        APIEndpointConst.CLASS_FRAME,
+    )
+    DELETE_ACTIONS = (
+        APIEndpointConst.DELETE_DATABASE,
+        APIEndpointConst.DELETE_GRAPH,
+    )
+    POST_ACTIONS = (
+        APIEndpointConst.WOQL_QUERY,
+        APIEndpointConst.CREATE_DATABASE,
+        APIEndpointConst.UPDATE_TRIPLES,
+        APIEndpointConst.UPDATE_CSV,
+        APIEndpointConst.CREATE_GRAPH,
+        APIEndpointConst.FETCH,
+        APIEndpointConst.PULL,
+        APIEndpointConst.PUSH,
+        APIEndpointConst.REBASE,
+        APIEndpointConst.BRANCH,
+        APIEndpointConst.CLONE,
+        APIEndpointConst.RESET,
+        APIEndpointConst.OPTIMIZE,
+        APIEndpointConst.SQUASH,
+    )
+    PUT_ACTIONS = (
+        APIEndpointConst.INSERT_TRIPLES,
+        APIEndpointConst.INSERT_CSV,
+    )
+
+    # actions that can safely be sent again after a transient failure
+    IDEMPOTENT_ACTIONS = GET_ACTIONS
+
+    # actions whose json body may be compressed
+    COMPRESSIBLE_ACTIONS = (
+        APIEndpointConst.WOQL_QUERY,
+        APIEndpointConst.INSERT_TRIPLES,
+        APIEndpointConst.UPDATE_TRIPLES,
+    )
+
     def __init__(self):
         pass
 
     @staticmethod
-    def __get_call(url, headers, payload, insecure=False):
+    def __get_call(url, headers, payload, insecure=False, session=None, **options):
+        http = session if session is not None else requests
         url = utils.add_params_to_url(url, payload)
-        if not _verify_check(url, insecure):
-            warnings.simplefilter("ignore", InsecureRequestWarning)
-        result = requests.get(url, headers=headers, verify=_verify_check(url, insecure))
-        warnings.resetwarnings()
-        return result
+        verify = _verify_check(url, insecure)
+        if not verify:
+            _ignore_insecure_warning(url)
+        return http.get(url, headers=headers, verify=verify, **options)
 
     @staticmethod
-    def __post_call(url, headers, payload, file_dict=None, insecure=False):
-        if not _verify_check(url, insecure):
-            warnings.simplefilter("ignore", InsecureRequestWarning)
+    def __post_call(
+        url,
+        headers,
+        payload,
+        file_dict=None,
+        insecure=False,
+        session=None,
+        body=None,
+        **options,
+    ):
+        http = session if session is not None else requests
+        verify = _verify_check(url, insecure)
+        if not verify:
+            _ignore_insecure_warning(url)
         if file_dict:
             file_dict["payload"] = (
                 "payload",
-                json.dumps(payload),
+                json_backend.dumps(payload),
                 "application/json",
             )
 
-            result = requests.post(
+            result = http.post(
                 url,
                 headers=headers,
                 files=file_dict,
-                verify=_verify_check(url, insecure),
+                verify=verify,
+                **options,
             )
             # Close the files although request should do this :(
             for key in file_dict:
@@ -54,26 +256,46 @@ class DispatchRequest:
                 if type(stream) != str:
                     stream.close()
         else:
-            headers["content-type"] = "application/json"
-            result = requests.post(
-                url, json=payload, headers=headers, verify=_verify_check(url, insecure)
+            headers.setdefault("content-type", "application/json")
+            if body is None:
+                body = json_backend.dumps_bytes(payload)
+            result = http.post(
+                url,
+                headers=headers,
+                verify=verify,
+                data=body,
+                **options,
             )
-        warnings.resetwarnings()
         return result
 
     @staticmethod
-    def __put_call(url, headers, payload, file_dict=None, insecure=None):
-        if not _verify_check(url):
-            warnings.simplefilter("ignore", InsecureRequestWarning)
+    def __put_call(
+        url,
+        headers,
+        payload,
+        file_dict=None,
+        insecure=None,
+        session=None,
+        body=None,
+        **options,
+    ):
+        http = session if session is not None else requests
+        verify = _verify_check(url, insecure)
+        if not verify:
+            _ignore_insecure_warning(url)
         if file_dict:
             file_dict["payload"] = (
                 "payload",
-                json.dumps(payload),
+                json_backend.dumps(payload),
                 "application/json",
             )
 
-            result = requests.post(
-                url, headers=headers, files=file_dict, verify=_verify_check(url),
+            result = http.post(
+                url,
+                headers=headers,
+                files=file_dict,
+                verify=verify,
+                **options,
             )
             # Close the files although request should do this :(
             for key in file_dict:
@@ -81,26 +303,31 @@ class DispatchRequest:
                 if type(stream) != str:
                     stream.close()
         else:
-            headers["content-type"] = "application/json"
-            result = requests.put(
-                url, json=payload, headers=headers, verify=_verify_check(url, insecure)
+            headers.setdefault("content-type", "application/json")
+            if body is None:
+                body = json_backend.dumps_bytes(payload)
+            # streamed multipart uploads are POSTed, like the file_dict ones
+            send = http.post if _is_multipart(headers) else http.put
+            result = send(
+                url,
+                headers=headers,
+                verify=verify,
+                data=body,
+                **options,
             )
-        warnings.resetwarnings()
         return result
 
     @staticmethod
-    def __delete_call(url, headers, payload, insecure=False):
+    def __delete_call(url, headers, payload, insecure=False, session=None, **options):
+        http = session if session is not None else requests
         url = utils.add_params_to_url(url, payload)
-        if not _verify_check(url, insecure):
-            warnings.simplefilter("ignore", InsecureRequestWarning)
-        result = requests.delete(
-            url, headers=headers, verify=_verify_check(url, insecure)
-        )
-        warnings.resetwarnings()
-        return result
+        verify = _verify_check(url, insecure)
+        if not verify:
+            _ignore_insecure_warning(url)
+        return http.delete(url, headers=headers, verify=verify, **options)
 
     @staticmethod
-    def __autorization_header(basic_auth=None, remote_auth=None):
+    def _authorization_header(basic_auth=None, remote_auth=None):
         headers = {}
 
         # if (payload and ('terminus:user_key' in  payload)):
@@ -118,6 +345,60 @@ class DispatchRequest:
             ).decode("utf-8")
         return headers
 
+    @classmethod
+    def _encode_body(
+        cls, action, payload, file_dict, headers, compression, compression_threshold
+    ):
+        """Serialize the json body of ``action`` with the current json backend.
+
+        The body is compressed, and its ``content-encoding`` header set, if the
+        action is compressible and the body reaches the threshold. A
+        :class:`StreamingBody` payload is sent as it is, uncompressed. Returns
+        ``None`` if the request has no json body."""
+        if isinstance(payload, StreamingBody):
+            headers["content-type"] = payload.content_type
+            return payload
+        if file_dict or action not in cls.POST_ACTIONS + cls.PUT_ACTIONS:
+            return None
+        body = json_backend.dumps_bytes(payload)
+        if (
+            compression_threshold is None
+            or action not in cls.COMPRESSIBLE_ACTIONS
+            or len(body) < compression_threshold
+        ):
+            return body
+        _check_compression(compression)
+        if compression == "gzip":
+            body = gzip.compress(body)
+        elif compression == "deflate":
+            body = zlib.compress(body)
+        else:
+            body = zstandard.ZstdCompressor().compress(body)
+        headers["content-encoding"] = compression
+        return body
+
+    @staticmethod
+    def _process_response(url, request_response):
+        """Decode a successful response or raise an :class:`APIError`.
+
+        Raises ValueError if the body of a successful response is not json."""
+        if request_response.status_code == 200:
+            # if not a json not it raises an error
+            return json_backend.loads(request_response.content)
+        else:
+            # Raise an exception if a request is unsuccessful
+            message = "Api Error"
+
+            if type(request_response.text) is str:
+                message = request_response.text
+
+            try:
+                err_obj = json_backend.loads(request_response.content)
+            except ValueError:
+                # e.g. the html error page of a proxy
+                err_obj = None
+            raise (APIError(message, url, err_obj, request_response.status_code))
+
     # url, action, payload, basic_auth, jwt=null
 
     @classmethod
@@ -130,82 +411,85 @@ class DispatchRequest:
         remote_auth=None,
         file_dict=None,
         insecure=False,
+        session=None,
+        stream=False,
+        compression="gzip",
+        compression_threshold=None,
+        timeout=None,
     ):
+        """Send the request for ``action`` and decode the json response.
+
+        With ``stream=True`` the body of a successful response is not read, the
+        response object is returned so it can be consumed incrementally.
+
+        The json bodies of the :attr:`COMPRESSIBLE_ACTIONS` that are at least
+        ``compression_threshold`` bytes long are sent compressed with the
+        ``compression`` encoding (``"gzip"``, ``"deflate"`` or ``"zstd"``).
+        Compressed responses are negotiated and decoded by the HTTP transport,
+        which accepts zstd as well when the ``zstandard`` package is installed.
+
+        ``timeout`` is the timeout of the request in seconds, or a
+        ``(connect, read)`` tuple, ``None`` to wait forever.
+
+        A :class:`StreamingBody` ``payload`` of a POST or PUT action is sent
+        with chunked transfer encoding while it is generated."""
 
         # payload default as empty dict is against PEP
         # print("Sending to URL____________", url)
         # print("Send Request By Action_____________", action)
         if payload is None:
             payload = {}
+        # extra keyword arguments for the request helpers
+        options = {}
+        if stream:
+            options["stream"] = True
+        if timeout is not None:
+            options["timeout"] = timeout
+        headers = cls._authorization_header(basic_auth, remote_auth)
+        body = cls._encode_body(
+            action, payload, file_dict, headers, compression, compression_threshold
+        )
+        if body is not None:
+            options["body"] = body
 
         try:
             request_response = None
-            headers = cls.__autorization_header(basic_auth, remote_auth)
-
-            if action in [
-                APIEndpointConst.GET_TRIPLES,
-                APIEndpointConst.GET_CSV,
-                APIEndpointConst.CONNECT,
-                APIEndpointConst.CLASS_FRAME,
-            ]:
+
+            if action in cls.GET_ACTIONS:
                 request_response = cls.__get_call(
-                    url, headers, payload, insecure=insecure
+                    url, headers, payload, insecure=insecure, session=session, **options
                 )
 
-            elif action in [
-                APIEndpointConst.DELETE_DATABASE,
-                APIEndpointConst.DELETE_GRAPH,
-            ]:
+            elif action in cls.DELETE_ACTIONS:
                 request_response = cls.__delete_call(
-                    url, headers, payload, insecure=insecure
+                    url, headers, payload, insecure=insecure, session=session, **options
                 )
 
-            elif action in [
-                APIEndpointConst.WOQL_QUERY,
-                APIEndpointConst.CREATE_DATABASE,
-                APIEndpointConst.UPDATE_TRIPLES,
-                APIEndpointConst.UPDATE_CSV,
-                APIEndpointConst.CREATE_GRAPH,
-                APIEndpointConst.FETCH,
-                APIEndpointConst.PULL,
-                APIEndpointConst.PUSH,
-                APIEndpointConst.REBASE,
-                APIEndpointConst.BRANCH,
-                APIEndpointConst.CLONE,
-                APIEndpointConst.RESET,
-                APIEndpointConst.OPTIMIZE,
-                APIEndpointConst.SQUASH,
-            ]:
+            elif action in cls.POST_ACTIONS:
                 request_response = cls.__post_call(
-                    url, headers, payload, file_dict, insecure=insecure
+                    url,
+                    headers,
+                    payload,
+                    file_dict,
+                    insecure=insecure,
+                    session=session,
+                    **options,
                 )
 
-            elif action in [
-                APIEndpointConst.INSERT_TRIPLES,
-                APIEndpointConst.INSERT_CSV,
-            ]:
+            elif action in cls.PUT_ACTIONS:
                 request_response = cls.__put_call(
-                    url, headers, payload, file_dict, insecure=insecure
+                    url,
+                    headers,
+                    payload,
+                    file_dict,
+                    insecure=insecure,
+                    session=session,
+                    **options,
                 )
 
-            if request_response.status_code == 200:
-                # print("hellow ")
-                return request_response.json()  # if not a json not it raises an error
-            else:
-                # Raise an exception if a request is unsuccessful
-                message = "Api Error"
-
-                if type(request_response.text) is str:
-                    message = request_response.text
-
-                raise (
-                    APIError(
-                        message,
-                        url,
-                        request_response.json(),
-                        request_response.status_code,
-                    )
-                )
+            if stream and request_response.status_code == 200:
+                return request_response
+            return cls._process_response(url, request_response)
 
         # to be reviewed
         # the server in the response return always content-type application/json
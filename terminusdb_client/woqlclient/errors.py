@@ -36,3 +36,18 @@ class APIError(DatabaseError):
 
 class InvalidURIError(Error):
     pass
+
+
+class DeadlineExceededError(Error, TimeoutError):
+    """Exception raised when an operation does not complete by its deadline."""
+
+
+class BulkLoadError(Error):
+    """Exception raised when a bulk load stops before loading all its input.
+
+    ``acknowledged`` is the number of chunks loaded from the start of the input,
+    from which the load can be resumed."""
+
+    def __init__(self, msg=None, url=None, err_obj=None, acknowledged=0):
+        super().__init__(msg, url, err_obj)
+        self.acknowledged = acknowledged
@@ -0,0 +1,143 @@
+"""http2Session.py"""
+import threading
+
+import requests
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+try:
+    import h2
+except ImportError:
+    h2 = None
+
+_HTTP2_MISSING = (
+    "HTTP/2 requirements are not installed, falling back to HTTP/1.1.\n\n"
+    "If you want to use HTTP/2, please pip install as follows:\n\n"
+    "  python -m pip install -U terminusdb-client[http2]"
+)
+
+
+def http2_available():
+    """Whether the packages needed by :class:`HTTP2Session` are installed."""
+    return httpx is not None and h2 is not None
+
+
+def httpx_timeout(timeout):
+    """Convert a ``requests`` timeout (seconds or ``(connect, read)``) for httpx."""
+    if isinstance(timeout, tuple):
+        connect, read = timeout
+        return httpx.Timeout(None, connect=connect, read=read)
+    return httpx.Timeout(timeout)
+
+
+class HTTP2Response:
+    """A ``httpx`` response with the ``requests`` response interface used here."""
+
+    def __init__(self, response):
+        self._response = response
+
+    def __getattr__(self, name):
+        return getattr(self._response, name)
+
+    def iter_content(self, chunk_size=1):
+        return self._response.iter_bytes(chunk_size)
+
+    def json(self):
+        return self._response.json()
+
+
+class HTTP2Session:
+    """Stand-in for a ``requests.Session`` sending the requests over HTTP/2.
+
+    Concurrent requests to a server are multiplexed over one connection
+    instead of using one socket each. The protocol is negotiated with the
+    server, so servers without HTTP/2 (and plain ``http://`` URLs) are talked
+    to in HTTP/1.1. The ``httpx`` transport errors are raised as their
+    ``requests`` counterparts, so retries and deadlines work the same way.
+
+    Parameters
+    ----------
+    pool_maxsize : int
+        Maximum number of connections per host.
+    max_retries : int
+        Number of connection level retries done by the transport.
+    idle_timeout : float, optional
+        Seconds after which idle connections are closed.
+    """
+
+    def __init__(self, pool_maxsize=10, max_retries=0, idle_timeout=None):
+        self.pool_maxsize = pool_maxsize
+        self.max_retries = max_retries
+        self.idle_timeout = idle_timeout
+        # one client per certificate verification setting
+        self._clients = {}
+        self._lock = threading.Lock()
+
+    def _client(self, verify):
+        with self._lock:
+            client = self._clients.get(verify)
+            if client is None:
+                transport = httpx.HTTPTransport(
+                    http2=True,
+                    verify=verify,
+                    retries=self.max_retries,
+                    limits=httpx.Limits(
+                        max_connections=self.pool_maxsize,
+                        max_keepalive_connections=self.pool_maxsize,
+                        keepalive_expiry=self.idle_timeout,
+                    ),
+                )
+                client = httpx.Client(transport=transport, timeout=None)
+                self._clients[verify] = client
+            return client
+
+    def request(
+        self,
+        method,
+        url,
+        headers=None,
+        verify=True,
+        data=None,
+        files=None,
+        stream=False,
+        timeout=None,
+    ):
+        """Send a request, with the arguments of ``requests.Session.request``."""
+        client = self._client(verify)
+        options = {}
+        if timeout is not None:
+            options["timeout"] = httpx_timeout(timeout)
+        request = client.build_request(
+            method, url, headers=headers, content=data, files=files, **options
+        )
+        try:
+            return HTTP2Response(client.send(request, stream=stream))
+        except httpx.ConnectTimeout as err:
+            raise requests.exceptions.ConnectTimeout(str(err)) from err
+        except httpx.TimeoutException as err:
+            raise requests.exceptions.ReadTimeout(str(err)) from err
+        except (httpx.NetworkError, httpx.RemoteProtocolError) as err:
+            raise requests.exceptions.ConnectionError(str(err)) from err
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+    def put(self, url, **kwargs):
+        return self.request("PUT", url, **kwargs)
+
+    def delete(self, url, **kwargs):
+        return self.request("DELETE", url, **kwargs)
+
+    def close(self):
+        """Close the connections, new ones are opened by the next request."""
+        with self._lock:
+            clients = list(self._clients.values())
+            self._clients = {}
+        for client in clients:
+            client.close()
@@ -0,0 +1,181 @@
+"""loadBalancer.py"""
+import itertools
+import random
+import threading
+import time
+
+from .connectionConfig import ConnectionConfig
+
+
+class ServerNode:
+    """A TerminusDB server of a :class:`LoadBalancer` and its statistics.
+
+    Parameters
+    ----------
+    server_url : str
+        URL of the server.
+    """
+
+    def __init__(self, server_url):
+        config = ConnectionConfig(server_url)
+        self.server = config.server
+        self.api = config.api
+        self.healthy = True
+        # requests sent to the node and not answered yet
+        self.outstanding = 0
+        # exponentially weighted moving average of the latency, in seconds
+        self.latency = None
+        self.requests = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+
+    def __repr__(self):
+        state = "up" if self.healthy else "down"
+        return f"ServerNode({self.server!r}, {state})"
+
+
+class RoundRobinPolicy:
+    """Send the requests to the nodes in turn."""
+
+    def __init__(self):
+        self._counter = itertools.count()
+
+    def choose(self, nodes):
+        return nodes[next(self._counter) % len(nodes)]
+
+
+class LeastOutstandingPolicy:
+    """Send the requests to the node with the fewest requests in flight."""
+
+    def choose(self, nodes):
+        fewest = min(node.outstanding for node in nodes)
+        return random.choice([node for node in nodes if node.outstanding == fewest])
+
+
+class EWMAPolicy:
+    """Send the requests to the node with the lowest expected latency.
+
+    The latency of a node is its average latency, weighted towards the recent
+    requests, times its number of requests in flight plus one. Nodes that have
+    not answered yet are tried first."""
+
+    def choose(self, nodes):
+        unmeasured = [node for node in nodes if node.latency is None]
+        if unmeasured:
+            return random.choice(unmeasured)
+        return min(nodes, key=lambda node: node.latency * (node.outstanding + 1))
+
+
+POLICIES = {
+    "round_robin": RoundRobinPolicy,
+    "least_outstanding": LeastOutstandingPolicy,
+    "ewma": EWMAPolicy,
+}
+
+
+class LoadBalancer:
+    """Spreads read requests across servers and keeps track of their health.
+
+    Writes go to the primary. Reads go to the healthy nodes chosen by the
+    policy, or to the primary if no node is healthy. A node is ejected after
+    ``max_failures`` consecutive failed requests and re-admitted by a
+    successful health check.
+
+    Parameters
+    ----------
+    server_urls : list of str
+        URLs of the servers.
+    primary : int or str
+        Index or URL of the primary server in ``server_urls``.
+    policy : str or object
+        ``"round_robin"``, ``"least_outstanding"``, ``"ewma"``, or an object
+        with a ``choose(nodes)`` method returning one of ``nodes``.
+    read_from_primary : bool
+        Whether the primary serves reads as well.
+    max_failures : int
+        Number of consecutive failures after which a node is ejected.
+    decay : float
+        Weight of the last request in the latency average, between 0 and 1.
+    """
+
+    def __init__(
+        self,
+        server_urls,
+        primary=0,
+        policy="round_robin",
+        read_from_primary=True,
+        max_failures=3,
+        decay=0.3,
+    ):
+        if not server_urls:
+            raise ValueError("At least one server URL is required")
+        self.nodes = [ServerNode(url) for url in server_urls]
+        if not isinstance(primary, int):
+            primary = [node.server for node in self.nodes].index(
+                ServerNode(primary).server
+            )
+        self.primary = self.nodes[primary]
+        if isinstance(policy, str):
+            policy = POLICIES[policy]()
+        self.policy = policy
+        self.read_from_primary = read_from_primary
+        self.max_failures = max_failures
+        self.decay = decay
+        self._lock = threading.Lock()
+
+    def readers(self):
+        """The nodes serving reads."""
+        return [
+            node
+            for node in self.nodes
+            if self.read_from_primary or node is not self.primary
+        ] or [self.primary]
+
+    def choose(self, read):
+        """The node a request is sent to.
+
+        Parameters
+        ----------
+        read : bool
+            Whether the request is a read that any node can serve.
+
+        Returns
+        -------
+        ServerNode
+        """
+        if not read:
+            return self.primary
+        with self._lock:
+            healthy = [node for node in self.readers() if node.healthy]
+            return self.policy.choose(healthy) if healthy else self.primary
+
+    def started(self, node):
+        """Record that a request is sent to ``node``, returns its start time."""
+        with self._lock:
+            node.outstanding += 1
+            node.requests += 1
+        return time.monotonic()
+
+    def finished(self, node, started, failed=False):
+        """Record the outcome of a request sent to ``node`` at ``started``."""
+        latency = time.monotonic() - started
+        with self._lock:
+            node.outstanding -= 1
+            if failed:
+                node.failures += 1
+                node.consecutive_failures += 1
+                if node.consecutive_failures >= self.max_failures:
+                    node.healthy = False
+                return
+            node.consecutive_failures = 0
+            if node.latency is None:
+                node.latency = latency
+            else:
+                node.latency += self.decay * (latency - node.latency)
+
+    def mark(self, node, healthy):
+        """Set the health of ``node`` after a health check."""
+        with self._lock:
+            node.healthy = healthy
+            if healthy:
+                node.consecutive_failures = 0
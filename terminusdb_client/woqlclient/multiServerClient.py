@@ -0,0 +1,170 @@
+"""multiServerClient.py"""
+import threading
+
+import requests
+
+from .api_endpoint_const import APIEndpointConst
+from .errors import APIError
+from .loadBalancer import LoadBalancer
+from .woqlClient import WOQLClient
+
+
+class MultiServerWOQLClient(WOQLClient):
+    """Client for a TerminusDB primary server and its read replicas.
+
+    It has the same interface as :class:`WOQLClient`. Read-only queries and the
+    other read actions (triples, CSV and class frame downloads) are spread
+    across the healthy servers according to a load balancing policy, while
+    update queries, revision control actions (branch, push, pull, rebase...)
+    and :meth:`connect` go to the primary.
+
+    A server is ejected after consecutive failed requests (transport errors
+    and 5xx responses) and re-admitted when a health check, a request to its
+    ``connect`` endpoint, succeeds. Health checks are run by
+    :meth:`check_health`, or periodically after :meth:`start_health_checks`.
+
+    Examples
+    --------
+    >>> client = MultiServerWOQLClient(
+    ...     ["https://db1:6363", "https://db2:6363", "https://db3:6363"],
+    ...     policy="ewma",
+    ... )
+    >>> client.connect(user="admin", account="admin", key="root", db="mydb")
+    >>> client.start_health_checks(interval=10)
+    """
+
+    # actions that any replica can serve when their request is idempotent
+    READ_ACTIONS = (
+        APIEndpointConst.WOQL_QUERY,
+        APIEndpointConst.GET_TRIPLES,
+        APIEndpointConst.GET_CSV,
+        APIEndpointConst.CLASS_FRAME,
+    )
+
+    def __init__(self, server_urls, primary=0, policy="round_robin", **kwargs):
+        r"""The MultiServerWOQLClient constructor.
+
+        Parameters
+        ----------
+        server_urls : list of str
+            URLs of the servers.
+        primary : int or str
+            Index or URL of the primary server in ``server_urls``.
+        policy : str or object
+            ``"round_robin"``, ``"least_outstanding"`` or ``"ewma"`` (latency
+            weighted), or an object with a ``choose(nodes)`` method, see
+            :class:`LoadBalancer`.
+        \**kwargs
+            Same configuration options as :class:`WOQLClient`.
+            ``read_from_primary`` (default ``True``) sets whether the primary
+            serves reads too, ``max_failures`` (default ``3``) is the number of
+            consecutive failures after which a server is ejected and
+            ``health_check_timeout`` (default ``5``) the timeout of the health
+            checks, in seconds.
+        """
+        self.balancer = LoadBalancer(
+            server_urls,
+            primary=primary,
+            policy=policy,
+            read_from_primary=kwargs.get("read_from_primary", True),
+            max_failures=kwargs.get("max_failures", 3),
+        )
+        super().__init__(self.balancer.primary.server, **kwargs)
+        self.health_check_timeout = kwargs.get("health_check_timeout", 5)
+        self._health_checks = None
+
+    def check_health(self):
+        """Probe every server, ejecting the failing ones and re-admitting the rest.
+
+        Returns
+        -------
+        dict
+            Whether each server is healthy, by server URL.
+        """
+        results = {}
+        for node in self.balancer.nodes:
+            try:
+                super()._send_request(
+                    APIEndpointConst.CONNECT,
+                    node.api,
+                    {},
+                    None,
+                    False,
+                    True,
+                    self.health_check_timeout,
+                )
+                healthy = True
+            except Exception:
+                healthy = False
+            self.balancer.mark(node, healthy)
+            results[node.server] = healthy
+        return results
+
+    def start_health_checks(self, interval=10.0):
+        """Run :meth:`check_health` every ``interval`` seconds in the background.
+
+        The checks are stopped by :meth:`stop_health_checks` or :meth:`close`."""
+        self.stop_health_checks()
+        stopped = threading.Event()
+
+        def run():
+            while not stopped.wait(interval):
+                self.check_health()
+
+        thread = threading.Thread(target=run, name="terminusdb-health", daemon=True)
+        self._health_checks = (thread, stopped)
+        thread.start()
+
+    def stop_health_checks(self):
+        """Stop the background health checks."""
+        if self._health_checks is not None:
+            thread, stopped = self._health_checks
+            stopped.set()
+            thread.join()
+            self._health_checks = None
+
+    def copy(self):
+        """Create a copy of this client, see :meth:`WOQLClient.copy`.
+
+        The copy shares the load balancer, and so the health of the servers,
+        but not the background health checks: only the client that started
+        them stops them."""
+        clone = super().copy()
+        clone._health_checks = None
+        return clone
+
+    def close(self):
+        """Stop the health checks started by this client and close the pooled
+        connections."""
+        self.stop_health_checks()
+        super().close()
+
+    def _send_request(
+        self, action, url, payload, file_dict, stream, idempotent, timeout
+    ):
+        """Send one attempt of a request to the server chosen by the balancer."""
+        primary_api = self.conConfig.api
+        read = (
+            idempotent and action in self.READ_ACTIONS and url.startswith(primary_api)
+        )
+        node = self.balancer.choose(read)
+        if node.api != primary_api and url.startswith(primary_api):
+            url = node.api + url[len(primary_api) :]
+        started = self.balancer.started(node)
+        failed = False
+        try:
+            return super()._send_request(
+                action, url, payload, file_dict, stream, idempotent, timeout
+            )
+        except Exception as err:
+            failed = self._is_server_failure(err)
+            raise
+        finally:
+            self.balancer.finished(node, started, failed)
+
+    @staticmethod
+    def _is_server_failure(error):
+        """Whether ``error`` is a failure of the server rather than of the request."""
+        if isinstance(error, APIError):
+            return error.status_code is not None and error.status_code >= 500
+        return isinstance(error, requests.exceptions.RequestException)
@@ -0,0 +1,169 @@
+"""queryCache.py"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+import terminusdb_client.json_backend as json_backend
+
+
+class QueryCache:
+    """LRU cache of the results of read-only WOQL queries, with a time to live.
+
+    A result is cached under the query URL, which holds the database, the
+    repository and the branch or commit it ran against, the credentials it was
+    sent with, so clients connected as different users never share results,
+    and the canonical JSON of the request payload. A client using the cache
+    drops the entries of a repository whenever it commits to one of its
+    branches (update queries, triples and CSV uploads, rebase, reset,
+    squash...) and the entries of a database when it creates or deletes it. Commits made by other clients, or
+    queries reading other databases with ``using``, are only seen once the
+    entries expire after ``ttl`` seconds.
+
+    The results are kept serialized, so callers are free to modify what they
+    get, and the cache can be shared by several clients and threads.
+
+    Parameters
+    ----------
+    max_entries : int
+        Maximum number of cached results, the least recently used are evicted
+        first.
+    max_bytes : int, optional
+        Maximum total size of the cached results, in bytes of JSON. Results
+        bigger than this are not cached. ``None`` for no limit.
+    ttl : float, optional
+        Seconds after which a cached result expires, ``None`` to keep results
+        until they are evicted or invalidated.
+
+    Examples
+    --------
+    >>> client = WOQLClient(
+    ...     "https://127.0.0.1:6363/", query_cache=QueryCache(ttl=30)
+    ... )
+    >>> client.query_cache.stats()["hits"]
+    0
+    """
+
+    def __init__(self, max_entries=256, max_bytes=64 * 1024 * 1024, ttl=60.0):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        # key => (url, serialized result, expiry time)
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.reset_stats()
+
+    def reset_stats(self):
+        """Set the counters back to zero."""
+        with self._lock:
+            # lookups answered from the cache
+            self.hits = 0
+            # lookups sent to the server
+            self.misses = 0
+            # entries dropped to respect the size limits
+            self.evictions = 0
+            # entries dropped because their branch or database changed
+            self.invalidations = 0
+
+    def stats(self):
+        """The counters and the current size of the cache.
+
+        Returns
+        -------
+        dict
+        """
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+            }
+
+    @staticmethod
+    def key(url, payload, credentials=None):
+        """Key of the query sent to ``url`` with ``payload``.
+
+        Parameters
+        ----------
+        url : str
+            Query URL.
+        payload : dict
+            Request payload.
+        credentials : optional
+            JSON serializable credentials the query is sent with, only a
+            digest of them is kept.
+        """
+        identity = hashlib.sha256(
+            json_backend.dumps(credentials, sort_keys=True).encode("utf-8")
+        ).hexdigest()
+        return url, identity, json_backend.dumps(payload, sort_keys=True)
+
+    def get(self, key):
+        """The cached result of ``key``, ``None`` if it is not cached."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[2] is not None:
+                if entry[2] <= time.monotonic():
+                    self._remove(key)
+                    entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        return json_backend.loads(entry[1])
+
+    def put(self, key, result):
+        """Cache ``result`` under ``key``, evicting old entries if needed."""
+        data = json_backend.dumps_bytes(result)
+        if self.max_bytes is not None and len(data) > self.max_bytes:
+            return
+        expiry = None if self.ttl is None else time.monotonic() + self.ttl
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (key[0], data, expiry)
+            self._bytes += len(data)
+            while len(self._entries) > self.max_entries or (
+                self.max_bytes is not None and self._bytes > self.max_bytes
+            ):
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def invalidate(self, url_prefix=None):
+        """Drop the results of the queries sent below ``url_prefix``.
+
+        Parameters
+        ----------
+        url_prefix : str, optional
+            A query URL, or the beginning of one ending at a path segment,
+            like the URL of a repository. ``None`` drops every entry.
+
+        Returns
+        -------
+        int
+            Number of entries dropped.
+        """
+        with self._lock:
+            stale = [
+                key
+                for key, (url, _, _) in self._entries.items()
+                if url_prefix is None
+                or url == url_prefix
+                or url.startswith(url_prefix + "/")
+            ]
+            for key in stale:
+                self._remove(key)
+            self.invalidations += len(stale)
+        return len(stale)
+
+    def clear(self):
+        """Drop every entry."""
+        self.invalidate()
+
+    def _remove(self, key):
+        self._bytes -= len(self._entries.pop(key)[1])
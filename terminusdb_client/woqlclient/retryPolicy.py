@@ -0,0 +1,182 @@
+"""retryPolicy.py"""
+import asyncio
+import random
+import threading
+import time
+
+import requests
+
+from .errors import APIError
+
+
+class RetryPolicy:
+    """Retry of the requests that failed with a transient error.
+
+    A failed request is retried after an exponential backoff with full jitter:
+    the n-th retry waits a random time between 0 and
+    ``backoff_factor * 2 ** (n - 1)`` seconds, capped at ``max_backoff``. Only
+    idempotent requests are retried unless ``idempotent_only`` is ``False``.
+
+    The counters :attr:`retries`, :attr:`retried_requests` and
+    :attr:`failed_requests` are shared by all the requests using the policy.
+
+    Parameters
+    ----------
+    max_retries : int
+        Maximum number of retries of a request.
+    backoff_factor : float
+        Base delay of the exponential backoff, in seconds.
+    max_backoff : float
+        Maximum delay between two attempts, in seconds.
+    max_total_time : float, optional
+        No retry is started once this many seconds have elapsed since the first
+        attempt. ``None`` for no limit.
+    retry_statuses : tuple of int
+        HTTP statuses of the :class:`APIError` that are retried.
+    idempotent_only : bool
+        If ``False``, non-idempotent requests (such as update queries) are
+        retried too.
+    retry_errors : tuple of exception classes
+        Transport errors that are retried.
+
+    Examples
+    --------
+    >>> client = WOQLClient(
+    ...     "https://127.0.0.1:6363/", retry_policy=RetryPolicy(max_retries=5)
+    ... )
+    >>> client.retry_policy.retries
+    0
+    """
+
+    RETRY_ERRORS = (
+        requests.exceptions.ConnectionError,
+        requests.exceptions.ChunkedEncodingError,
+    )
+
+    def __init__(
+        self,
+        max_retries=3,
+        backoff_factor=0.5,
+        max_backoff=10.0,
+        max_total_time=30.0,
+        retry_statuses=(502, 503, 504),
+        idempotent_only=True,
+        retry_errors=RETRY_ERRORS,
+    ):
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.max_backoff = max_backoff
+        self.max_total_time = max_total_time
+        self.retry_statuses = tuple(retry_statuses)
+        self.idempotent_only = idempotent_only
+        self.retry_errors = tuple(retry_errors)
+        self._lock = threading.Lock()
+        self.reset_stats()
+
+    def reset_stats(self):
+        """Set the retry counters back to zero."""
+        with self._lock:
+            # number of retries taken
+            self.retries = 0
+            # number of requests retried at least once
+            self.retried_requests = 0
+            # number of retried requests that failed in the end
+            self.failed_requests = 0
+
+    def stats(self):
+        """The retry counters.
+
+        Returns
+        -------
+        dict
+        """
+        with self._lock:
+            return {
+                "retries": self.retries,
+                "retried_requests": self.retried_requests,
+                "failed_requests": self.failed_requests,
+            }
+
+    def is_retryable(self, error, retry_errors=()):
+        """Whether ``error`` is a transient failure worth retrying."""
+        if isinstance(error, APIError):
+            return error.status_code in self.retry_statuses
+        return isinstance(error, self.retry_errors + tuple(retry_errors))
+
+    def backoff(self, retry):
+        """Random delay, in seconds, before the retry number ``retry``."""
+        ceiling = min(self.max_backoff, self.backoff_factor * 2 ** (retry - 1))
+        return random.uniform(0, ceiling)
+
+    def call(self, send, idempotent=False, deadline=None):
+        """Call ``send`` until it succeeds or the policy gives up.
+
+        Parameters
+        ----------
+        send : callable
+            Sends the request and returns its result.
+        idempotent : bool
+            Whether the request can safely be sent more than once.
+        deadline : Deadline, optional
+            No retry is started if it would wait past the deadline.
+
+        Returns
+        -------
+        The result of ``send``.
+        """
+        if not self._retries_allowed(idempotent):
+            return send()
+        started = time.monotonic()
+        retry = 0
+        while True:
+            try:
+                return send()
+            except Exception as error:
+                retry += 1
+                delay = self._next_delay(error, retry, started, deadline)
+                if delay is None:
+                    raise
+            time.sleep(delay)
+
+    async def acall(self, send, idempotent=False, deadline=None, retry_errors=()):
+        """Asynchronous version of :meth:`call`, ``send`` returns an awaitable.
+
+        ``retry_errors`` are additional transport errors to retry."""
+        if not self._retries_allowed(idempotent):
+            return await send()
+        started = time.monotonic()
+        retry = 0
+        while True:
+            try:
+                return await send()
+            except Exception as error:
+                retry += 1
+                delay = self._next_delay(error, retry, started, deadline, retry_errors)
+                if delay is None:
+                    raise
+            await asyncio.sleep(delay)
+
+    def _retries_allowed(self, idempotent):
+        return self.max_retries > 0 and (idempotent or not self.idempotent_only)
+
+    def _next_delay(self, error, retry, started, deadline=None, retry_errors=()):
+        """Delay before the retry number ``retry``, or ``None`` to give up."""
+        if not self.is_retryable(error, retry_errors):
+            delay = None
+        elif retry > self.max_retries:
+            delay = None
+        else:
+            delay = self.backoff(retry)
+            if (
+                self.max_total_time is not None
+                and time.monotonic() - started + delay > self.max_total_time
+            ) or (deadline is not None and delay >= deadline.remaining()):
+                delay = None
+        with self._lock:
+            if delay is not None:
+                self.retries += 1
+                if retry == 1:
+                    self.retried_requests += 1
+            elif retry > 1:
+                self.failed_requests += 1
+        return delay
@@ -0,0 +1,146 @@
+"""schemaCache.py"""
+import threading
+import time
+from collections import OrderedDict
+
+import terminusdb_client.json_backend as json_backend
+
+
+class SchemaCache:
+    """Cache of schema lookups, revalidated against the head commit of a branch.
+
+    Class frames and the results of schema queries (like ``WOQLLib().classes()``
+    or ``WOQLLib().property()``) are kept with the id of the head commit of
+    the branch they were read from. A client using the cache asks the server
+    for the current head, a small query on the commit graph, and downloads a
+    lookup again only if the head has moved since it was cached. The head
+    found is trusted for ``revalidate_after`` seconds, so the lookups made
+    together (to render a page, say) share a single check. Commits made by the
+    client itself are noticed at once.
+
+    Lookups against a commit (a client with a ``ref``) never need a check, as
+    commits do not change.
+
+    Parameters
+    ----------
+    max_entries : int
+        Maximum number of cached lookups, the least recently used are evicted
+        first.
+    revalidate_after : float
+        Seconds during which the head commit of a branch is not checked again.
+        ``0`` checks it on every lookup.
+
+    Examples
+    --------
+    >>> client = WOQLClient("https://127.0.0.1:6363/", schema_cache=SchemaCache())
+    >>> client.connect(user="admin", account="admin", key="root", db="mydb")
+    >>> client.get_class_frame("scm:Person")
+    >>> client.schema_query(WOQLLib().classes())
+    >>> client.schema_cache.stats()["revalidations"]
+    1
+    """
+
+    def __init__(self, max_entries=128, revalidate_after=1.0):
+        self.max_entries = max_entries
+        self.revalidate_after = revalidate_after
+        # (branch url, lookup key) => (head commit id, serialized value)
+        self._entries = OrderedDict()
+        # branch url => (head commit id, time it was checked)
+        self._heads = {}
+        self._lock = threading.Lock()
+        self.reset_stats()
+
+    def reset_stats(self):
+        """Set the counters back to zero."""
+        with self._lock:
+            # lookups answered from the cache
+            self.hits = 0
+            # lookups downloaded from the server
+            self.misses = 0
+            # head commits requested from the server
+            self.revalidations = 0
+
+    def stats(self):
+        """The counters and the number of cached lookups.
+
+        Returns
+        -------
+        dict
+        """
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "revalidations": self.revalidations,
+                "entries": len(self._entries),
+            }
+
+    def head(self, url):
+        """The head commit id of the branch at ``url`` if it was checked recently.
+
+        Returns ``None`` when the head needs to be checked again. The commit id
+        of a branch without commits is ``""``."""
+        with self._lock:
+            checked = self._heads.get(url)
+            if checked is None:
+                return None
+            head, checked_at = checked
+            if time.monotonic() - checked_at >= self.revalidate_after:
+                return None
+            return head
+
+    def set_head(self, url, head):
+        """Record ``head`` as the head commit id of the branch at ``url``."""
+        with self._lock:
+            self.revalidations += 1
+            self._heads[url] = (head, time.monotonic())
+
+    def get(self, url, key, head):
+        """The value of the lookup ``key`` cached at the commit ``head``.
+
+        Returns ``None`` if it is not cached, or was cached at another commit.
+        """
+        with self._lock:
+            entry = self._entries.get((url, key))
+            if entry is None or entry[0] != head:
+                self.misses += 1
+                return None
+            self._entries.move_to_end((url, key))
+            self.hits += 1
+        return json_backend.loads(entry[1])
+
+    def put(self, url, key, head, value):
+        """Cache ``value`` as the result of the lookup ``key`` at ``head``."""
+        data = json_backend.dumps_bytes(value)
+        with self._lock:
+            self._entries.pop((url, key), None)
+            self._entries[(url, key)] = (head, data)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, url_prefix=None):
+        """Forget the heads of the branches below ``url_prefix``.
+
+        Their next lookup checks the head commit again, the values cached at
+        the previous head are only downloaded again if it has moved.
+
+        Parameters
+        ----------
+        url_prefix : str, optional
+            A branch URL, or the beginning of one ending at a path segment,
+            like the URL of a repository. ``None`` forgets every head.
+        """
+        with self._lock:
+            for url in list(self._heads):
+                if (
+                    url_prefix is None
+                    or url == url_prefix
+                    or url.startswith(url_prefix + "/")
+                ):
+                    del self._heads[url]
+
+    def clear(self):
+        """Drop every cached lookup and head."""
+        with self._lock:
+            self._entries.clear()
+            self._heads.clear()
@@ -0,0 +1,145 @@
+"""streamingDownload.py"""
+import codecs
+import io
+import os
+import re
+
+import terminusdb_client.json_backend as json_backend
+
+# characters and complete escape sequences of a JSON string
+_JSON_STRING_PART = re.compile(r'(?:[^"\\]+|\\u[0-9a-fA-F]{4}|\\["\\/bfnrt])*')
+# escaped high surrogate, to be decoded with the low surrogate that follows
+_HIGH_SURROGATE = re.compile(r"\\u[dD][89abAB][0-9a-fA-F]{2}$")
+
+
+class JSONStringDecoder:
+    """Incremental decoder of a response body made of a single JSON string.
+
+    The body is fed as UTF-8 chunks of any size, the decoded text is returned
+    as soon as it is complete, so the string is never held in memory whole.
+    """
+
+    def __init__(self):
+        self._utf8 = codecs.getincrementaldecoder("utf-8")()
+        self._buffer = ""
+        self._started = False
+        self._ended = False
+
+    def decode(self, chunk, final=False):
+        """Decode the next ``chunk`` of the body.
+
+        Parameters
+        ----------
+        chunk : bytes
+            Next part of the body.
+        final : bool
+            Whether ``chunk`` is the last part of the body.
+
+        Returns
+        -------
+        str
+            The text decoded from the body so far and not returned yet.
+
+        Raises
+        ------
+        ValueError
+            If the body is not a JSON string.
+        """
+        self._buffer += self._utf8.decode(chunk, final)
+        if not self._started:
+            self._buffer = self._buffer.lstrip()
+            if self._buffer:
+                if self._buffer[0] != '"':
+                    raise ValueError("The response is not a JSON string")
+                self._buffer = self._buffer[1:]
+                self._started = True
+        text = ""
+        if self._started and not self._ended:
+            part = _JSON_STRING_PART.match(self._buffer).group()
+            rest = self._buffer[len(part) :]
+            if rest.startswith('"'):
+                self._ended = True
+                rest = rest[1:]
+            else:
+                surrogate = _HIGH_SURROGATE.search(part)
+                if surrogate is not None:
+                    part, rest = part[: surrogate.start()], part[surrogate.start() :]
+                    rest += self._buffer[len(part) + len(rest) :]
+            self._buffer = rest
+            if part:
+                text = json_backend.loads(f'"{part}"')
+        if self._ended and self._buffer.strip():
+            raise ValueError("Extra data after the JSON string")
+        if final and not self._ended:
+            raise ValueError("Unterminated JSON string")
+        return text
+
+
+class Download:
+    """Writes a response body to a file while it is received.
+
+    Use as a context manager, calling :meth:`write` with each chunk of the
+    body then :meth:`finish`.
+
+    Parameters
+    ----------
+    dest : str, os.PathLike or file object
+        Path of the file to write, or a file object opened in binary or text
+        mode. A path is opened in binary mode and closed at the end.
+    total : int, optional
+        Expected size of the body, in bytes.
+    progress : callable, optional
+        Called as ``progress(received, total)`` after each chunk.
+    json_string : bool
+        If ``True``, the body is a JSON string and its decoded text is written.
+    """
+
+    def __init__(self, dest, total=None, progress=None, json_string=False):
+        self._close = isinstance(dest, (str, os.PathLike))
+        self._stream = open(dest, "wb") if self._close else dest
+        self._text = isinstance(self._stream, io.TextIOBase)
+        if json_string:
+            self._decoder = JSONStringDecoder()
+        elif self._text:
+            self._decoder = codecs.getincrementaldecoder("utf-8")()
+        else:
+            self._decoder = None
+        self.total = total
+        self.progress = progress
+        self.received = 0
+
+    @staticmethod
+    def expected_size(headers):
+        """Size of a body from its response ``headers``, ``None`` if unknown.
+
+        Compressed bodies are decoded while they are received, so their length
+        on the wire says nothing about the size of the data."""
+        if headers.get("content-encoding", "identity") != "identity":
+            return None
+        length = headers.get("content-length")
+        return int(length) if length else None
+
+    def write(self, chunk, final=False):
+        """Write the next ``chunk`` (bytes) of the body."""
+        self.received += len(chunk)
+        data = chunk
+        if self._decoder is not None:
+            data = self._decoder.decode(chunk, final)
+        if data:
+            if not self._text and isinstance(data, str):
+                data = data.encode("utf-8")
+            self._stream.write(data)
+        if chunk and self.progress is not None:
+            self.progress(self.received, self.total)
+
+    def finish(self):
+        """Check that the whole body was received and flush the file."""
+        self.write(b"", final=True)
+        self._stream.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if self._close:
+            self._stream.close()
@@ -0,0 +1,185 @@
+"""streamingUpload.py"""
+import asyncio
+import codecs
+import os
+import uuid
+
+import terminusdb_client.json_backend as json_backend
+
+# bytes read at a time from the files to upload
+UPLOAD_CHUNK_SIZE = 64 * 1024
+
+
+def is_stream_source(source):
+    """Whether ``source`` is a path, a file object or an iterable of chunks.
+
+    Strings and bytes are not, they are the content to upload itself."""
+    if isinstance(source, (str, bytes, dict)):
+        return False
+    return (
+        isinstance(source, os.PathLike)
+        or hasattr(source, "read")
+        or hasattr(source, "__iter__")
+    )
+
+
+def iter_chunks(source, chunk_size=UPLOAD_CHUNK_SIZE):
+    """Iterate over the content of ``source`` as bytes, ``chunk_size`` at a time.
+
+    Parameters
+    ----------
+    source : str, os.PathLike, file object or iterable
+        Path of a file, which is opened now and closed once read, a file object
+        opened in binary or text mode, or an iterable of ``bytes`` or ``str``
+        chunks.
+    chunk_size : int
+        Number of bytes or characters read at a time from the files.
+
+    Returns
+    -------
+    generator of bytes
+    """
+    if isinstance(source, (str, os.PathLike)):
+        return _read_chunks(open(source, "rb"), chunk_size, close=True)
+    if hasattr(source, "read"):
+        return _read_chunks(source, chunk_size)
+    return (_as_bytes(chunk) for chunk in source)
+
+
+def rewind_source(source):
+    """Prepare ``source`` to be read again from the start.
+
+    Returns ``False`` if it cannot be, i.e. it is an iterable of chunks or a
+    file object that is not seekable."""
+    if isinstance(source, (str, os.PathLike)):
+        return True
+    if hasattr(source, "seekable") and source.seekable():
+        source.seek(0)
+        return True
+    return False
+
+
+def _read_chunks(stream, chunk_size, close=False):
+    try:
+        while True:
+            chunk = stream.read(chunk_size)
+            if not chunk:
+                break
+            yield _as_bytes(chunk)
+    finally:
+        if close:
+            stream.close()
+
+
+def _as_bytes(chunk):
+    return chunk.encode("utf-8") if isinstance(chunk, str) else chunk
+
+
+def _json_string_chunks(chunks):
+    """Encode the UTF-8 text of ``chunks`` as the content of a JSON string."""
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    for chunk in chunks:
+        text = decoder.decode(chunk)
+        if text:
+            yield json_backend.dumps_bytes(text)[1:-1]
+    text = decoder.decode(b"", final=True)
+    if text:
+        yield json_backend.dumps_bytes(text)[1:-1]
+
+
+class StreamingBody:
+    """Request body generated while it is sent, with chunked transfer encoding.
+
+    The whole body is never held in memory, so memory use does not grow with
+    the size of the upload. It can only be sent once.
+
+    Parameters
+    ----------
+    chunks : iterable of bytes
+        The body.
+    content_type : str
+        Value of the ``content-type`` header of the request.
+    """
+
+    def __init__(self, chunks, content_type):
+        self.chunks = chunks
+        self.content_type = content_type
+
+    def __iter__(self):
+        return iter(self.chunks)
+
+    async def async_chunks(self):
+        """Asynchronous iterator over the body, reading the chunks in a thread."""
+        loop = asyncio.get_running_loop()
+        chunks = iter(self.chunks)
+        done = object()
+        while True:
+            chunk = await loop.run_in_executor(None, next, chunks, done)
+            if chunk is done:
+                break
+            yield chunk
+
+    @classmethod
+    def json(cls, payload, key, chunks):
+        """JSON object ``payload`` with the string ``key`` read from ``chunks``.
+
+        Parameters
+        ----------
+        payload : dict
+            Members of the object other than ``key``.
+        key : str
+            Name of the string member.
+        chunks : iterable of bytes
+            UTF-8 encoded value of the string member.
+
+        Returns
+        -------
+        StreamingBody
+        """
+
+        def generate():
+            head = json_backend.dumps_bytes(payload)[:-1]
+            if payload:
+                head += b", "
+            yield head + json_backend.dumps_bytes(key) + b': "'
+            yield from _json_string_chunks(chunks)
+            yield b'"}'
+
+        return cls(generate(), "application/json")
+
+    @classmethod
+    def multipart(cls, payload, files):
+        """Multipart form with ``files`` followed by the JSON ``payload`` part.
+
+        Parameters
+        ----------
+        payload : dict
+            Sent as the ``payload`` part, as for multipart ``file_dict`` requests.
+        files : dict
+            Dict of part name => ``(filename, chunks, content_type)``.
+
+        Returns
+        -------
+        StreamingBody
+        """
+        boundary = uuid.uuid4().hex
+        parts = dict(files)
+        parts["payload"] = (
+            "payload",
+            [json_backend.dumps_bytes(payload)],
+            "application/json",
+        )
+
+        def generate():
+            for name, (filename, chunks, content_type) in parts.items():
+                yield (
+                    f"--{boundary}\r\n"
+                    f'Content-Disposition: form-data; name="{name}"; '
+                    f'filename="{filename}"\r\n'
+                    f"Content-Type: {content_type}\r\n\r\n"
+                ).encode("utf-8")
+                yield from chunks
+                yield b"\r\n"
+            yield f"--{boundary}--\r\n".encode("utf-8")
+
+        return cls(generate(), f"multipart/form-data; boundary={boundary}")
@@ -1,15 +1,27 @@
 """woqlClient.py"""
 import copy
-import json
 import os
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
+
+import requests
+import terminusdb_client.json_backend as json_backend
+import terminusdb_client.woql_utils as utils
 
 from ..__version__ import __version__
 from .api_endpoint_const import APIEndpointConst
+from .bulkLoad import BulkLoadProgress, iter_turtle_chunks
 from .connectionCapabilities import ConnectionCapabilities
 
 # from .errorMessage import *
 from .connectionConfig import ConnectionConfig
-from .dispatchRequest import DispatchRequest
+from .deadline import Deadline
+from .dispatchRequest import ConnectionPool, DispatchRequest, _check_compression
+from .errors import DeadlineExceededError
+from .queryCache import QueryCache
+from .streamingDownload import Download
+from .streamingUpload import StreamingBody, is_stream_source, iter_chunks, rewind_source
 
 # from .errors import (InvalidURIError)
 # from .errors import doc, opts
@@ -18,9 +30,63 @@ from .dispatchRequest import DispatchRequest
 # license Apache Version 2
 # summary Python module for accessing the Terminus DB API
 
+# size of the chunks read from streamed responses
+STREAM_CHUNK_SIZE = 64 * 1024
+
+
+def _future_outcome(future):
+    """Result of a finished future, or the exception it raised."""
+    try:
+        return future.result()
+    except Exception as err:
+        return err
+
 
 class WOQLClient:
-    """Client for querying a TerminusDB server using WOQL queries."""
+    """Client for querying a TerminusDB server using WOQL queries.
+
+    Notes
+    -----
+    The requests of a client can be sent from several threads at once, but the
+    cursor (account, database, repository, branch and ref) is state of the
+    client: changing it with methods like :meth:`db` or :meth:`checkout` while
+    other threads use the client is a race. To share one client between
+    threads, connect it once and leave its cursor alone, and have each thread
+    target its resources with a view from :meth:`scoped`. The views share the
+    connection pool, the retry policy and the capabilities of the client, and
+    :meth:`connect` replaces the capabilities rather than changing them in
+    place, so readers never see a half-loaded register.
+
+    Examples
+    --------
+    >>> client = WOQLClient("http://localhost:6363")
+    >>> client.connect(user="admin", account="admin", key="root")
+    >>> def count(dbid):
+    ...     return client.scoped(db=dbid).query(WOQLQuery().star())
+    >>> results = ThreadPoolExecutor().map(count, ["db1", "db2", "db3"])
+    """
+
+    # the parts of the connection config that locate a resource on the server
+    CURSOR_FIELDS = ("account", "db", "repo", "branch", "ref")
+
+    # actions committing to the current branch, or changing its history
+    BRANCH_WRITE_ACTIONS = (
+        APIEndpointConst.UPDATE_CSV,
+        APIEndpointConst.INSERT_CSV,
+        APIEndpointConst.UPDATE_TRIPLES,
+        APIEndpointConst.INSERT_TRIPLES,
+        APIEndpointConst.CREATE_GRAPH,
+        APIEndpointConst.DELETE_GRAPH,
+        APIEndpointConst.PULL,
+        APIEndpointConst.REBASE,
+        APIEndpointConst.RESET,
+        APIEndpointConst.SQUASH,
+    )
+    # actions replacing the whole database
+    DATABASE_WRITE_ACTIONS = (
+        APIEndpointConst.CREATE_DATABASE,
+        APIEndpointConst.DELETE_DATABASE,
+    )
 
     def __init__(self, server_url, **kwargs):
         r"""The WOQLClient constructor.
@@ -32,10 +98,47 @@ class WOQLClient:
         \**kwargs
             Configuration options used to construct a :class:`ConnectionConfig` instance.
             Passing insecure=True will skip HTTPS certificate checking.
+            ``pool_connections``, ``pool_maxsize``, ``max_retries`` and
+            ``pool_idle_timeout`` tune the keep-alive connection pool shared by
+            all the requests of this client (see :class:`ConnectionPool`), and
+            ``http2=True`` sends them over multiplexed HTTP/2 connections.
+            ``compression_threshold`` (in bytes, default ``None`` to disable) and
+            ``compression`` (``"gzip"``, ``"deflate"`` or ``"zstd"``) control the
+            compression of large query and triples request bodies.
+            ``retry_policy`` is the :class:`RetryPolicy` used to retry requests
+            that failed with a transient error (default ``None``, the requests
+            are not retried, pass ``retry_policy=RetryPolicy()`` to retry them).
+            ``timeout`` is the default timeout of the requests in seconds, or a
+            ``(connect, read)`` tuple (default ``None``, wait forever).
+            ``query_cache`` is a :class:`QueryCache` keeping the results of the
+            read-only queries (default ``None``, no caching), it is shared with
+            the copies of the client. ``schema_cache`` is a :class:`SchemaCache`
+            for :meth:`get_class_frame` and :meth:`schema_query` (default
+            ``None``, no caching).
+
+        Raises
+        ------
+        ValueError
+            If ``compression`` is not a supported encoding, or is ``"zstd"``
+            and the ``zstandard`` package is not installed.
         """
         self.conConfig = ConnectionConfig(server_url, **kwargs)
         self.conCapabilities = ConnectionCapabilities()
         self.insecure = kwargs.get("insecure")
+        self.compression = kwargs.get("compression", "gzip")
+        _check_compression(self.compression)
+        self.compression_threshold = kwargs.get("compression_threshold")
+        self._connection_pool = ConnectionPool(
+            pool_connections=kwargs.get("pool_connections", 10),
+            pool_maxsize=kwargs.get("pool_maxsize", 10),
+            max_retries=kwargs.get("max_retries", 0),
+            idle_timeout=kwargs.get("pool_idle_timeout"),
+            http2=kwargs.get("http2", False),
+        )
+        self.retry_policy = kwargs.get("retry_policy")
+        self.timeout = kwargs.get("timeout")
+        self.query_cache = kwargs.get("query_cache")
+        self.schema_cache = kwargs.get("schema_cache")
 
     def connect(self, **kwargs):
         r"""Connect to a Terminus server at the given URI with an API key.
@@ -69,11 +172,63 @@ class WOQLClient:
             self.insecure = kwargs.get("insecure")
 
         json_obj = self.dispatch(APIEndpointConst.CONNECT, self.conConfig.api)
-        self.conCapabilities.set_capabilities(json_obj)
+        self._load_capabilities(json_obj)
         return json_obj
 
+    def _load_capabilities(self, json_obj):
+        """Replace the capabilities register with one loaded from ``json_obj``.
+
+        The register in use is never changed in place, so threads and views
+        that read it meanwhile see either the old or the new capabilities."""
+        capabilities = ConnectionCapabilities()
+        capabilities.set_capabilities(json_obj)
+        self.conCapabilities = capabilities
+
+    def scoped(self, **cursor):
+        r"""Create a view of this client pointing at another resource.
+
+        The view is a :meth:`copy` of this client with its connection config
+        updated with ``cursor``: it shares the connection pool, the retry policy
+        and the capabilities loaded by :meth:`connect`.
+        It is cheap to create, so a view can be made per thread or per call
+        instead of moving the cursor of a shared client.
+
+        Parameters
+        ----------
+        \**cursor
+            Any of ``account``, ``db``, ``repo``, ``branch`` and ``ref``.
+
+        Returns
+        -------
+        WOQLClient
+            The view.
+
+        Raises
+        ------
+        ValueError
+            If an argument is not a cursor field.
+
+        Examples
+        --------
+        >>> client = WOQLClient("http://localhost:6363")
+        >>> client.connect(user="admin", account="admin", key="root")
+        >>> client.scoped(db="mydb", branch="dev").query(WOQLQuery().star())
+        """
+        unknown = set(cursor) - set(self.CURSOR_FIELDS)
+        if unknown:
+            raise ValueError(f"Not a cursor field: {', '.join(sorted(unknown))}")
+        view = self.copy()
+        view.conConfig.update(**cursor)
+        return view
+
     def copy(self):
-        """Create a deep copy of this client.
+        """Create a copy of this client.
+
+        Only the cursor and the authentication (the connection config) are
+        duplicated, so copying is cheap: the copy shares the connection pool,
+        the retry policy and the capabilities of this client. The capabilities
+        are never changed in place, :meth:`connect` gives the client that calls
+        it a new register, so the copies are not affected by it.
 
         Returns
         -------
@@ -86,7 +241,23 @@ class WOQLClient:
         >>> clone = client.copy()
         >>> assert client is not clone
         """
-        return copy.deepcopy(self)
+        clone = copy.copy(self)
+        clone.conConfig = self.conConfig.copy()
+        if self.conConfig.remote_auth:
+            clone.conConfig.set_remote_auth(dict(self.conConfig.remote_auth))
+        return clone
+
+    def close(self):
+        """Close the pooled connections of this client and of its copies.
+
+        The pool is re-created on the next request.
+
+        Examples
+        --------
+        >>> client = WOQLClient("https://127.0.0.1:6363/")
+        >>> client.close()
+        """
+        self._connection_pool.close()
 
     def basic_auth(self, key=None, user=None):
         """Set or get the ``user:password`` for basic HTTP authentication to the server.
@@ -602,7 +773,7 @@ class WOQLClient:
             "Delete graph parameter error - you must specify a valid graph_type (inference, instance, schema), graph_id and commit message"
         )
 
-    def get_triples(self, graph_type, graph_id):
+    def get_triples(self, graph_type, graph_id, dest=None, progress=None):
         """Retrieves the contents of the specified graph as triples encoded in turtle format
 
         Parameters
@@ -611,15 +782,26 @@ class WOQLClient:
             Graph type, either ``"inference"``, ``"instance"`` or ``"schema"``.
         graph_id : str
             Graph identifier.
+        dest : str, os.PathLike or file object, optional
+            If given, the triples are written to this file (a path or a file
+            object in binary or text mode) as they are received, instead of
+            being returned, so the graph is never held in memory.
+        progress : callable, optional
+            Called as ``progress(received, total)`` while writing to ``dest``,
+            with the bytes received so far and the size of the response
+            (``None`` if unknown, e.g. when it is compressed).
 
         Returns
         -------
-        dict
+        str
+            The triples, or ``dest`` if it is given.
         """
-        return self.dispatch(
-            APIEndpointConst.GET_TRIPLES,
-            self.conConfig.triples_url(graph_type, graph_id),
-        )
+        url = self.conConfig.triples_url(graph_type, graph_id)
+        if dest is None:
+            return self.dispatch(APIEndpointConst.GET_TRIPLES, url)
+        response = self.dispatch(APIEndpointConst.GET_TRIPLES, url, stream=True)
+        self._download(response, dest, progress, json_string=True)
+        return dest
 
     def update_triples(self, graph_type, graph_id, turtle, commit_msg):
         """Updates the contents of the specified graph with the triples encoded in turtle format Replaces the entire graph contents
@@ -630,8 +812,10 @@ class WOQLClient:
             Graph type, either ``"inference"``, ``"instance"`` or ``"schema"``.
         graph_id : str
             Graph identifier.
-        turtle
-            Valid set of triples in Turtle format.
+        turtle : str, os.PathLike, file object or iterable
+            Valid set of triples in Turtle format. Either a string, or streamed
+            from a path (e.g. a ``pathlib.Path``), a file object or an iterable
+            of ``str`` or ``bytes`` chunks, without loading it in memory.
         commit_msg : str
             Commit message.
 
@@ -639,8 +823,7 @@ class WOQLClient:
         -------
         dict
         """
-        commit = self._generate_commit(commit_msg)
-        commit["turtle"] = turtle
+        commit = self._turtle_payload(commit_msg, turtle)
         return self.dispatch(
             APIEndpointConst.UPDATE_TRIPLES,
             self.conConfig.triples_url(graph_type, graph_id),
@@ -656,8 +839,10 @@ class WOQLClient:
             Graph type, either ``"inference"``, ``"instance"`` or ``"schema"``.
         graph_id : str
             Graph identifier.
-        turtle
-            Valid set of triples in Turtle format.
+        turtle : str, os.PathLike, file object or iterable
+            Valid set of triples in Turtle format. Either a string, or streamed
+            from a path (e.g. a ``pathlib.Path``), a file object or an iterable
+            of ``str`` or ``bytes`` chunks, without loading it in memory.
         commit_msg : str
             Commit message.
 
@@ -665,15 +850,152 @@ class WOQLClient:
         -------
         dict
         """
-        commit = self._generate_commit(commit_msg)
-        commit["turtle"] = turtle
+        commit = self._turtle_payload(commit_msg, turtle)
         return self.dispatch(
             APIEndpointConst.INSERT_TRIPLES,
             self.conConfig.triples_url(graph_type, graph_id),
             commit,
         )
 
-    def get_csv(self, csv_name, csv_directory=None, graph_type=None, graph_id=None):
+    def bulk_insert_triples(
+        self,
+        graph_type,
+        graph_id,
+        source,
+        commit_msg="Bulk load",
+        chunk_triples=100000,
+        workers=4,
+        squash=False,
+        resume_from=0,
+        checkpoint=None,
+    ):
+        """Inserts a large Turtle document into the specified graph in chunks.
+
+        The document is read as a stream and split between statements into
+        chunks of about ``chunk_triples`` triples, each one starting with the
+        prefix directives that precede it. Up to ``workers`` chunks are
+        uploaded at once, each in its own commit, so only these chunks are held
+        in memory. A chunk failing with a transient error is sent again
+        according to :attr:`retry_policy`, since inserting the same triples
+        twice does not change the graph.
+
+        Parameters
+        ----------
+        graph_type : str
+            Graph type, either ``"inference"``, ``"instance"`` or ``"schema"``.
+        graph_id : str
+            Graph identifier.
+        source : str, os.PathLike, file object or iterable
+            The Turtle document, as for :meth:`insert_triples`.
+        commit_msg : str
+            Commit message, the chunk number is appended for each commit.
+        chunk_triples : int
+            Number of triples per chunk.
+        workers : int
+            Number of chunks uploaded concurrently.
+        squash : bool
+            If ``True``, the branch is squashed into a single commit once all
+            the chunks are loaded, see :meth:`squash`.
+        resume_from : int
+            Number of chunks to skip, already loaded by a previous call with the
+            same document and ``chunk_triples``.
+        checkpoint : str, optional
+            Path of a file where the number of chunks loaded so far is saved.
+            If it exists, the load resumes from it. It is removed once the
+            whole document is loaded.
+
+        Returns
+        -------
+        dict
+            The number of ``"chunks"`` and ``"triples"`` loaded, of chunks
+            ``"skipped"``, and the ``"squash"`` response or ``None``.
+
+        Raises
+        ------
+        BulkLoadError
+            If a chunk cannot be loaded. Its ``acknowledged`` attribute is the
+            number of chunks loaded from the start of the document, to pass
+            as ``resume_from``.
+        """
+        progress = BulkLoadProgress(resume_from, chunk_triples, checkpoint)
+        url = self.conConfig.triples_url(graph_type, graph_id)
+        chunks = [source] if isinstance(source, str) else iter_chunks(source)
+        pending = {}
+
+        def collect(finished):
+            for future in finished:
+                index, triples = pending.pop(future)
+                future.result()
+                progress.loaded(index, triples)
+
+        executor = ThreadPoolExecutor(max_workers=max(1, workers))
+        try:
+            for index, (turtle, triples) in enumerate(
+                iter_turtle_chunks(chunks, chunk_triples)
+            ):
+                if index < progress.stats["skipped"]:
+                    continue
+                while len(pending) >= max(1, workers):
+                    collect(wait(pending, return_when=FIRST_COMPLETED)[0])
+                future = executor.submit(
+                    self._insert_chunk, url, commit_msg, index, turtle
+                )
+                pending[future] = (index, triples)
+            collect(list(pending))
+        except Exception as err:
+            # the chunks in flight may still extend the acknowledged ones
+            for future in list(pending):
+                try:
+                    collect([future])
+                except Exception:
+                    pass
+            raise progress.error(err, url) from err
+        finally:
+            executor.shutdown(wait=False)
+
+        progress.stats["squash"] = self.squash(commit_msg) if squash else None
+        progress.finish()
+        return progress.stats
+
+    def bulk_writer(self, commit_msg="Bulk update", **kwargs):
+        r"""A :class:`BulkWriter` batching updates into queries sent by this client.
+
+        Parameters
+        ----------
+        commit_msg : str
+            Commit message of each batch.
+        \**kwargs
+            ``max_triples``, ``max_bytes`` and ``pipeline``, see
+            :class:`BulkWriter`.
+
+        Returns
+        -------
+        BulkWriter
+        """
+        from ..woqlquery.bulk_writer import BulkWriter
+
+        return BulkWriter(self, commit_msg, **kwargs)
+
+    def _insert_chunk(self, url, commit_msg, index, turtle):
+        """Insert chunk number ``index`` of :meth:`bulk_insert_triples`."""
+        # inserting the same triples twice leaves the graph unchanged, so the
+        # chunk can be retried
+        return self.dispatch(
+            APIEndpointConst.INSERT_TRIPLES,
+            url,
+            self._turtle_payload(f"{commit_msg} (chunk {index + 1})", turtle),
+            idempotent=True,
+        )
+
+    def get_csv(
+        self,
+        csv_name,
+        csv_directory=None,
+        graph_type=None,
+        graph_id=None,
+        stream=False,
+        progress=None,
+    ):
         """Retrieves the contents of the specified graph as a CSV
 
         Parameters
@@ -686,6 +1008,14 @@ class WOQLClient:
             Graph type, either ``"inference"``, ``"instance"`` or ``"schema"``.
         graph_id : str
             Graph identifier.
+        stream : bool
+            If ``True``, the CSV is written to the file in chunks while it is
+            received rather than loaded in memory first. Compressed responses
+            are decompressed on the fly.
+        progress : callable, optional
+            Called as ``progress(received, total)`` while streaming, with the
+            bytes received so far and the size of the response (``None`` if
+            unknown).
 
         Returns
         -------
@@ -693,7 +1023,7 @@ class WOQLClient:
             An API success message
         """
         options = {}
-        if not (csv_directory is str):
+        if csv_directory is None:
             csv_directory = os.getcwd()
         options["csv_name"] = csv_name
 
@@ -701,45 +1031,51 @@ class WOQLClient:
             APIEndpointConst.GET_CSV,
             self.conConfig.csv_url(graph_type, graph_id),
             options,
+            stream=stream,
         )
-        stream = open(f"{csv_directory}/{csv_name}", "w")
+        path = os.path.join(csv_directory, csv_name)
+        if stream:
+            self._download(result, path, progress)
+            return result
+        stream = open(path, "w")
         stream.write(result.text)
         stream.close()
         return result
 
+    def _download(self, response, dest, progress=None, json_string=False):
+        """Write the body of a streamed response to ``dest``, then close it."""
+        try:
+            total = Download.expected_size(response.headers)
+            with Download(dest, total, progress, json_string) as download:
+                for chunk in response.iter_content(STREAM_CHUNK_SIZE):
+                    download.write(chunk)
+                download.finish()
+        finally:
+            response.close()
+
     def update_csv(self, csv_paths, commit_msg, graph_type=None, graph_id=None):
         """Updates the contents of the specified graph with the triples encoded in turtle format Replaces the entire graph contents
 
         Parameters
         ----------
+        csv_paths
+            CSV or list of CSVs to load, see :meth:`insert_csv`. (required)
+        commit_msg : str
+            Commit message.
         graph_type : str
             Graph type, either ``"inference"``, ``"instance"`` or ``"schema"``.
         graph_id : str
             Graph identifier.
-        turtle
-            Valid set of triples in Turtle format.
-        commit_msg : str
-            Commit message.
 
         Returns
         -------
         dict
             An API success message
         """
-        commit = self._generate_commit(commit_msg)
-        if type(csv_paths) is str:
-            csv_paths = [csv_paths]
-
-        file_dict = {}
-        for path in csv_paths:
-            name = os.path.basename(os.path.normpath(path))
-            file_dict[name] = (name, open(path, "rb"), "application/binary")
-
         return self.dispatch(
             APIEndpointConst.UPDATE_TRIPLES,
             self.conConfig.csv_url(graph_type, graph_id),
-            commit,
-            file_dict=file_dict,
+            self._csv_payload(commit_msg, csv_paths),
         )
 
     def insert_csv(self, csv_paths, commit_msg, graph_type=None, graph_id=None):
@@ -748,7 +1084,11 @@ class WOQLClient:
         Parameters
         ----------
         csv_paths
-            csv path or list of csv paths to load. (required)
+            csv path or list of csv paths to load. (required) A csv can also be
+            a file object or, in the list, a ``(name, source)`` tuple where
+            ``source`` is a path, a file object or an iterable of ``str`` or
+            ``bytes`` chunks.
+            The files are streamed to the server, not loaded in memory.
         commit_msg : str
             Commit message.
         graph_type : str
@@ -761,24 +1101,167 @@ class WOQLClient:
         dict
             An API success message
         """
-        commit = self._generate_commit(commit_msg)
-        file_dict = {}
-        if type(csv_paths) is str:
-            csv_paths = [csv_paths]
-
-        file_dict = {}
-        for path in csv_paths:
-            name = os.path.basename(os.path.normpath(path))
-            file_dict[name] = (name, open(path, "rb"), "application/binary")
-
         return self.dispatch(
             APIEndpointConst.INSERT_CSV,
             self.conConfig.csv_url(graph_type, graph_id),
-            commit,
-            file_dict=file_dict,
+            self._csv_payload(commit_msg, csv_paths),
         )
 
-    def query(self, woql_query, commit_msg=None, file_dict=None):
+    def _turtle_payload(self, commit_msg, turtle):
+        """Commit body of a triples upload, streamed if ``turtle`` is not a string."""
+        commit = self._generate_commit(commit_msg)
+        if is_stream_source(turtle):
+            return StreamingBody.json(commit, "turtle", iter_chunks(turtle))
+        commit["turtle"] = turtle
+        return commit
+
+    def bulk_insert_csv(
+        self,
+        csv_paths,
+        commit_msg="Load",
+        graph_type=None,
+        graph_id=None,
+        batch_size=1,
+        workers=4,
+        retries=1,
+    ):
+        """Inserts many CSV shards concurrently, in separate requests and commits.
+
+        The shards are grouped in batches of ``batch_size``, and up to
+        ``workers`` batches are uploaded at once, each in its own commit named
+        after its shards. A failed batch does not stop the others: its shards
+        are then sent again one at a time, up to ``retries`` times.
+
+        Parameters
+        ----------
+        csv_paths : list
+            CSV shards, as for :meth:`insert_csv`. Shards given as iterables
+            of chunks or as non-seekable file objects are not retried.
+        commit_msg : str
+            Commit message, followed by the names of the shards of each commit.
+        graph_type : str
+            Graph type, either ``"inference"``, ``"instance"`` or ``"schema"``.
+        graph_id : str
+            Graph identifier.
+        batch_size : int
+            Number of shards sent per request.
+        workers : int
+            Number of requests in flight at once.
+        retries : int
+            Number of times a failed shard is sent again on its own.
+
+        Returns
+        -------
+        dict
+            The names of the shards ``"loaded"`` and ``"failed"``, and a report
+            per shard in ``"shards"``: its ``"name"``, number of
+            ``"attempts"``, the ``"seconds"`` taken by its last request and
+            the ``"error"`` raised by it, or ``None``.
+        """
+        url = self.conConfig.csv_url(graph_type, graph_id)
+        shards, report, batches = self._csv_shards(csv_paths, batch_size)
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            for _ in range(retries + 1):
+                futures = [
+                    executor.submit(self._insert_csv_batch, url, commit_msg, batch)
+                    for batch in (
+                        [shards[index] for index in indexes] for indexes in batches
+                    )
+                ]
+                outcomes = [future.result() for future in futures]
+                batches = self._record_csv_batches(report, shards, batches, outcomes)
+                if not batches:
+                    break
+        return self._csv_report(report)
+
+    def _insert_csv_batch(self, url, commit_msg, batch):
+        """Insert a batch of :meth:`bulk_insert_csv`, returns its duration and error."""
+        names = ", ".join(name for name, _ in batch)
+        started = time.monotonic()
+        try:
+            self.dispatch(
+                APIEndpointConst.INSERT_CSV,
+                url,
+                self._csv_payload(f"{commit_msg}: {names}", batch),
+            )
+        except Exception as err:
+            return time.monotonic() - started, err
+        return time.monotonic() - started, None
+
+    @classmethod
+    def _csv_shards(cls, csv_paths, batch_size):
+        """Shards, empty report and batches of shard indexes of a CSV bulk load."""
+        shards = [cls._csv_source(csv) for csv in csv_paths]
+        report = [
+            {"name": name, "attempts": 0, "seconds": None, "error": None}
+            for name, _ in shards
+        ]
+        batch_size = max(1, batch_size)
+        batches = [
+            list(range(start, min(start + batch_size, len(shards))))
+            for start in range(0, len(shards), batch_size)
+        ]
+        return shards, report, batches
+
+    @staticmethod
+    def _record_csv_batches(report, shards, batches, outcomes):
+        """Report the outcomes of ``batches``, returns the shards to send again."""
+        retry = []
+        for indexes, (seconds, error) in zip(batches, outcomes):
+            for index in indexes:
+                report[index].update(
+                    attempts=report[index]["attempts"] + 1,
+                    seconds=seconds,
+                    error=error,
+                )
+                if error is not None and rewind_source(shards[index][1]):
+                    retry.append([index])
+        return retry
+
+    @staticmethod
+    def _csv_report(report):
+        return {
+            "loaded": [shard["name"] for shard in report if shard["error"] is None],
+            "failed": [shard["name"] for shard in report if shard["error"] is not None],
+            "shards": report,
+        }
+
+    @staticmethod
+    def _csv_source(csv):
+        """``(name, source)`` of a CSV given to :meth:`insert_csv`."""
+        if isinstance(csv, tuple):
+            return csv
+        if hasattr(csv, "read"):
+            if not isinstance(getattr(csv, "name", None), str):
+                raise ValueError(
+                    "A CSV file object without name must be given in a list, "
+                    "as a (name, file) tuple"
+                )
+            return os.path.basename(csv.name), csv
+        return os.path.basename(os.path.normpath(csv)), csv
+
+    def _csv_payload(self, commit_msg, csv_paths):
+        """Multipart body streaming ``csv_paths``, see :meth:`insert_csv`."""
+        commit = self._generate_commit(commit_msg)
+        # a tuple is a sequence of csvs, (name, source) pairs are only elements
+        if isinstance(csv_paths, (str, os.PathLike)) or hasattr(csv_paths, "read"):
+            csv_paths = [csv_paths]
+
+        files = {}
+        for csv in csv_paths:
+            name, source = self._csv_source(csv)
+            files[name] = (name, iter_chunks(source), "application/binary")
+        return StreamingBody.multipart(commit, files)
+
+    def query(
+        self,
+        woql_query,
+        commit_msg=None,
+        file_dict=None,
+        stream=False,
+        timeout=None,
+        deadline=None,
+    ):
         """Updates the contents of the specified graph with the triples encoded in turtle format Replaces the entire graph contents
 
         Parameters
@@ -789,10 +1272,267 @@ class WOQLClient:
             A message that will be written to the commit log to describe the change
         file_dict:
             File dictionary to be associated with post name => filename, for multipart POST
+        stream : bool
+            If ``True``, a generator of the result bindings is returned instead of
+            the whole response. The bindings are decoded one at a time while the
+            response is read, so memory use does not grow with the result size.
+        timeout : float or tuple, optional
+            Timeout of the request, overriding the one of the client.
+        deadline : float or Deadline, optional
+            Seconds (or a :class:`Deadline`) within which the query, retries
+            included, must complete.
+
+        Raises
+        ------
+        DeadlineExceededError
+            If the deadline passes before the query completes.
 
         Examples
         -------
         >>> WOQLClient(server="http://localhost:6363").query(woql, "updating graph")
+        >>> for binding in client.query(WOQLQuery().star(), stream=True):
+        ...     print(binding)
+        """
+        idempotent = self._read_only(woql_query)
+        payload, request_file_dict = self._prepare_query(
+            woql_query, commit_msg, file_dict
+        )
+        if stream:
+            return self._stream_bindings(
+                self.dispatch(
+                    APIEndpointConst.WOQL_QUERY,
+                    self.conConfig.query_url(),
+                    payload,
+                    request_file_dict,
+                    stream=True,
+                    idempotent=idempotent,
+                    timeout=timeout,
+                    deadline=deadline,
+                )
+            )
+        return self.dispatch(
+            APIEndpointConst.WOQL_QUERY,
+            self.conConfig.query_url(),
+            payload,
+            request_file_dict,
+            idempotent=idempotent,
+            timeout=timeout,
+            deadline=deadline,
+        )
+
+    def _stream_bindings(self, response, chunk_size=STREAM_CHUNK_SIZE):
+        """Yield the bindings of a streamed query response, then close it."""
+        try:
+            yield from utils.iter_json_array_items(
+                response.iter_content(chunk_size), "bindings"
+            )
+        finally:
+            response.close()
+
+    def query_many(
+        self,
+        queries,
+        commit_msg=None,
+        max_workers=None,
+        ordered=True,
+        timeout=None,
+        deadline=None,
+    ):
+        """Run several independent queries concurrently.
+
+        The queries are sent from a pool of worker threads over the shared
+        connection pool of the client, and the outbound ``@context`` is
+        computed only once for the whole batch.
+
+        Parameters
+        ----------
+        queries : iterable of dict or WOQLQuery object
+            The queries to run.
+        commit_msg : str, optional
+            Commit message used for the queries that contain an update.
+        max_workers : int, optional
+            Maximum number of queries in flight at once, defaults to the size
+            of the connection pool.
+        ordered : bool
+            If ``True`` a list with one entry per query, in the order of
+            ``queries``, is returned. Otherwise a generator of
+            ``(index, result)`` pairs is returned in completion order.
+        timeout : float or tuple, optional
+            Timeout of each request, overriding the one of the client.
+        deadline : float or Deadline, optional
+            Seconds (or a :class:`Deadline`) within which the whole batch must
+            complete.
+
+        Returns
+        -------
+        list or generator
+            The result of each query, or the exception raised by it.
+
+        Examples
+        --------
+        >>> client = WOQLClient("https://127.0.0.1:6363/")
+        >>> client.query_many([WOQLLib().objects(c) for c in classes])
+        """
+        context = self.conCapabilities.get_context_for_outbound_query(None, self.db())
+        url = self.conConfig.query_url()
+        prepared = [
+            (self._read_only(query),)
+            + self._prepare_query(query, commit_msg, context=context)
+            for query in queries
+        ]
+        if max_workers is None:
+            max_workers = self._connection_pool.pool_maxsize
+        deadline = Deadline.coerce(deadline)
+        executor = ThreadPoolExecutor(max_workers=max(1, max_workers))
+        futures = {}
+        for index, (idempotent, payload, request_file_dict) in enumerate(prepared):
+            future = executor.submit(
+                self.dispatch,
+                APIEndpointConst.WOQL_QUERY,
+                url,
+                payload,
+                request_file_dict,
+                idempotent=idempotent,
+                timeout=timeout,
+                deadline=deadline,
+            )
+            futures[future] = index
+        executor.shutdown(wait=False)
+        if ordered:
+            return [_future_outcome(future) for future in futures]
+        return (
+            (futures[future], _future_outcome(future))
+            for future in as_completed(futures)
+        )
+
+    def iter_query(
+        self, woql_query, page_size=10000, prefetch=1, timeout=None, deadline=None
+    ):
+        """Iterate over the bindings of a read-only query, one page at a time.
+
+        The query is wrapped in ``limit(page_size).start(offset, query)`` and the
+        pages are requested in order until a short page comes back. While a page
+        is consumed the next ``prefetch`` pages are fetched in the background.
+
+        Parameters
+        ----------
+        woql_query : dict or WOQLQuery object
+            A read-only woql query as an object or dict.
+        page_size : int
+            Number of bindings requested per page.
+        prefetch : int
+            Number of pages requested ahead of the one being consumed.
+        timeout : float or tuple, optional
+            Timeout of each page request, overriding the one of the client.
+        deadline : float or Deadline, optional
+            Seconds (or a :class:`Deadline`) within which all the pages must be
+            fetched.
+
+        Returns
+        -------
+        generator
+            The bindings of the query.
+
+        Raises
+        ------
+        ValueError
+            If the query contains an update.
+        DeadlineExceededError
+            If the deadline passes before the last page is fetched.
+
+        Examples
+        --------
+        >>> client = WOQLClient("https://127.0.0.1:6363/")
+        >>> for binding in client.iter_query(WOQLQuery().star(), page_size=5000):
+        ...     print(binding)
+        """
+        woql_query, context = self._prepare_paging(woql_query, page_size)
+        return self._iter_pages(
+            woql_query, context, page_size, prefetch, timeout, Deadline.coerce(deadline)
+        )
+
+    def _iter_pages(self, woql_query, context, page_size, prefetch, timeout, deadline):
+        """Yield the bindings of the pages of a query prepared by
+        :meth:`_prepare_paging`."""
+        url = self.conConfig.query_url()
+
+        def fetch_page(start):
+            payload = self._page_payload(woql_query, start, page_size, context)
+            return self.dispatch(
+                APIEndpointConst.WOQL_QUERY,
+                url,
+                payload,
+                idempotent=True,
+                timeout=timeout,
+                deadline=deadline,
+            )
+
+        executor = ThreadPoolExecutor(max_workers=max(1, prefetch + 1))
+        pending = deque()
+        next_start = 0
+        try:
+            while True:
+                while len(pending) <= prefetch:
+                    pending.append(executor.submit(fetch_page, next_start))
+                    next_start += page_size
+                bindings = pending.popleft().result().get("bindings", [])
+                yield from bindings
+                if len(bindings) < page_size:
+                    return
+        finally:
+            for future in pending:
+                future.cancel()
+            executor.shutdown(wait=False)
+
+    @staticmethod
+    def _read_only(woql_query):
+        """Whether a query (object or dict) contains no update."""
+        from ..woqlquery.woql_query import WOQLQuery
+
+        if type(woql_query) != dict and hasattr(woql_query, "_contains_update_check"):
+            return not woql_query._contains_update_check()
+        return not (
+            woql_query.get("@type") and WOQLQuery()._contains_update_check(woql_query)
+        )
+
+    def _prepare_paging(self, woql_query, page_size):
+        """Check that a query can be paged and materialize it once."""
+        if page_size < 1:
+            raise ValueError("Page size must be a positive integer")
+        if not self._read_only(woql_query):
+            raise ValueError("Only read-only queries can be paged")
+        if type(woql_query) != dict and hasattr(woql_query, "to_dict"):
+            woql_query = woql_query.to_dict()
+        context = self.conCapabilities.get_context_for_outbound_query(None, self.db())
+        return woql_query, context
+
+    def _page_payload(self, woql_query, start, page_size, context):
+        """Payload of the page of ``woql_query`` beginning at ``start``."""
+        from ..woqlquery.woql_query import WOQLQuery
+
+        page = WOQLQuery().limit(page_size).start(start, woql_query)
+        payload, _ = self._prepare_query(page, context=context)
+        return payload
+
+    def _prepare_query(self, woql_query, commit_msg=None, file_dict=None, context=None):
+        """Build the request payload and multipart files of a WOQL query.
+
+        Parameters
+        ----------
+        woql_query : dict or WOQLQuery object
+            A woql query as an object or dict
+        commit_mg : str
+            A message that will be written to the commit log to describe the change
+        file_dict:
+            File dictionary to be associated with post name => filename, for multipart POST
+        context : dict, optional
+            Precomputed outbound ``@context`` for the query.
+
+        Returns
+        -------
+        tuple
+            The json payload (``None`` for multipart requests) and the request
+            file dict.
         """
         if (
             hasattr(woql_query, "_contains_update_check")
@@ -807,9 +1547,11 @@ class WOQLClient:
             query_obj = {}
         if type(woql_query) != dict and hasattr(woql_query, "to_dict"):
             woql_query = woql_query.to_dict()
-        woql_query["@context"] = self.conCapabilities.get_context_for_outbound_query(
-            None, self.db()
-        )
+        if context is None:
+            context = self.conCapabilities.get_context_for_outbound_query(
+                None, self.db()
+            )
+        woql_query["@context"] = context
         query_obj["query"] = woql_query
         if type(file_dict) == dict:
             request_file_dict = {}
@@ -817,7 +1559,7 @@ class WOQLClient:
                 query_obj_value = query_obj[name]
                 request_file_dict[name] = (
                     name,
-                    json.dumps(query_obj_value),
+                    json_backend.dumps(query_obj_value),
                     "application/json",
                 )
             for name in file_dict:
@@ -827,13 +1569,7 @@ class WOQLClient:
         else:
             request_file_dict = None
             payload = query_obj
-
-        return self.dispatch(
-            APIEndpointConst.WOQL_QUERY,
-            self.conConfig.query_url(),
-            payload,
-            request_file_dict,
-        )
+        return payload, request_file_dict
 
     def branch(self, new_branch_id, empty=False):
         """Create a branch starting from the current branch.
@@ -1128,23 +1864,59 @@ class WOQLClient:
             rc_args["author"] = self.conCapabilities.author()
         return rc_args
 
-    def dispatch(self, action, url, payload=None, file_dict=None):
+    def dispatch(
+        self,
+        action,
+        url,
+        payload=None,
+        file_dict=None,
+        stream=False,
+        idempotent=None,
+        timeout=None,
+        deadline=None,
+        cache=True,
+    ):
         """Directly dispatch to a TerminusDB database.
 
+        Requests that fail with a transient error are retried according to
+        :attr:`retry_policy` if they are idempotent. Read-only queries are
+        answered from :attr:`query_cache` when it holds their result.
+
         Parameters
         ----------
         action
             The action to perform on the server.
         url : str
             The server URL to point the action at.
-        payload : dict
+        payload : dict or StreamingBody
             Payload to send to the server.
         file_dict : dict, optional
             Dict of files to include in the query.
+        stream : bool
+            If ``True``, the response object of a successful request is returned
+            without reading its body.
+        idempotent : bool, optional
+            Whether the request can safely be sent more than once. Defaults to
+            ``True`` for the read-only actions. Multipart and streamed requests
+            are never retried, as their content is consumed by the first attempt.
+        timeout : float or tuple, optional
+            Timeout of the request in seconds, or a ``(connect, read)`` tuple.
+            Defaults to the timeout of the client.
+        deadline : float or Deadline, optional
+            Seconds (or a :class:`Deadline`) within which the request, retries
+            included, must complete. The timeout of each attempt is capped by
+            the time left.
+        cache : bool
+            If ``False``, :attr:`query_cache` is not used for this request.
 
         Returns
         -------
         dict
+
+        Raises
+        ------
+        DeadlineExceededError
+            If the deadline passes before the request completes.
         """
 
         # check if we can perform this action or raise an AccessDeniedError error
@@ -1154,7 +1926,94 @@ class WOQLClient:
 
         if payload is None:
             payload = {}
+        if idempotent is None:
+            idempotent = action in DispatchRequest.IDEMPOTENT_ACTIONS
+        if timeout is None:
+            timeout = self.timeout
+        deadline = Deadline.coerce(deadline)
+
+        def send():
+            if deadline is not None:
+                deadline.check()
+            try:
+                return self._send_request(
+                    action,
+                    url,
+                    payload,
+                    file_dict,
+                    stream,
+                    idempotent,
+                    timeout if deadline is None else deadline.cap(timeout),
+                )
+            except requests.exceptions.Timeout as err:
+                if deadline is not None and deadline.expired():
+                    raise DeadlineExceededError(str(err), url) from err
+                raise
+
+        cache_key = None
+        if cache:
+            cache_key = self._cache_key(
+                action, url, payload, file_dict, stream, idempotent
+            )
+        if cache_key is not None:
+            result = self.query_cache.get(cache_key)
+            if result is not None:
+                return result
+        try:
+            if self.retry_policy is None:
+                result = send()
+            else:
+                retryable = (
+                    idempotent
+                    and not file_dict
+                    and not isinstance(payload, StreamingBody)
+                )
+                result = self.retry_policy.call(send, retryable, deadline)
+        finally:
+            self._invalidate_cache(action, idempotent)
+        if cache_key is not None:
+            self.query_cache.put(cache_key, result)
+        return result
 
+    def _cache_key(self, action, url, payload, file_dict, stream, idempotent):
+        """Key of a request in :attr:`query_cache`, ``None`` if it is not cached.
+
+        Only the read-only queries whose whole result is read are cached, under
+        the credentials of the client."""
+        if (
+            self.query_cache is None
+            or action != APIEndpointConst.WOQL_QUERY
+            or not idempotent
+            or stream
+            or file_dict
+            or isinstance(payload, StreamingBody)
+        ):
+            return None
+        return QueryCache.key(url, payload, [self.basic_auth(), self.remote_auth()])
+
+    def _invalidate_cache(self, action, idempotent):
+        """Drop the cached results made stale by a request to the cursor.
+
+        A commit to a branch also changes the commit graph of its repository,
+        so the results of the whole repository are dropped."""
+        if self.query_cache is None and self.schema_cache is None:
+            return
+        if action in self.DATABASE_WRITE_ACTIONS:
+            prefix = self.conConfig.db_base("woql")
+        elif action in self.BRANCH_WRITE_ACTIONS or (
+            action == APIEndpointConst.WOQL_QUERY and not idempotent
+        ):
+            prefix = self.conConfig.repo_base("woql")
+        else:
+            return
+        for cache in (self.query_cache, self.schema_cache):
+            if cache is not None:
+                cache.invalidate(prefix)
+
+    def _send_request(
+        self, action, url, payload, file_dict, stream, idempotent, timeout
+    ):
+        """Send one attempt of a request, see :meth:`dispatch`."""
         return DispatchRequest.send_request_by_action(
             url,
             action,
@@ -1163,6 +2022,11 @@ class WOQLClient:
             self.remote_auth(),
             file_dict,
             self.insecure,
+            session=self._connection_pool.session(),
+            stream=stream,
+            compression=self.compression,
+            compression_threshold=self.compression_threshold,
+            timeout=timeout,
         )
 
     def get_database(self, dbid, account):
@@ -1220,7 +2084,152 @@ class WOQLClient:
     """
 
     def get_class_frame(self, class_name):
+        """Get the frame of a class of the schema.
+
+        With a :attr:`schema_cache`, the frame is downloaded again only if the
+        head commit of the branch has moved since it was cached.
+
+        Parameters
+        ----------
+        class_name : str
+            IRI of the class.
+
+        Returns
+        -------
+        dict
+
+        Examples
+        --------
+        >>> client = WOQLClient("https://127.0.0.1:6363/")
+        >>> client.get_class_frame("scm:Person")
+        """
         opts = {"class": class_name}
-        return self.dispatch(
-            APIEndpointConst.CLASS_FRAME, self.conConfig.class_frame_url(), opts,
+
+        def fetch():
+            return self.dispatch(
+                APIEndpointConst.CLASS_FRAME, self.conConfig.class_frame_url(), opts,
+            )
+
+        return self._schema_lookup(f"class_frame:{class_name}", fetch)
+
+    def schema_query(self, woql_query):
+        """Run a read-only schema query, like ``WOQLLib().classes()``.
+
+        With a :attr:`schema_cache`, the result is downloaded again only if the
+        head commit of the branch has moved since it was cached.
+
+        Parameters
+        ----------
+        woql_query : dict or WOQLQuery object
+            A read-only woql query as an object or dict.
+
+        Returns
+        -------
+        dict
+
+        Raises
+        ------
+        ValueError
+            If the query contains an update.
+
+        Examples
+        --------
+        >>> client = WOQLClient("https://127.0.0.1:6363/")
+        >>> client.schema_query(WOQLLib().property())
+        """
+        key, payload = self._prepare_schema_query(woql_query)
+
+        def fetch():
+            return self.dispatch(
+                APIEndpointConst.WOQL_QUERY,
+                self.conConfig.query_url(),
+                payload,
+                idempotent=True,
+                cache=False,
+            )
+
+        return self._schema_lookup(key, fetch)
+
+    def head_commit(self):
+        """Get the id of the head commit of the current branch.
+
+        This is a small query on the commit graph of the repository, made
+        with ``WOQLLib().branches()``.
+
+        Returns
+        -------
+        str or None
+            The commit id, the ref of the client if it has one, or ``None`` if
+            the branch has no commit.
+
+        Examples
+        --------
+        >>> client = WOQLClient("https://127.0.0.1:6363/")
+        >>> client.connect(user="admin", account="admin", key="root", db="mydb")
+        >>> client.head_commit()
+        'q5ys5jzt2hdmlehorfw9ggt8bkq0a6q'
+        """
+        if self.conConfig.ref:
+            return self.conConfig.ref
+        result = self.dispatch(
+            APIEndpointConst.WOQL_QUERY,
+            self.conConfig.query_url(),
+            self._head_commit_payload(),
+            idempotent=True,
+            cache=False,
         )
+        return self._head_commit_id(result)
+
+    def _head_commit_payload(self):
+        from ..woqlquery.woql_library import WOQLLib
+
+        payload, _ = self._prepare_query(WOQLLib().branches(self.conConfig.branch))
+        return payload
+
+    @staticmethod
+    def _head_commit_id(result):
+        """Commit id found by the :meth:`head_commit` query."""
+        for binding in result.get("bindings", []):
+            commit_id = binding.get("Commit ID")
+            if isinstance(commit_id, dict):
+                commit_id = commit_id.get("@value")
+            if commit_id:
+                return commit_id
+        return None
+
+    def _prepare_schema_query(self, woql_query):
+        """Cache key and payload of a :meth:`schema_query`."""
+        if not self._read_only(woql_query):
+            raise ValueError("Only read-only queries can be cached")
+        payload, _ = self._prepare_query(woql_query)
+        return "query:" + json_backend.dumps(payload, sort_keys=True), payload
+
+    def _schema_scope(self):
+        """Branch URL of the schema lookups and its head if known, ``None`` for
+        the URL if they cannot be cached."""
+        if (
+            self.schema_cache is None
+            or not self.conConfig.db
+            or self.conConfig.db == "_system"
+            or self.conConfig.repo == "_meta"
+            or self.conConfig.branch == "_commits"
+        ):
+            return None, None
+        scope = self.conConfig.query_url()
+        if self.conConfig.ref:
+            return scope, self.conConfig.ref
+        return scope, self.schema_cache.head(scope)
+
+    def _schema_lookup(self, key, fetch):
+        """Value of the schema lookup ``key``, from the cache or ``fetch()``."""
+        scope, head = self._schema_scope()
+        if scope is None:
+            return fetch()
+        if head is None:
+            head = self.head_commit() or ""
+            self.schema_cache.set_head(scope, head)
+        value = self.schema_cache.get(scope, key, head)
+        if value is None:
+            value = fetch()
+            self.schema_cache.put(scope, key, head, value)
+        return value
@@ -1,3 +1,5 @@
+from .bulk_writer import AsyncBulkWriter, BulkWriter  # noqa
 from .smart_query import TerminusDB, WOQLClass, WOQLObj  # noqa
 from .woql_library import WOQLLib  # noqa
 from .woql_query import WOQLQuery  # noqa
+from .woql_template import Parameter, WOQLTemplate  # noqa
@@ -0,0 +1,318 @@
+import asyncio
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import terminusdb_client.json_backend as json_backend
+
+from .woql_query import WOQLQuery
+
+# update operators counted as one triple each
+_TRIPLE_UPDATES = ("woql:AddTriple", "woql:AddQuad")
+# approximate size of the woql:QueryListElement wrapping each update
+_ELEMENT_OVERHEAD = 128
+# counters of the query responses summed in the stats
+_RESPONSE_COUNTERS = ("inserts", "deletes", "transaction_retry_count")
+
+
+def _count_triples(query):
+    """Number of triples added by a json-ld update query."""
+    count = 0
+    stack = [query]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, dict):
+            if item.get("@type") in _TRIPLE_UPDATES:
+                count += 1
+            stack.extend(item.values())
+        elif isinstance(item, list):
+            stack.extend(item)
+    return count
+
+
+class BulkWriter:
+    """Batches many updates into size-bounded queries sent with a client.
+
+    Updates are added with :meth:`add_triple`, :meth:`add_quad`,
+    :meth:`insert` or :meth:`add`, and collected into a ``woql:And``. The batch
+    is sent with :meth:`WOQLClient.query`, as one commit, before it grows
+    beyond ``max_triples`` triples or about ``max_bytes`` of json. While a batch
+    is sent in the background the next one is built, up to ``pipeline``
+    batches are in flight.
+
+    Parameters
+    ----------
+    client : WOQLClient
+        Client connected to the database to update.
+    commit_msg : str
+        Commit message of each batch.
+    max_triples : int
+        Maximum number of triples added per batch.
+    max_bytes : int
+        Maximum size of the json-ld of a batch, approximately.
+    pipeline : int
+        Number of batches sent concurrently in the background. With ``0``,
+        :meth:`flush` sends the batch and waits for the response.
+
+    Examples
+    --------
+    >>> with BulkWriter(client, "Import people") as writer:
+    ...     for person in people:
+    ...         writer.insert(f"doc:{person.id}", "scm:Person")
+    ...         writer.add_triple(f"doc:{person.id}", "scm:name", person.name)
+    >>> writer.stats["batches"]
+    12
+    """
+
+    def __init__(
+        self,
+        client,
+        commit_msg="Bulk update",
+        max_triples=10000,
+        max_bytes=4 * 1024 * 1024,
+        pipeline=1,
+    ):
+        self.client = client
+        self.commit_msg = commit_msg
+        self.max_triples = max_triples
+        self.max_bytes = max_bytes
+        self.pipeline = pipeline
+        self.stats = {"batches": 0, "triples": 0, "bytes": 0}
+        self.stats.update((counter, 0) for counter in _RESPONSE_COUNTERS)
+        self._updates = []
+        self._triples = 0
+        self._bytes = 0
+        self._pending = {}
+        self._executor = None
+        self._error = None
+        self._closed = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self._updates = []
+            self._wait()
+
+    def add_triple(self, subject, predicate, object_or_literal):
+        """Add a triple, see :meth:`WOQLQuery.add_triple`."""
+        return self.add(WOQLQuery().add_triple(subject, predicate, object_or_literal))
+
+    def add_quad(self, subject, predicate, object_or_literal, graph):
+        """Add a quad, see :meth:`WOQLQuery.add_quad`."""
+        return self.add(
+            WOQLQuery().add_quad(subject, predicate, object_or_literal, graph)
+        )
+
+    def insert(
+        self, insert_id, insert_type, ref_graph=None, label=None, description=None
+    ):
+        """Insert a node of a type, see :meth:`WOQLQuery.insert`."""
+        return self.add(
+            WOQLQuery().insert(insert_id, insert_type, ref_graph, label, description)
+        )
+
+    def add(self, update):
+        """Add an update query to the batch, sending the batch first if it is full.
+
+        Parameters
+        ----------
+        update : WOQLQuery or dict
+            An update query, in a single batch.
+
+        Returns
+        -------
+        BulkWriter
+            This writer, so calls can be chained.
+        """
+        update, triples, size = self._measure(update)
+        if self._is_full(triples, size):
+            self.flush()
+        self._append(update, triples, size)
+        return self
+
+    def flush(self):
+        """Send the current batch.
+
+        Raises
+        ------
+        Exception
+            The error of a batch that failed earlier, in which case no more
+            batches are sent.
+        """
+        query, batch = self._take_batch()
+        if query is None:
+            return self
+        if self.pipeline <= 0:
+            self._record(self._send(query), batch)
+            return self
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.pipeline)
+        while len(self._pending) >= self.pipeline:
+            self._collect(wait(self._pending, return_when=FIRST_COMPLETED)[0])
+        self._pending[self._executor.submit(self._send, query)] = batch
+        return self
+
+    def close(self):
+        """Send the last batch and wait for all the batches to be committed.
+
+        Returns
+        -------
+        dict
+            The number of ``"batches"``, ``"triples"`` and ``"bytes"`` sent,
+            and the sum of the ``"inserts"``, ``"deletes"`` and
+            ``"transaction_retry_count"`` of the responses.
+
+        Raises
+        ------
+        Exception
+            The error of the first batch that failed.
+        """
+        if not self._closed:
+            try:
+                self.flush()
+            finally:
+                self._wait()
+        self._raise_error()
+        return self.stats
+
+    def _measure(self, update):
+        """The json-ld of ``update``, its number of triples and its size."""
+        if self._closed:
+            raise ValueError("The BulkWriter is closed")
+        if hasattr(update, "to_dict"):
+            update = update.to_dict()
+        size = len(json_backend.dumps_bytes(update)) + _ELEMENT_OVERHEAD
+        return update, _count_triples(update), size
+
+    def _is_full(self, triples, size):
+        """Whether the batch must be sent before adding an update of this size."""
+        return bool(self._updates) and (
+            self._triples + triples > self.max_triples
+            or self._bytes + size > self.max_bytes
+        )
+
+    def _append(self, update, triples, size):
+        self._updates.append(update)
+        self._triples += triples
+        self._bytes += size
+
+    def _take_batch(self):
+        """The query of the current batch and its stats, and start a new batch.
+
+        The query is ``None`` if the batch is empty."""
+        self._raise_error()
+        if not self._updates:
+            return None, None
+        query = WOQLQuery().woql_and(*self._updates)
+        batch = (self._triples, self._bytes)
+        self._updates, self._triples, self._bytes = [], 0, 0
+        return query, batch
+
+    def _send(self, query):
+        return self.client.query(query, self.commit_msg)
+
+    def _wait(self):
+        self._closed = True
+        self._collect(list(self._pending))
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def _collect(self, finished):
+        for future in finished:
+            batch = self._pending.pop(future)
+            try:
+                result = future.result()
+            except Exception as err:
+                if self._error is None:
+                    self._error = err
+                continue
+            self._record(result, batch)
+
+    def _record(self, result, batch):
+        triples, size = batch
+        self.stats["batches"] += 1
+        self.stats["triples"] += triples
+        self.stats["bytes"] += size
+        if isinstance(result, dict):
+            for counter in _RESPONSE_COUNTERS:
+                if isinstance(result.get(counter), int):
+                    self.stats[counter] += result[counter]
+
+    def _raise_error(self):
+        if self._error is not None:
+            raise self._error
+
+
+class AsyncBulkWriter(BulkWriter):
+    """:class:`BulkWriter` sending its batches with an :class:`AsyncWOQLClient`.
+
+    The methods adding updates, :meth:`flush` and :meth:`aclose` are
+    coroutines, and the batches in flight are asyncio tasks instead of threads.
+
+    Examples
+    --------
+    >>> async with client.bulk_writer("Import people") as writer:
+    ...     for person in people:
+    ...         await writer.add_triple(f"doc:{person.id}", "scm:name", person.name)
+    """
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            await self.aclose()
+        else:
+            self._updates = []
+            await self._wait_async()
+
+    def __enter__(self):
+        raise TypeError("Use 'async with' with an AsyncBulkWriter")
+
+    async def add(self, update):
+        """Add an update query to the batch, see :meth:`BulkWriter.add`."""
+        update, triples, size = self._measure(update)
+        if self._is_full(triples, size):
+            await self.flush()
+        self._append(update, triples, size)
+        return self
+
+    async def flush(self):
+        """Send the current batch, see :meth:`BulkWriter.flush`."""
+        query, batch = self._take_batch()
+        if query is None:
+            return self
+        if self.pipeline <= 0:
+            self._record(await self._send(query), batch)
+            return self
+        while len(self._pending) >= self.pipeline:
+            finished, _ = await asyncio.wait(
+                self._pending, return_when=asyncio.FIRST_COMPLETED
+            )
+            self._collect(finished)
+        self._pending[asyncio.ensure_future(self._send(query))] = batch
+        return self
+
+    def close(self):
+        raise TypeError("Use 'await writer.aclose()' to close an AsyncBulkWriter")
+
+    async def aclose(self):
+        """Send the last batch and wait for all the batches to be committed.
+
+        See :meth:`BulkWriter.close`."""
+        if not self._closed:
+            try:
+                await self.flush()
+            finally:
+                await self._wait_async()
+        self._raise_error()
+        return self.stats
+
+    async def _wait_async(self):
+        self._closed = True
+        if self._pending:
+            await asyncio.wait(self._pending)
+        self._collect(list(self._pending))
@@ -1,18 +1,83 @@
 import copy
 import datetime as dt
-import json
+import hashlib
+import json as std_json
 
 # import pprint
 import re
 
+import terminusdb_client.json_backend as json_backend
 import terminusdb_client.woql_utils as utils
 
 from .woql_core import _copy_dict, _tokenize, _tokens_to_json
+from .woql_template import Parameter, WOQLTemplate
 
 # pp = pprint.PrettyPrinter(indent=4)
 
+# vocabulary elements that can be used without prefixes in woql.py queries,
+# shared by the queries until one loads its own: it is never modified in place
+_DEFAULT_VOCABULARY = {
+    "type": "rdf:type",
+    "label": "rdfs:label",
+    "Class": "owl:Class",
+    "DatatypeProperty": "owl:DatatypeProperty",
+    "ObjectProperty": "owl:ObjectProperty",
+    "Document": "terminus:Document",
+    "abstract": "terminus:Document",
+    "comment": "rdfs:comment",
+    "range": "rdfs:range",
+    "domain": "rdfs:domain",
+    "subClassOf": "rdfs:subClassOf",
+    "boolean": "xsd:boolean",
+    "string": "xsd:string",
+    "integer": "xsd:integer",
+    "decimal": "xsd:decimal",
+    "email": "xdd:email",
+    "json": "xdd:json",
+    "dateTime": "xsd:dateTime",
+    "date": "xsd:date",
+    "coordinate": "xdd:coordinate",
+    "line": "xdd:coordinatePolyline",
+    "polygon": "xdd:coordinatePolygon",
+}
+
 
 class WOQLQuery:
+    # A query is built from many short-lived sub-queries (one per argument of
+    # woql_and, when, select...), so instances are kept small: slotted, with
+    # the constant tables on the class, and without references to themselves,
+    # so they are freed as soon as they are used instead of by the garbage
+    # collector.
+    __slots__ = (
+        "_root",
+        "_position",
+        "_serialized",
+        "_chain_and",
+        "_chain_ended",
+        "_contains_update",
+        "_triple_builder_context",
+        "_vocab",
+        "_graph",
+    )
+
+    # operators which preserve global paging
+    _paging_transitive_properties = (
+        "select",
+        "from",
+        "start",
+        "when",
+        "opt",
+        "limit",
+    )
+    _update_operators = (
+        "woql:AddTriple",
+        "woql:DeleteTriple",
+        "woql:AddQuad",
+        "woql:DeleteQuad",
+        "woql:DeleteObject",
+        "woql:UpdateObject",
+    )
+
     def __init__(self, query=None, graph="schema/main"):
         """defines the internal functions of the woql query object - the language API is defined in WOQLQuery
 
@@ -23,51 +88,57 @@ class WOQLQuery:
         graph: str
                graph that this query is appled to, default to be schema/main"""
         if query:
-            self._query = query
+            self._root = query
         else:
-            self._query = {}
-        self._cursor = self._query
+            self._root = {}
+        self._position = self._root
+        # to_json() and fingerprint() of the query, until it is modified
+        self._serialized = None
+        # woql:And whose last element is the cursor, extended by chained calls
+        self._chain_and = None
         self._chain_ended = False
         self._contains_update = False
         self._triple_builder_context = {}
-        # operators which preserve global paging
-        self._paging_transitive_properties = [
-            "select",
-            "from",
-            "start",
-            "when",
-            "opt",
-            "limit",
-        ]
-        self._update_operators = [
-            "woql:AddTriple",
-            "woql:DeleteTriple",
-            "woql:AddQuad",
-            "woql:DeleteQuad",
-            "woql:DeleteObject",
-            "woql:UpdateObject",
-        ]
-
-        self._vocab = self._load_default_vocabulary()
-
-        # alias
-        self.subsumption = self.sub
-        self.equals = self.eq
-        self.substring = self.substr
-        self.update = self.update_object
-        self.delete = self.delete_object
-        self.read = self.read_object
-        self.optional = self.opt
-        self.idgenerator = self.idgen
-        self.concatenate = self.concat
-        self.typecast = self.cast
+        self._vocab = _DEFAULT_VOCABULARY
 
         # attribute for schema
         self._graph = graph
 
+    @property
+    def _query(self):
+        """The JSON-LD query, read by the builder methods to modify it.
+
+        Reading it drops the cached serializations, use ``_root`` to only look
+        at the query."""
+        self._serialized = None
+        return self._root
+
+    @_query.setter
+    def _query(self, query):
+        self._serialized = None
+        self._root = query
+
+    @property
+    def _cursor(self):
+        """The part of the query the next operator goes in, read to modify it.
+
+        Reading it drops the cached serializations."""
+        self._serialized = None
+        return self._position
+
+    @_cursor.setter
+    def _cursor(self, cursor):
+        self._serialized = None
+        self._position = cursor
+
     def __add__(self, other):
         return WOQLQuery().woql_and(self, other)
 
+    def __iadd__(self, other):
+        """``query += other`` appends ``other`` to ``query`` without copying it."""
+        self._cursor = self._query
+        return self.woql_and(other)
+
     # WOQLCore methods
     def _parameter_error(self, message):
         """Basic Error handling"""
@@ -86,7 +157,7 @@ class WOQLQuery:
     def _contains_update_check(self, json=None):
         """Does this query contain an update"""
         if not json:
-            json = self._query
+            json = self._root
         if not isinstance(json, dict):
             return False
         if json["@type"] in self._update_operators:
@@ -231,6 +302,8 @@ class WOQLQuery:
         subj = False
         if type(obj) == dict:
             return obj
+        elif isinstance(obj, Parameter):
+            return obj.slot("_clean_subject")
         elif type(obj) == str:
             if ":" in obj:
                 subj = obj
@@ -247,6 +320,8 @@ class WOQLQuery:
         pred = False
         if type(predicate) == dict:
             return predicate
+        if isinstance(predicate, Parameter):
+            return predicate.slot("_clean_predicate")
         if type(predicate) != str:
             self._parameter_error("Predicate must be a URI string")
             return str(predicate)
@@ -272,6 +347,8 @@ class WOQLQuery:
     def _clean_object(self, user_obj, target=None):
         """Transforms whatever is passed in as the object of a triple into the appropriate json-ld form (variable, literal or id)"""
         obj = {"@type": "woql:Datatype"}
+        if isinstance(user_obj, Parameter):
+            return user_obj.slot("_clean_object", target)
         if type(user_obj) == str:
             if self._looks_like_class(user_obj):
                 return self._clean_class(user_obj)
@@ -318,6 +395,8 @@ class WOQLQuery:
 
     def _clean_graph(self, graph):
         """Transforms a graph filter or graph id into the proper json-ld form"""
+        if isinstance(graph, Parameter):
+            return graph.slot("_clean_graph")
         return {"@type": "xsd:string", "@value": graph}
 
     def _expand_variable(self, varname, always=False):
@@ -341,6 +420,8 @@ class WOQLQuery:
             return {"@type": "woql:Node", "woql:node": varname}
 
     def _clean_class(self, user_class=None, string_only=None):
+        if isinstance(user_class, Parameter) and not string_only:
+            return user_class.slot("_clean_class")
         if type(user_class) != str:
             return ""
         if ":" not in user_class:
@@ -365,7 +446,7 @@ class WOQLQuery:
     def _get_context(self, query=None):
         """Retrieves the value of the current json-ld context"""
         if not query:
-            query = self._query
+            query = self._root
         for prop in query:
             if prop in self._paging_transitive_properties:
                 native_query = query[prop][1]
@@ -379,30 +460,7 @@ class WOQLQuery:
 
     def _load_default_vocabulary(self):
         """vocabulary elements that can be used without prefixes in woql.py queries"""
-        return {
-            "type": "rdf:type",
-            "label": "rdfs:label",
-            "Class": "owl:Class",
-            "DatatypeProperty": "owl:DatatypeProperty",
-            "ObjectProperty": "owl:ObjectProperty",
-            "Document": "terminus:Document",
-            "abstract": "terminus:Document",
-            "comment": "rdfs:comment",
-            "range": "rdfs:range",
-            "domain": "rdfs:domain",
-            "subClassOf": "rdfs:subClassOf",
-            "boolean": "xsd:boolean",
-            "string": "xsd:string",
-            "integer": "xsd:integer",
-            "decimal": "xsd:decimal",
-            "email": "xdd:email",
-            "json": "xdd:json",
-            "dateTime": "xsd:dateTime",
-            "date": "xsd:date",
-            "coordinate": "xdd:coordinate",
-            "line": "xdd:coordinatePolyline",
-            "polygon": "xdd:coordinatePolygon",
-        }
+        return dict(_DEFAULT_VOCABULARY)
 
     @property
     def _vocabulary(self, vocab):
@@ -418,8 +476,9 @@ class WOQLQuery:
 
         Parameters
         ----------
-        client: WOQLClient object
+        client: WOQLClient or AsyncWOQLClient object
             client that provide connection to the database for the query to execute.
+            With an AsyncWOQLClient the result is an awaitable.
         commit_msg: str
             optional, commit message for this query. Recommended for query that carrries an update.
         file_dict:
@@ -431,10 +490,74 @@ class WOQLQuery:
         else:
             return client.query(self, commit_msg, file_dict=file_dict)
 
+    def compile(self):
+        """Compile the query into a template, whose parameters are given later.
+
+        Values of the query are replaced by :class:`Parameter` placeholders,
+        and given to :meth:`WOQLTemplate.bind`. The template keeps the query
+        serialized, so binding it is much faster than building the query
+        again for each set of values.
+
+        Returns
+        -------
+        WOQLTemplate
+
+        Examples
+        --------
+        >>> template = (
+        ...     WOQLQuery()
+        ...     .triple("v:Person", "scm:name", Parameter("name"))
+        ...     .triple("v:Person", "scm:age", "v:Age")
+        ...     .compile()
+        ... )
+        >>> for name in ["Alice", "Bob"]:
+        ...     client.query(template.bind(name=name))
+        """
+        return WOQLTemplate(self)
+
     def to_json(self):
-        """Dumps the JSON-LD format of the query in a json string"""
+        """Dumps the JSON-LD format of the query in a json string
+
+        The string is kept until the query is modified with the builder methods,
+        so it is only computed once for a query that is logged, hashed and sent.
+        """
         return self._json()
 
+    def fingerprint(self):
+        """Content hash of the query, to recognize identical queries.
+
+        It is the SHA-256 of the canonical JSON of :meth:`to_dict` (sorted keys,
+        no whitespace), so it is the same in every process whatever the JSON
+        backend. Like :meth:`to_json`, it is kept until the query is modified
+        with the builder methods.
+
+        Returns
+        -------
+        str
+            Hexadecimal digest.
+
+        Examples
+        --------
+        >>> query = WOQLQuery().triple("v:S", "v:P", "v:O")
+        >>> query.fingerprint() == WOQLQuery().triple("v:S", "v:P", "v:O").fingerprint()
+        True
+        """
+        serialized = self._serialized_forms()
+        if "fingerprint" not in serialized:
+            canonical = std_json.dumps(
+                self.to_dict(), sort_keys=True, separators=(",", ":")
+            )
+            serialized["fingerprint"] = hashlib.sha256(
+                canonical.encode("utf-8")
+            ).hexdigest()
+        return serialized["fingerprint"]
+
+    def _serialized_forms(self):
+        """Cache of the serializations of the query, empty once it is modified."""
+        if self._serialized is None:
+            self._serialized = {}
+        return self._serialized
+
     def from_json(self, input_json):
         """Set a query from a JSON-LD json string"""
         return self._json(input_json)
@@ -444,14 +567,22 @@ class WOQLQuery:
         if the argument is present, the current query is set to it,
         if the argument is not present, the current json version of this query is returned"""
         if input_json:
-            self.from_dict(json.loads(input_json))
+            self.from_dict(json_backend.loads(input_json))
             return self
-        else:
-            return json.dumps(self.to_dict(), sort_keys=True)
+        serialized = self._serialized_forms()
+        if "json" not in serialized:
+            serialized["json"] = json_backend.dumps(self.to_dict(), sort_keys=True)
+        return serialized["json"]
 
     def to_dict(self):
-        """Give the dictionary that represents the query in JSON-LD format."""
-        return _copy_dict(self._query, True)
+        """Give the dictionary that represents the query in JSON-LD format.
+
+        A new dictionary is returned by each call. Once :meth:`to_json` has
+        been called, and until the query is modified, it is decoded from the
+        JSON, which is faster than building it from the query."""
+        if self._serialized is not None and "json" in self._serialized:
+            return json_backend.loads(self._serialized["json"])
+        return _copy_dict(self._root, True)
 
     def from_dict(self, dictdata):
         """Set a query from a dictionary that represents the query in JSON-LD format."""
@@ -493,26 +624,49 @@ class WOQLQuery:
         new_woql = WOQLQuery().quad("v:S", "v:P", "v:O", "schema/*")
         result = new_woql.execute(client)
         bindings = result.get("bindings", [])
+        vocab = dict(self._vocab)
         for each_result in bindings:
             for item in each_result:
                 if type(item) == str:
                     spl = item.split(":")
                     if len(spl) == 2 and spl[1] and spl[0] != "_":
-                        self._vocab[spl[0]] = spl[1]
+                        vocab[spl[0]] = spl[1]
+        self._vocab = vocab
 
     def _wrap_cursor_with_and(self):
-        if self._cursor.get("@type") == "woql:And" and self._cursor.get(
-            "woql:query_list"
-        ):
-            next_item = len(self._cursor.get("woql:query_list"))
+        """Make room for the next operator after the one at the cursor.
+
+        The cursor is moved to a new element of a ``woql:And``. When the
+        cursor is already the last element of an ``woql:And`` built by the
+        previous chained call, the element is appended to it, so chaining
+        ``.triple().triple()...`` builds one flat list in linear time."""
+        query_list = self._cursor.get("woql:query_list")
+        if self._cursor.get("@type") == "woql:And" and query_list:
+            self._chain_and = self._cursor
+            next_item = len(query_list)
             self.woql_and({})
-            self._cursor = self._cursor["woql:query_list"][next_item]["woql:query"]
+            self._cursor = query_list[next_item]["woql:query"]
+        elif self._chain_and is not None and self._is_chain_tail():
+            query_list = self._chain_and["woql:query_list"]
+            self._cursor = {}
+            query_list.append(self._qle(self._cursor, len(query_list)))
         else:
-            new_json = WOQLQuery().from_dict(self._cursor)
+            # move (not copy) the operator at the cursor into the woql:And
+            current = dict(self._cursor)
             self._cursor.clear()
-            self.woql_and(new_json, {})
+            self.woql_and(current, {})
+            self._chain_and = self._cursor
             self._cursor = self._cursor["woql:query_list"][1]["woql:query"]
 
+    def _is_chain_tail(self):
+        """Whether the cursor is the last element of :attr:`_chain_and`."""
+        query_list = self._chain_and.get("woql:query_list")
+        return (
+            self._chain_and.get("@type") == "woql:And"
+            and bool(query_list)
+            and query_list[-1]["woql:query"] is self._cursor
+        )
+
     def using(self, collection, subq=None):
         if collection and collection == "woql:args":
             return ["woql:collection", "woql:query"]
@@ -636,9 +790,10 @@ class WOQLQuery:
         """
         queries = list(args)
         if self._cursor.get("@type") and self._cursor["@type"] != "woql:And":
-            new_json = WOQLQuery().from_dict(self._cursor)
+            # the operator at the cursor is moved into the list, not copied
+            current = dict(self._cursor)
             self._cursor.clear()
-            queries = [new_json] + queries
+            queries = [current] + queries
         if queries and queries[0] == "woql:args":
             return ["woql:query_list"]
         self._cursor["@type"] = "woql:And"
@@ -3588,3 +3743,15 @@ class WOQLQuery:
         if len(vars_tuple) == 1:
             vars_tuple = vars_tuple[0]
         return vars_tuple
+
+    # alias
+    subsumption = sub
+    equals = eq
+    substring = substr
+    update = update_object
+    delete = delete_object
+    read = read_object
+    optional = opt
+    idgenerator = idgen
+    concatenate = concat
+    typecast = cast
@@ -0,0 +1,194 @@
+"""woql_template.py"""
+import re
+import uuid
+
+import terminusdb_client.json_backend as json_backend
+
+# type of the json-ld placeholders left in a query by the parameters
+_SLOT_TYPE = "woql:Parameter"
+
+
+class Parameter:
+    """Named placeholder for a value of a query to :meth:`WOQLQuery.compile`.
+
+    It is passed to the query builders instead of a subject, predicate, object,
+    class or graph, and replaced by the value given to :meth:`WOQLTemplate.bind`,
+    cleaned as the builder would have cleaned it.
+
+    Parameters
+    ----------
+    name : str
+        Name of the keyword argument of :meth:`WOQLTemplate.bind` giving the
+        value.
+
+    Examples
+    --------
+    >>> name = Parameter("name")
+    >>> template = WOQLQuery().triple("v:Person", "scm:name", name).compile()
+    >>> template.parameters
+    ('name',)
+    """
+
+    def __init__(self, name):
+        if not isinstance(name, str) or not name:
+            raise ValueError("The name of a parameter must be a non empty string")
+        self.name = name
+
+    def __repr__(self):
+        return f"Parameter({self.name!r})"
+
+    def slot(self, cleaner, target=None):
+        """Json-ld placeholder of the parameter in a query.
+
+        Parameters
+        ----------
+        cleaner : str
+            Name of the :class:`WOQLQuery` method cleaning the value when the
+            template is bound.
+        target : str, optional
+            Datatype passed to the cleaner with the value.
+        """
+        slot = {
+            "@type": _SLOT_TYPE,
+            "woql:parameter_name": self.name,
+            "woql:cleaner": cleaner,
+        }
+        if target is not None:
+            slot["woql:target"] = target
+        return slot
+
+
+class WOQLTemplate:
+    """A query compiled by :meth:`WOQLQuery.compile`, with named parameters.
+
+    The query is serialized once, when it is compiled. :meth:`bind` cleans the
+    values of the parameters and inserts their json in the serialized query,
+    so running the same query with different values does not build it again.
+
+    Parameters
+    ----------
+    query : WOQLQuery
+        Query using :class:`Parameter` placeholders. It is not modified, and
+        later changes to it do not change the template.
+
+    Raises
+    ------
+    ValueError
+        If a parameter is used where its value cannot be substituted, like in
+        the options of a query or a list of values.
+
+    Examples
+    --------
+    >>> template = (
+    ...     WOQLQuery()
+    ...     .triple("v:Person", "scm:name", Parameter("name"))
+    ...     .triple("v:Person", "scm:age", "v:Age")
+    ...     .compile()
+    ... )
+    >>> query = template.bind(name="Alice")
+    >>> query.to_json() == (
+    ...     WOQLQuery()
+    ...     .triple("v:Person", "scm:name", "Alice")
+    ...     .triple("v:Person", "scm:age", "v:Age")
+    ...     .to_json()
+    ... )
+    True
+    """
+
+    def __init__(self, query):
+        self._query_class = type(query)
+        # never modified in place, it is shared with the bound queries
+        self._vocab = query._vocab
+        sentinel = f"woql-parameter-{uuid.uuid4().hex}-"
+        slots = []
+        skeleton = self._replace_slots(query.to_dict(), sentinel, slots)
+        pieces = re.split(
+            f'"{re.escape(sentinel)}(\\d+)"',
+            json_backend.dumps(skeleton, sort_keys=True),
+        )
+        # json text around the slots
+        self._segments = pieces[0::2]
+        # (parameter, cleaner, arguments) of the slots, without duplicates as a
+        # parameter is usually cleaned the same way in all its slots
+        self._cleanings = list(dict.fromkeys(slots))
+        # index in _cleanings of the slots, in the order of the text
+        self._slot_cleanings = [
+            self._cleanings.index(slots[int(index)]) for index in pieces[1::2]
+        ]
+        self.parameters = tuple(dict.fromkeys(slot[0] for slot in slots))
+        self._parameter_names = frozenset(self.parameters)
+        self._cleaner = self._query_class()
+        self._cleaner._vocab = self._vocab
+
+    def bind(self, **values):
+        """The query with the values of its parameters.
+
+        Parameters
+        ----------
+        values
+            Value of each parameter, as would have been given to the builder
+            in its place.
+
+        Returns
+        -------
+        WOQLQuery
+            A new query, whose json is already computed.
+
+        Raises
+        ------
+        ValueError
+            If a parameter has no value, or a value is not for a parameter.
+        """
+        return self._load(self.bind_json(**values))
+
+    def bind_json(self, **values):
+        """The json text of the query with the values of its parameters.
+
+        It is the :meth:`WOQLQuery.to_json` of the query, see :meth:`bind`.
+        """
+        if values.keys() != self._parameter_names:
+            missing = [name for name in self.parameters if name not in values]
+            if missing:
+                raise ValueError(f"No value for the parameters: {', '.join(missing)}")
+            unknown = [name for name in values if name not in self.parameters]
+            raise ValueError(f"Unknown parameters: {', '.join(unknown)}")
+        cleaned = [
+            json_backend.dumps(
+                getattr(self._cleaner, cleaner)(values[name], *args), sort_keys=True
+            )
+            for name, cleaner, args in self._cleanings
+        ]
+        parts = [self._segments[0]]
+        for cleaning, segment in zip(self._slot_cleanings, self._segments[1:]):
+            parts.append(cleaned[cleaning])
+            parts.append(segment)
+        return "".join(parts)
+
+    def _load(self, json_text):
+        query = self._query_class(json_backend.loads(json_text))
+        query._vocab = self._vocab
+        query._serialized = {"json": json_text}
+        return query
+
+    def _replace_slots(self, item, sentinel, slots):
+        """Copy of the json-ld ``item`` with the placeholders replaced by strings
+        made of ``sentinel`` and their index in ``slots``."""
+        if isinstance(item, dict):
+            if "woql:parameter_name" in item:
+                if item.get("@type") != _SLOT_TYPE or "woql:index" in item:
+                    raise ValueError(
+                        f"The parameter {item['woql:parameter_name']} cannot be "
+                        "used in a list"
+                    )
+                args = (item["woql:target"],) if "woql:target" in item else ()
+                slots.append((item["woql:parameter_name"], item["woql:cleaner"], args))
+                return f"{sentinel}{len(slots) - 1}"
+            return {
+                key: self._replace_slots(value, sentinel, slots)
+                for key, value in item.items()
+            }
+        if isinstance(item, list):
+            return [self._replace_slots(value, sentinel, slots) for value in item]
+        if isinstance(item, Parameter):
+            raise ValueError(f"The parameter {item.name} cannot be used here")
+        return item